@@ -0,0 +1,83 @@
+"""
+Медиафайлы с хешем содержимого в имени.
+
+При сохранении изображения в имя файла добавляется хеш его содержимого:
+"images/products/phone.jpg" -> "images/products/phone.3f2a9c0d1e4b5a67.jpg".
+Уменьшенные копии imagekit хранятся в каталоге с именем исходного файла,
+поэтому их URL тоже содержат хеш. Файл с хешем в имени никогда не
+меняется, и браузеры и CDN кэшируют его на год без повторных проверок.
+"""
+
+import hashlib
+import os
+import re
+
+from django.db import models
+from django.db.models.fields.files import ImageFieldFile
+
+HASH_LENGTH = 16
+HASHED_NAME_RE = re.compile(rf"\.[0-9a-f]{{{HASH_LENGTH}}}(?=[./_])")
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def content_hash(content):
+    """Хеш содержимого файла; позиция чтения возвращается в начало"""
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(name, content):
+    root, ext = os.path.splitext(name)
+    return f"{root}.{content_hash(content)}{ext}"
+
+
+def is_hashed(path):
+    """Содержит ли путь хеш содержимого файла"""
+    return HASHED_NAME_RE.search(path) is not None
+
+
+class ContentHashedFieldFile(ImageFieldFile):
+    def save(self, name, content, save=True):
+        super().save(hashed_name(name, content), content, save)
+
+
+class ContentHashedImageField(models.ImageField):
+    """ImageField, добавляющий хеш содержимого в имя сохраняемого файла"""
+
+    attr_class = ContentHashedFieldFile
+
+
+def parse_range(header, size):
+    """
+    Разбирает заголовок Range с одним диапазоном байтов. Возвращает пару
+    (начало, конец включительно), None для заголовка, который следует
+    игнорировать, и ValueError для диапазона за пределами файла.
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        # Несколько диапазонов и другие единицы: отдается весь файл
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if start and end and int(start) > int(end):
+        # Синтаксически неверный диапазон игнорируется (RFC 7233, 3.1)
+        return None
+    if size == 0:
+        # В пустом файле нет ни одного байта для диапазона
+        raise ValueError(header)
+    if not start:
+        # Последние end байтов
+        length = int(end)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size:
+        raise ValueError(header)
+    return start, end
@@ -0,0 +1,310 @@
+"""
+Метрики запросов: количество и время запросов к БД, время сериализации и
+полное время ответа для каждого представления.
+
+Метрики накапливаются в памяти процесса в гистограммах и отдаются в
+текстовом формате Prometheus. При нескольких процессах сервера каждый
+процесс накапливает свои значения, и ответ содержит метрики процесса,
+обработавшего запрос метрик.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Подозрение на N+1: при разнице размеров страниц не меньше MIN_SPREAD
+# элементов каждый лишний элемент дает в среднем не меньше RATIO запросов
+N_PLUS_ONE_MIN_SPREAD = 5
+N_PLUS_ONE_RATIO = 0.5
+# Количество различных размеров страниц, запоминаемых для представления
+N_PLUS_ONE_MAX_SIZES = 20
+
+current_metrics = ContextVar("current_metrics", default=None)
+
+
+class RequestMetrics:
+    """
+    Счетчики одного запроса. Экземпляр подключается к соединению с БД
+    через connection.execute_wrapper и учитывает каждый SQL-запрос.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+
+class Histogram:
+    """Гистограмма Prometheus с метками; счетчики корзин не накопительные"""
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.values = {}
+
+    def observe(self, labels, value):
+        counts = self.values.get(labels)
+        if counts is None:
+            # Корзины, сумма и количество наблюдений
+            counts = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-2] += value
+        counts[-1] += 1
+
+    def render(self, label_names):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for labels, counts in sorted(self.values.items()):
+            label_text = format_labels(label_names, labels)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                bucket_labels = format_labels(
+                    (*label_names, "le"), (*labels, format_value(bound))
+                )
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{label_text} {format_value(counts[-2])}")
+            lines.append(f"{self.name}_count{label_text} {counts[-1]}")
+        return lines
+
+
+def format_value(value):
+    if isinstance(value, str):
+        return value
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def format_labels(names, values):
+    pairs = (
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"),
+        )
+        for name, value in zip(names, values)
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+class NPlusOneDetector:
+    """
+    Находит представления, у которых количество запросов к БД растет с
+    количеством элементов в ответе. Для каждого размера страницы хранится
+    минимальное наблюдавшееся количество запросов: так попадания в кэш и
+    первые запросы после сброса кэша не влияют на результат.
+    """
+
+    def __init__(self):
+        self.observations = {}
+        self.suspected = {}
+
+    def observe(self, view, items, queries):
+        if not items:
+            # Для пустой страницы не выполняются запросы prefetch_related
+            return
+        sizes = self.observations.setdefault(view, {})
+        previous = sizes.get(items)
+        if previous is None and len(sizes) >= N_PLUS_ONE_MAX_SIZES:
+            return
+        if previous is not None and queries >= previous:
+            return
+        sizes[items] = queries
+        if len(sizes) > 1:
+            self.check(view, sizes)
+
+    def check(self, view, sizes):
+        ordered = sorted(sizes.items())
+        (small, small_queries), (large, large_queries) = ordered[0], ordered[-1]
+        spread = large - small
+        if spread < N_PLUS_ONE_MIN_SPREAD:
+            return
+        ratio = (large_queries - small_queries) / spread
+        if ratio >= N_PLUS_ONE_RATIO:
+            if view not in self.suspected:
+                logger.warning(
+                    "Возможна проблема N+1 в %s: %d запросов для %d элементов, "
+                    "%d запросов для %d элементов",
+                    view,
+                    small_queries,
+                    small,
+                    large_queries,
+                    large,
+                )
+            self.suspected[view] = ratio
+        else:
+            self.suspected.pop(view, None)
+
+
+class MetricsRegistry:
+    """Метрики запросов процесса"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = {}
+        self.duration = Histogram(
+            "http_request_duration_seconds",
+            "Время ответа представления.",
+            LATENCY_BUCKETS,
+        )
+        self.db_queries = Histogram(
+            "http_request_db_queries",
+            "Количество запросов к БД за один запрос.",
+            QUERY_BUCKETS,
+        )
+        self.db_duration = Histogram(
+            "http_request_db_duration_seconds",
+            "Время запросов к БД за один запрос.",
+            LATENCY_BUCKETS,
+        )
+        self.serializer_duration = Histogram(
+            "http_request_serializer_duration_seconds",
+            "Время сериализации данных ответа.",
+            LATENCY_BUCKETS,
+        )
+        self.n_plus_one = NPlusOneDetector()
+        self.throttled = {}
+
+    def observe(self, view, method, status, metrics, items=None):
+        elapsed = metrics.elapsed
+        labels = (view, method)
+        with self._lock:
+            key = (view, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.duration.observe(labels, elapsed)
+            self.db_queries.observe(labels, metrics.queries)
+            self.db_duration.observe(labels, metrics.db_time)
+            self.serializer_duration.observe(labels, metrics.serializer_time)
+            if method == "GET" and items is not None:
+                self.n_plus_one.observe(view, items, metrics.queries)
+        return elapsed
+
+    def observe_throttled(self, scope):
+        with self._lock:
+            self.throttled[scope] = self.throttled.get(scope, 0) + 1
+
+    def render(self):
+        """Метрики в текстовом формате Prometheus"""
+        with self._lock:
+            lines = [
+                "# HELP http_requests_total Количество обработанных запросов.",
+                "# TYPE http_requests_total counter",
+            ]
+            for key, count in sorted(self.requests.items()):
+                labels = format_labels(("view", "method", "status"), key)
+                lines.append(f"http_requests_total{labels} {count}")
+            for histogram in (
+                self.duration,
+                self.db_queries,
+                self.db_duration,
+                self.serializer_duration,
+            ):
+                lines.extend(histogram.render(("view", "method")))
+            lines.extend(
+                [
+                    "# HELP http_view_n_plus_one_suspected Среднее количество "
+                    "дополнительных запросов на элемент ответа для представлений "
+                    "с подозрением на N+1.",
+                    "# TYPE http_view_n_plus_one_suspected gauge",
+                ]
+            )
+            for view, ratio in sorted(self.n_plus_one.suspected.items()):
+                labels = format_labels(("view",), (view,))
+                lines.append(
+                    f"http_view_n_plus_one_suspected{labels} {format_value(ratio)}"
+                )
+            lines.extend(
+                [
+                    "# HELP http_throttled_requests_total Количество запросов, "
+                    "отклоненных ограничением частоты.",
+                    "# TYPE http_throttled_requests_total counter",
+                ]
+            )
+            for scope, count in sorted(self.throttled.items()):
+                labels = format_labels(("scope",), (scope,))
+                lines.append(f"http_throttled_requests_total{labels} {count}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self.reset()
+
+
+registry = MetricsRegistry()
+
+
+@contextmanager
+def measure_serialization():
+    """
+    Время выполнения блока добавляется к времени сериализации текущего
+    запроса. Вложенные блоки не учитываются повторно.
+    """
+    metrics = current_metrics.get()
+    if metrics is None or metrics.serializing:
+        yield
+        return
+    metrics.serializing = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += time.perf_counter() - start
+        metrics.serializing = False
+
+
+@lru_cache(maxsize=None)
+def timed_serializer_class(serializer_class):
+    """Подкласс сериализатора, учитывающий время получения data"""
+    data = serializer_class.data
+
+    def timed_data(self):
+        with measure_serialization():
+            return data.fget(self)
+
+    return type(
+        serializer_class.__name__,
+        (serializer_class,),
+        {"__module__": serializer_class.__module__, "data": property(timed_data)},
+    )
+
+
+class SerializerMetricsMixin:
+    """
+    Mixin для GenericAPIView: время получения data сериализаторов
+    представления учитывается в метриках запроса как время сериализации.
+    Вне запроса с метриками, например, при генерации схемы API,
+    сериализаторы не изменяются.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if current_metrics.get() is not None:
+            serializer.__class__ = timed_serializer_class(serializer.__class__)
+        return serializer
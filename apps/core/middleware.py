@@ -0,0 +1,88 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+
+from .metrics import RequestMetrics, current_metrics, registry
+
+
+def get_response_items(response):
+    """Количество элементов в ответе со списком или None"""
+    data = getattr(response, "data", None)
+    if isinstance(data, dict):
+        data = data.get("results")
+    if isinstance(data, list):
+        return len(data)
+    return None
+
+
+class RequestMetricsMiddleware:
+    """
+    Учитывает количество и время запросов к БД, время сериализации и
+    полное время ответа каждого представления. Значения добавляются в
+    заголовок Server-Timing ответа и в метрики процесса для /metrics.
+
+    Запросы к БД считаются через connection.execute_wrapper, поэтому
+    накладные расходы — несколько вызовов perf_counter на SQL-запрос.
+    Для потоковых ответов учитывается время до начала передачи тела.
+    Время сериализации учитывают представления с SerializerMetricsMixin.
+
+    Middleware работает и в синхронном, и в асинхронном стеке, поэтому
+    под ASGI асинхронные представления не переводятся в поток.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            with connection.execute_wrapper(metrics):
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.observe(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            with connection.execute_wrapper(metrics):
+                response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.observe(request, response, metrics)
+
+    def observe(self, request, response, metrics):
+        match = request.resolver_match
+        view = (match.view_name or match._func_path) if match else "unmatched"
+        elapsed = registry.observe(
+            view,
+            request.method,
+            response.status_code,
+            metrics,
+            items=get_response_items(response),
+        )
+        if settings.METRICS_SERVER_TIMING:
+            response["Server-Timing"] = ", ".join(
+                [
+                    f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries} queries"',
+                    f"serializer;dur={metrics.serializer_time * 1000:.2f}",
+                    f"total;dur={elapsed * 1000:.2f}",
+                ]
+            )
+        return response
@@ -0,0 +1,103 @@
+import pytest
+from django.http import Http404
+from django.test import RequestFactory
+
+from apps.core.media import is_hashed, parse_range
+from apps.core.views import media_view
+
+HASHED_NAME = "images/products/phone.0123456789abcdef.jpg"
+CONTENT = bytes(range(256)) * 1024
+
+
+@pytest.fixture
+def media_file(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    path = tmp_path / HASHED_NAME
+    path.parent.mkdir(parents=True)
+    path.write_bytes(CONTENT)
+    return path
+
+
+def get(path, **headers):
+    request = RequestFactory().get(f"/media/{path}", headers=headers)
+    return media_view(request, path)
+
+
+def test_media_view_full_file(media_file):
+    """Тест отдачи файла с хешем: кэширование на год, ETag и Accept-Ranges."""
+    response = get(HASHED_NAME)
+
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) == CONTENT
+    assert response["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert response["Accept-Ranges"] == "bytes"
+    assert response["ETag"]
+
+
+def test_media_view_conditional(media_file):
+    """Тест условного запроса: совпадающий ETag дает 304 без тела."""
+    etag = get(HASHED_NAME)["ETag"]
+
+    response = get(HASHED_NAME, if_none_match=etag)
+
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_media_view_range(media_file):
+    """Тест запросов диапазона: 206 с Content-Range, 416 за пределами файла."""
+    size = len(CONTENT)
+
+    response = get(HASHED_NAME, range="bytes=100-1099")
+    assert response.status_code == 206
+    assert response["Content-Range"] == f"bytes 100-1099/{size}"
+    assert b"".join(response.streaming_content) == CONTENT[100:1100]
+
+    response = get(HASHED_NAME, range="bytes=-10")
+    assert b"".join(response.streaming_content) == CONTENT[-10:]
+
+    # Устаревший If-Range: отдается весь файл
+    response = get(HASHED_NAME, range="bytes=0-9", if_range='"stale"')
+    assert response.status_code == 200
+
+    response = get(HASHED_NAME, range=f"bytes={size}-")
+    assert response.status_code == 416
+    assert response["Content-Range"] == f"bytes */{size}"
+
+
+def test_media_view_invalid_range(media_file):
+    """Тест: диапазон с началом после конца игнорируется, отдается весь файл."""
+    response = get(HASHED_NAME, range="bytes=5-2")
+
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) == CONTENT
+
+
+def test_media_view_empty_file_range(media_file):
+    """Тест: любой диапазон пустого файла дает 416 с bytes */0."""
+    empty_name = "images/products/empty.0123456789abcdef.jpg"
+    (media_file.parent / "empty.0123456789abcdef.jpg").write_bytes(b"")
+
+    for header in ("bytes=-5", "bytes=0-"):
+        response = get(empty_name, range=header)
+        assert response.status_code == 416
+        assert response["Content-Range"] == "bytes */0"
+
+
+def test_media_view_not_found(media_file):
+    """Тест 404 для отсутствующих файлов и путей за пределами MEDIA_ROOT."""
+    for path in ("images/missing.jpg", "../outside.jpg", "images"):
+        with pytest.raises(Http404):
+            get(path)
+
+
+def test_media_helpers():
+    assert is_hashed(HASHED_NAME)
+    assert is_hashed("CACHE/images/images/products/phone.0123456789abcdef/a1.jpg")
+    assert not is_hashed("images/products/phone.jpg")
+    assert parse_range("bytes=5-", 10) == (5, 9)
+    assert parse_range("bytes=0-1,4-5", 10) is None
+    assert parse_range("bytes=8-2", 10) is None
+    for header in ("bytes=-5", "bytes=0-", "bytes=0-0"):
+        with pytest.raises(ValueError):
+            parse_range(header, 0)
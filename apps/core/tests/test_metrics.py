@@ -0,0 +1,133 @@
+import re
+
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core.metrics import Histogram, NPlusOneDetector, registry
+from apps.core.middleware import RequestMetricsMiddleware
+from apps.shop.serializers import ProductSerializer
+
+
+@pytest.fixture(autouse=True)
+def clear_registry():
+    registry.clear()
+    yield
+    registry.clear()
+
+
+@pytest.mark.django_db
+def test_server_timing_header():
+    """Тест заголовка Server-Timing: количество запросов совпадает с фактическим."""
+    client = APIClient()
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("product-list"))
+
+    assert response.status_code == 200
+    timing = response["Server-Timing"]
+    assert f'desc="{len(queries)} queries"' in timing
+    assert re.search(r"serializer;dur=\d+\.\d+", timing)
+    assert re.search(r"total;dur=\d+\.\d+", timing)
+
+
+@pytest.mark.django_db
+def test_serializer_time_measured_per_view():
+    """Тест: время сериализации учитывается без изменения классов DRF."""
+    response = APIClient().get(reverse("product-list"))
+
+    assert response.status_code == 200
+    assert "__wrapped__" not in vars(ProductSerializer.data.fget)
+    assert type(ProductSerializer()) is ProductSerializer
+
+
+def test_async_middleware():
+    """Тест: под ASGI middleware остается асинхронным и учитывает запрос."""
+
+    async def get_response(request):
+        return HttpResponse("ok")
+
+    middleware = RequestMetricsMiddleware(get_response)
+    assert iscoroutinefunction(middleware)
+
+    response = async_to_sync(middleware)(RequestFactory().get("/"))
+
+    assert response.status_code == 200
+    assert 'desc="0 queries"' in response["Server-Timing"]
+    assert 'http_requests_total{view="unmatched",method="GET",status="200"} 1' in (
+        registry.render()
+    )
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(admin_client):
+    """Тест метрик в формате Prometheus после запросов к API."""
+    client = APIClient()
+    client.get(reverse("product-list"))
+    client.get(reverse("product-list"))
+
+    response = admin_client.get(reverse("metrics"))
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    text = response.content.decode()
+    labels = 'view="product-list",method="GET"'
+    assert (
+        f'http_requests_total{{view="product-list",method="GET",status="200"}} 2'
+        in text
+    )
+    assert f"http_request_duration_seconds_count{{{labels}}} 2" in text
+    assert f'http_request_db_queries_bucket{{{labels},le="+Inf"}} 2' in text
+    assert "# TYPE http_request_serializer_duration_seconds histogram" in text
+
+
+@pytest.mark.django_db
+def test_metrics_token(settings):
+    """Тест доступа к метрикам по токену."""
+    settings.METRICS_TOKEN = "secret"
+    client = APIClient()
+
+    assert client.get(reverse("metrics")).status_code == 403
+    response = client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret")
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_metrics_denied_by_default(client, django_user_model):
+    """Тест: без токена метрики недоступны анонимам и обычным пользователям."""
+    assert client.get(reverse("metrics")).status_code == 403
+
+    client.force_login(django_user_model.objects.create_user("customer"))
+    assert client.get(reverse("metrics")).status_code == 403
+
+
+def test_histogram_render():
+    """Тест накопительных корзин гистограммы."""
+    histogram = Histogram("queries", "Запросы.", (1, 5))
+    for value in (0, 1, 3, 10):
+        histogram.observe(("list",), value)
+
+    lines = histogram.render(("view",))
+
+    assert 'queries_bucket{view="list",le="1"} 2' in lines
+    assert 'queries_bucket{view="list",le="5"} 3' in lines
+    assert 'queries_bucket{view="list",le="+Inf"} 4' in lines
+    assert 'queries_sum{view="list"} 14.0' in lines
+    assert 'queries_count{view="list"} 4' in lines
+
+
+def test_n_plus_one_detector():
+    """Тест обнаружения роста количества запросов с размером страницы."""
+    detector = NPlusOneDetector()
+    for items, queries in [(10, 3), (2, 3), (50, 3), (50, 0)]:
+        detector.observe("constant", items, queries)
+        # Запрос на каждый элемент страницы
+        detector.observe("n-plus-one", items, items + 2)
+
+    assert "constant" not in detector.suspected
+    assert detector.suspected["n-plus-one"] == 1
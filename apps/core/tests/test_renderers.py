@@ -0,0 +1,62 @@
+import datetime
+from decimal import Decimal
+from io import BytesIO
+
+import pytest
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from apps.core import parsers, renderers
+from apps.core.parsers import FastJSONParser
+from apps.core.renderers import FastJSONRenderer
+
+DATA = {
+    "price": Decimal("1999.90"),
+    "created_at": datetime.datetime(
+        2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc
+    ),
+    "date": datetime.date(2024, 5, 1),
+    "time": datetime.time(9, 15),
+    "name": "Смартфон",
+    "nested": [{"id": 1, "items": [1, 2.5, None, True]}],
+    1: "нестроковый ключ",
+}
+
+
+@pytest.mark.parametrize("orjson_installed", [True, False])
+def test_fast_json_renderer_matches_drf(monkeypatch, orjson_installed):
+    """Тест: вывод рендерера совпадает с JSONRenderer с orjson и без него."""
+    if not orjson_installed:
+        monkeypatch.setattr(renderers, "orjson", None)
+
+    assert FastJSONRenderer().render(DATA) == JSONRenderer().render(DATA)
+    assert FastJSONRenderer().render(
+        DATA, "application/json; indent=2"
+    ) == JSONRenderer().render(DATA, "application/json; indent=2")
+
+
+def test_fast_json_renderer_escapes_line_separators():
+    """Тест: U+2028 и U+2029 экранируются так же, как в JSONRenderer."""
+    data = {"name": "строка\u2028абзац\u2029", "items": ["\u2028"]}
+
+    rendered = FastJSONRenderer().render(data)
+
+    assert rendered == JSONRenderer().render(data)
+    assert b"\\u2028" in rendered and b"\\u2029" in rendered
+
+
+@pytest.mark.parametrize("orjson_installed", [True, False])
+def test_fast_json_parser(monkeypatch, orjson_installed):
+    """Тест разбора JSON и ошибки для некорректного тела запроса."""
+    if not orjson_installed:
+        monkeypatch.setattr(parsers, "orjson", None)
+    parser = FastJSONParser()
+
+    body = '{"product_id": 1, "quantity": 2.5, "name": "Чехол"}'.encode()
+    assert parser.parse(BytesIO(body)) == {
+        "product_id": 1,
+        "quantity": 2.5,
+        "name": "Чехол",
+    }
+    with pytest.raises(ParseError):
+        parser.parse(BytesIO(b'{"product_id": '))
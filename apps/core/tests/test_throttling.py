@@ -0,0 +1,100 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework.test import APIClient
+
+from apps.core.metrics import registry
+from apps.core.throttling import LocalBucketStore
+
+
+@pytest.fixture(autouse=True)
+def enable_throttling(settings):
+    settings.THROTTLE_ENABLED = True
+    cache.clear()
+    registry.clear()
+    yield
+    cache.clear()
+    registry.clear()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("backend", ["local", "cache"])
+def test_auth_throttling(settings, admin_client, backend):
+    """Тест отказа 429 после исчерпания жетонов и счетчика отказов."""
+    settings.THROTTLE_BACKEND = backend
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {"auth": "3/min"},
+    }
+    client = APIClient()
+    url = reverse("user-register")
+
+    statuses = [client.post(url, {}, format="json").status_code for _ in range(4)]
+
+    assert statuses == [400, 400, 400, 429]
+    response = client.post(url, {}, format="json")
+    assert 0 < int(response["Retry-After"]) <= 20
+    metrics = admin_client.get(reverse("metrics")).content.decode()
+    assert 'http_throttled_requests_total{scope="auth"} 2' in metrics
+
+
+@pytest.mark.django_db
+def test_forwarded_for_not_trusted(settings):
+    """Тест: подмена X-Forwarded-For без доверенных прокси не обходит лимит."""
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {"auth": "1/min"},
+    }
+    client = APIClient()
+    url = reverse("user-register")
+
+    assert client.post(url, {}, HTTP_X_FORWARDED_FOR="10.0.0.1").status_code == 400
+    assert client.post(url, {}, HTTP_X_FORWARDED_FOR="10.0.0.2").status_code == 429
+
+
+@pytest.mark.django_db
+def test_cart_throttling_per_user(settings):
+    """Тест отдельных корзин жетонов для разных пользователей."""
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {"cart": "1/min"},
+    }
+    first, second = APIClient(), APIClient()
+    first.force_authenticate(baker.make("auth.User"))
+    second.force_authenticate(baker.make("auth.User"))
+    url = reverse("cart-detail")
+
+    assert first.get(url).status_code == 200
+    assert first.get(url).status_code == 429
+    assert second.get(url).status_code == 200
+    # Каталог в другой области и без лимита
+    assert first.get(reverse("category-list")).status_code == 200
+
+
+def test_bucket_refill(monkeypatch):
+    """Тест пополнения корзины жетонов со временем."""
+    now = [100.0]
+    monkeypatch.setattr("apps.core.throttling.time.monotonic", lambda: now[0])
+    store = LocalBucketStore(shards=2)
+
+    assert store.consume("key", 2, 0.5) is None
+    assert store.consume("key", 2, 0.5) is None
+    assert store.consume("key", 2, 0.5) == pytest.approx(2.0)
+
+    now[0] += 2
+    assert store.consume("key", 2, 0.5) is None
+    assert store.consume("key", 2, 0.5) == pytest.approx(2.0)
+
+
+def test_bucket_store_size_limited():
+    """Тест: при переполнении удаляется корзина, к которой дольше не обращались."""
+    store = LocalBucketStore(shards=1, shard_size=2)
+
+    store.consume("first", 1, 1)
+    store.consume("second", 1, 1)
+    assert store.consume("first", 1, 1) is not None
+    store.consume("third", 1, 1)
+
+    buckets, lock = store.shards[0]
+    assert list(buckets) == ["first", "third"]
@@ -0,0 +1,157 @@
+"""
+Ограничение частоты запросов алгоритмом token bucket.
+
+У каждого клиента в каждой области (throttle_scope представления) есть
+корзина на N жетонов, которая пополняется со скоростью N жетонов за
+период. Запрос забирает жетон, при пустой корзине отвечают 429. Так
+клиент может сделать до N запросов подряд, а в среднем — не больше N за
+период. Лимиты задаются в REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] в
+формате DRF: "20/s", "600/min".
+
+Состояние корзин по умолчанию хранится в памяти процесса в нескольких
+независимых частях со своими блокировками и не требует записей в БД.
+Размер каждой части ограничен, при переполнении удаляются корзины,
+к которым дольше всего не обращались.
+При THROTTLE_BACKEND=cache корзины хранятся в кэше Django, и лимит
+общий для всех процессов сервера, если кэш общий. Чтение и запись
+корзины в кэше не атомарны, поэтому при одновременных запросах одного
+клиента лимит может быть немного превышен.
+"""
+
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .metrics import registry
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Количество частей хранилища в памяти процесса и максимальное
+# количество корзин в части
+LOCAL_SHARDS = 16
+LOCAL_SHARD_SIZE = 10_000
+
+
+def parse_rate(rate):
+    """Возвращает емкость корзины и скорость пополнения в жетонах в секунду"""
+    if rate is None:
+        return None
+    count, period = rate.split("/")
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+def refill(tokens, updated, capacity, refill_rate, now):
+    return min(capacity, tokens + (now - updated) * refill_rate)
+
+
+def take(tokens, refill_rate):
+    """Забирает жетон: новое количество жетонов и время ожидания при отказе"""
+    if tokens >= 1:
+        return tokens - 1, None
+    return tokens, (1 - tokens) / refill_rate
+
+
+class LocalBucketStore:
+    """
+    Корзины в памяти процесса, разделенные на части по ключу. Часть
+    хранит корзины в порядке последнего обращения и при переполнении
+    удаляет самые давние: они почти наверняка полные.
+    """
+
+    def __init__(self, shards=LOCAL_SHARDS, shard_size=LOCAL_SHARD_SIZE):
+        self.shard_size = shard_size
+        self.shards = [(OrderedDict(), threading.Lock()) for _ in range(shards)]
+
+    def consume(self, key, capacity, refill_rate):
+        buckets, lock = self.shards[zlib.crc32(key.encode()) % len(self.shards)]
+        with lock:
+            now = time.monotonic()
+            bucket = buckets.pop(key, None)
+            tokens = capacity
+            if bucket is not None:
+                tokens = refill(*bucket, capacity, refill_rate, now)
+            tokens, wait = take(tokens, refill_rate)
+            buckets[key] = (tokens, now)
+            if len(buckets) > self.shard_size:
+                buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        for buckets, lock in self.shards:
+            with lock:
+                buckets.clear()
+
+
+class CacheBucketStore:
+    """Корзины в кэше Django, общие для процессов при общем кэше"""
+
+    def __init__(self, alias="default"):
+        self.alias = alias
+
+    def consume(self, key, capacity, refill_rate):
+        cache = caches[self.alias]
+        now = time.time()
+        bucket = cache.get(key)
+        tokens = capacity
+        if bucket is not None:
+            tokens = refill(*bucket, capacity, refill_rate, now)
+        tokens, wait = take(tokens, refill_rate)
+        # Запись живет, пока корзина не пополнится полностью
+        timeout = (capacity - tokens) / refill_rate + 1
+        cache.set(key, (tokens, now), timeout)
+        return wait
+
+
+local_store = LocalBucketStore()
+
+
+def get_store():
+    if settings.THROTTLE_BACKEND == "cache":
+        return CacheBucketStore(settings.THROTTLE_CACHE)
+    return local_store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Ограничение частоты запросов по области throttle_scope представления.
+    Аутентифицированные клиенты различаются по id пользователя, остальные —
+    по IP-адресу. Представления без области или без лимита для нее не
+    ограничиваются. Отклоненные запросы учитываются в метриках /metrics.
+    """
+
+    scope_attr = "throttle_scope"
+    cache_format = "throttle:{scope}:{ident}"
+
+    def allow_request(self, request, view):
+        self.wait_time = None
+        if not settings.THROTTLE_ENABLED:
+            return True
+        scope = getattr(view, self.scope_attr, None)
+        rate = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(scope))
+        if rate is None:
+            return True
+
+        key = self.cache_format.format(
+            scope=scope, ident=self.get_client_ident(request)
+        )
+        self.wait_time = get_store().consume(key, *rate)
+        if self.wait_time is None:
+            return True
+        registry.observe_throttled(scope)
+        return False
+
+    def get_client_ident(self, request):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return f"user-{user.pk}"
+        return self.get_ident(request)
+
+    def wait(self):
+        return self.wait_time
@@ -0,0 +1,122 @@
+import hmac
+import mimetypes
+import os
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseForbidden,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from .media import is_hashed, parse_range
+from .metrics import registry
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Файлы с хешем содержимого в имени не меняются и кэшируются на год,
+# остальные кэшируются с обязательной проверкой по ETag
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+MEDIA_CHUNK_SIZE = 64 * 1024
+
+
+def has_metrics_access(request):
+    token = settings.METRICS_TOKEN
+    if token:
+        expected = f"Bearer {token}"
+        provided = request.headers.get("Authorization", "")
+        if hmac.compare_digest(provided.encode(), expected.encode()):
+            return True
+    return request.user.is_staff
+
+
+def metrics_view(request):
+    """
+    Метрики запросов в текстовом формате Prometheus. Доступны сотрудникам,
+    вошедшим в админку, и по заголовку Authorization: Bearer <токен>, если
+    задан METRICS_TOKEN. Остальным запросам отвечают 403.
+    """
+    if not has_metrics_access(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def read_range(full_path, start, end):
+    """Читает байты файла с start по end включительно частями"""
+    with open(full_path, "rb") as file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file.read(min(MEDIA_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def media_view(request, path):
+    """
+    Отдача медиафайлов из MEDIA_ROOT с поддержкой ETag, условных запросов
+    (If-None-Match, If-Modified-Since) и запросов диапазона байтов (Range,
+    If-Range). Файлы читаются частями и не загружаются в память целиком.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404("Файл не найден.")
+    if not os.path.isfile(full_path):
+        raise Http404("Файл не найден.")
+
+    size = stat.st_size
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = file_response(request, full_path, size, etag, last_modified)
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Accept-Ranges"] = "bytes"
+    response["Cache-Control"] = (
+        IMMUTABLE_CACHE_CONTROL if is_hashed(path) else REVALIDATE_CACHE_CONTROL
+    )
+    return response
+
+
+def file_response(request, full_path, size, etag, last_modified):
+    content_range = request.headers.get("Range")
+    if_range = request.headers.get("If-Range")
+    # Диапазон отдается, только если файл не изменился с указанной версии
+    if content_range and if_range and if_range != etag:
+        if parse_http_date_safe(if_range) != last_modified:
+            content_range = None
+    try:
+        byte_range = parse_range(content_range, size) if content_range else None
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    if byte_range is None:
+        return FileResponse(open(full_path, "rb"))
+
+    start, end = byte_range
+    content_type, encoding = mimetypes.guess_type(full_path)
+    response = StreamingHttpResponse(
+        read_range(full_path, start, end),
+        status=206,
+        content_type=content_type or "application/octet-stream",
+    )
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Content-Length"] = str(end - start + 1)
+    return response
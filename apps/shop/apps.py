@@ -1,6 +1,21 @@
+import threading
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ShopConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.shop"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        if settings.SHOP_CATEGORY_TREE_WARMUP:
+            from .tree import category_tree
+
+            # Загрузка в отдельном потоке: к БД не обращаются во время
+            # инициализации приложений, а запуск сервера не задерживается
+            threading.Thread(
+                target=category_tree.warm_up, name="category-tree-warm-up", daemon=True
+            ).start()
@@ -0,0 +1,147 @@
+"""
+Асинхронные варианты представлений каталога и корзины для запуска под
+ASGI-сервером (SHOP_ASYNC_VIEWS = True). Ответы совпадают с ответами
+синхронных представлений из views.py.
+"""
+
+from adrf.generics import GenericAPIView as AsyncGenericAPIView
+from asgiref.sync import sync_to_async
+from drf_spectacular.utils import OpenApiResponse, extend_schema
+from rest_framework import permissions, status
+from rest_framework.response import Response
+
+from apps.core.metrics import SerializerMetricsMixin
+
+from .cache import CatalogCacheMixin
+from .models import Cart, Product
+from .pagination import KeysetPaginationMixin
+from .tree import CategoryTreeMixin
+from .views import CartView, CategoryListView, ProductListView
+
+
+class AsyncListAPIView(SerializerMetricsMixin, AsyncGenericAPIView):
+    """Список объектов с асинхронной загрузкой страницы из БД"""
+
+    async def get(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        # Фильтры только строят запрос и не обращаются к БД
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+@extend_schema(
+    tags=["Categories"],
+    summary="Получение списка всех категорий",
+    responses={200: OpenApiResponse(description="Список категорий с подкатегориями")},
+)
+class AsyncCategoryListView(
+    CategoryTreeMixin, CatalogCacheMixin, KeysetPaginationMixin, AsyncListAPIView
+):
+    """Асинхронное представление для получения списка всех категорий"""
+
+    queryset = CategoryListView.queryset
+    serializer_class = CategoryListView.serializer_class
+    throttle_scope = CategoryListView.throttle_scope
+    pagination_class = CategoryListView.pagination_class
+    keyset_pagination_class = CategoryListView.keyset_pagination_class
+
+
+@extend_schema(
+    tags=["Products"],
+    summary="Получение списка всех продуктов",
+    responses={200: OpenApiResponse(description="Список продуктов с изображениями")},
+)
+class AsyncProductListView(CatalogCacheMixin, KeysetPaginationMixin, AsyncListAPIView):
+    """Асинхронное представление для получения списка всех продуктов"""
+
+    queryset = ProductListView.queryset
+    serializer_class = ProductListView.serializer_class
+    throttle_scope = ProductListView.throttle_scope
+    pagination_class = ProductListView.pagination_class
+    keyset_pagination_class = ProductListView.keyset_pagination_class
+    filter_backends = ProductListView.filter_backends
+    search_fields = ProductListView.search_fields
+    ordering_fields = ProductListView.ordering_fields
+
+
+@extend_schema(tags=["Cart"], summary="Работа с корзиной пользователя")
+class AsyncCartView(SerializerMetricsMixin, AsyncGenericAPIView):
+    """Асинхронное представление для работы с корзиной пользователя"""
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = CartView.serializer_class
+    queryset = CartView.queryset
+    throttle_scope = CartView.throttle_scope
+
+    async def get(self, request, *args, **kwargs):
+        """Получение содержимого корзины"""
+        cart, created = await self.get_queryset().aget_or_create_for_user(request.user)
+        if created:
+            # Новая корзина загружается повторно, чтобы сериализатор не
+            # обращался к БД синхронно за ее элементами
+            cart = await self.get_queryset().aget(id=cart.id)
+        serializer = self.get_serializer(cart)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    async def post(self, request, *args, **kwargs):
+        """Добавление/обновление товара в корзине."""
+        product_id = request.data.get("product_id")
+        if not product_id:
+            return Response(
+                {"error": "Не указан product_id."}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            product = await Product.objects.aget(id=product_id)
+        except Product.DoesNotExist:
+            return Response(
+                {"error": "Продукт с указанным product_id не существует."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        quantity = request.data.get("quantity", 1)
+        try:
+            quantity = int(quantity)
+            if quantity < 0:
+                return Response(
+                    {"error": "Количество товара не может быть отрицательным."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        except ValueError:
+            return Response(
+                {"error": "Количество товара должно быть целым числом."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        cart, created = await Cart.objects.aget_or_create_for_user(request.user)
+        # Транзакции не поддерживаются async ORM, изменение выполняется в потоке
+        await sync_to_async(cart.set_item_quantity)(product, quantity)
+
+        if quantity > 0:
+            return Response(
+                {"message": f"Товар {product} успешно добавлен/обновлен в корзине."},
+                status=status.HTTP_200_OK,
+            )
+        else:
+            return Response(
+                {"message": f"Товар {product} успешно удален из корзины."},
+                status=status.HTTP_200_OK,
+            )
+
+    async def delete(self, request, *args, **kwargs):
+        """Полная очистка корзины"""
+        cart = await Cart.objects.for_user(request.user).afirst()
+        if cart is None:
+            return Response(
+                {"error": "Корзина пользователя не найдена."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        await sync_to_async(cart.clear)()
+        return Response(
+            {"message": "Корзина успешно очищена."}, status=status.HTTP_200_OK
+        )
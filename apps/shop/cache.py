@@ -0,0 +1,134 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+CATALOG_VERSION_KEY = "shop:catalog:version"
+# Версия дерева категорий меняется только при изменении категорий и подкатегорий
+CATEGORY_TREE_VERSION_KEY = "shop:category_tree:version"
+
+
+def get_catalog_version(key=CATALOG_VERSION_KEY):
+    """
+    Возвращает текущую версию каталога.
+
+    Начальная версия — время в миллисекундах, чтобы после вытеснения ключа
+    из кэша новая версия не совпала с одной из прежних.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_catalog_version(key=CATALOG_VERSION_KEY):
+    """Асинхронный вариант get_catalog_version()"""
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, int(time.time() * 1000), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_catalog_version(key=CATALOG_VERSION_KEY):
+    """Увеличивает версию каталога, делая недействительными все ответы в кэше"""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        get_catalog_version(key)
+        return cache.incr(key)
+
+
+class CacheStats:
+    """Счетчики попаданий и промахов кэша ответов в рамках процесса"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+catalog_cache_stats = CacheStats()
+
+
+def etag_matches(request, etag):
+    """Проверяет, есть ли ETag среди значений заголовка If-None-Match"""
+    if_none_match = request.headers.get("If-None-Match", "")
+    return etag in [value.strip() for value in if_none_match.split(",")]
+
+
+class CatalogCacheMixin:
+    """
+    Кэширование ответов списков каталога.
+
+    Ключ строится из URL запроса (с упорядоченными параметрами) и версии
+    каталога, которая увеличивается сигналами при изменении категорий,
+    подкатегорий и продуктов. ETag ответа совпадает с ключом, поэтому
+    If-None-Match обрабатывается без обращения к кэшу и БД.
+    """
+
+    cache_key_prefix = "shop:response"
+
+    def get_cache_key(self, request, version):
+        """Возвращает ключ кэша и ETag ответа на запрос"""
+        query = sorted(request.query_params.lists())
+        url = f"{request.build_absolute_uri(request.path)}?{query}"
+        digest = hashlib.md5(url.encode()).hexdigest()
+        return f"{self.cache_key_prefix}:{version}:{digest}", f'"{version}-{digest}"'
+
+    def get_not_modified_response(self, request, etag):
+        if etag_matches(request, etag):
+            catalog_cache_stats.hit()
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        return None
+
+    def list(self, request, *args, **kwargs):
+        key, etag = self.get_cache_key(request, get_catalog_version())
+        response = self.get_not_modified_response(request, etag)
+        if response is not None:
+            return response
+
+        data = cache.get(key)
+        if data is None:
+            catalog_cache_stats.miss()
+            response = super().list(request, *args, **kwargs)
+            cache.set(key, response.data, settings.SHOP_CATALOG_CACHE_TIMEOUT)
+        else:
+            catalog_cache_stats.hit()
+            response = Response(data)
+        response["ETag"] = etag
+        return response
+
+    async def alist(self, request, *args, **kwargs):
+        key, etag = self.get_cache_key(request, await aget_catalog_version())
+        response = self.get_not_modified_response(request, etag)
+        if response is not None:
+            return response
+
+        data = await cache.aget(key)
+        if data is None:
+            catalog_cache_stats.miss()
+            response = await super().alist(request, *args, **kwargs)
+            await cache.aset(key, response.data, settings.SHOP_CATALOG_CACHE_TIMEOUT)
+        else:
+            catalog_cache_stats.hit()
+            response = Response(data)
+        response["ETag"] = etag
+        return response
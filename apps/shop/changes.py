@@ -0,0 +1,164 @@
+"""
+Лента изменений каталога для инкрементальной синхронизации клиентов.
+
+Клиент хранит локальную копию каталога и запрашивает только записи,
+измененные после курсора из предыдущего ответа. Изменения берутся из
+полей updated_at категорий, подкатегорий и продуктов, удаления - из
+записей Tombstone. Позиция курсора - (время изменения, номер ленты, id),
+поэтому записи с одинаковым временем не теряются и не повторяются на
+границе страниц.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+from operator import itemgetter
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Category, Product, SubCategory, Tombstone
+from .serializers import (
+    CategoryChangeSerializer,
+    ProductChangeSerializer,
+    SubCategoryChangeSerializer,
+)
+
+
+class ChangeFeed:
+    """Источник изменений одного типа, упорядоченный по (time_field, id)"""
+
+    def __init__(self, name, queryset, time_field, serializer_class=None):
+        self.name = name
+        self.queryset = queryset
+        self.time_field = time_field
+        self.serializer_class = serializer_class
+
+
+UPSERT_FEEDS = [
+    ChangeFeed(
+        "categories", Category.objects.all(), "updated_at", CategoryChangeSerializer
+    ),
+    ChangeFeed(
+        "subcategories",
+        SubCategory.objects.all(),
+        "updated_at",
+        SubCategoryChangeSerializer,
+    ),
+    ChangeFeed(
+        "products", Product.objects.all(), "updated_at", ProductChangeSerializer
+    ),
+]
+DELETE_FEED = ChangeFeed("deleted", Tombstone.objects.all(), "deleted_at")
+FEEDS = [*UPSERT_FEEDS, DELETE_FEED]
+
+# Ключи удалений в ответе совпадают с ключами изменений
+DELETED_KEYS = {
+    Tombstone.Kind.CATEGORY: "categories",
+    Tombstone.Kind.SUBCATEGORY: "subcategories",
+    Tombstone.Kind.PRODUCT: "products",
+}
+
+
+def encode_cursor(position):
+    moment, feed_index, object_id = position
+    payload = json.dumps({"t": moment.isoformat(), "f": feed_index, "i": object_id})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(value):
+    """
+    Возвращает позицию по курсору или по дате в ISO 8601. Для даты
+    позиция стоит перед всеми изменениями, сделанными в этот момент.
+    Выбрасывает ValueError, если значение не распознано.
+    """
+    try:
+        moment = parse_datetime(value)
+    except ValueError:
+        moment = None
+    if moment is not None:
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment, -1, 0
+
+    try:
+        padding = "=" * (-len(value) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(value + padding))
+        position = (
+            datetime.fromisoformat(payload["t"]),
+            int(payload["f"]),
+            int(payload["i"]),
+        )
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise ValueError("Неверный курсор.")
+    if timezone.is_naive(position[0]):
+        raise ValueError("Неверный курсор.")
+    return position
+
+
+def get_seek_filter(feed_index, time_field, position):
+    """Условие выборки записей ленты, расположенных после позиции"""
+    moment, position_feed, object_id = position
+    if feed_index > position_feed:
+        return Q(**{f"{time_field}__gte": moment})
+    if feed_index < position_feed:
+        return Q(**{f"{time_field}__gt": moment})
+    return Q(**{f"{time_field}__gt": moment}) | Q(
+        **{time_field: moment, "id__gt": object_id}
+    )
+
+
+def get_changes(position, limit, context=None):
+    """
+    Возвращает изменения после позиции: не более limit записей всех лент
+    в порядке (время, номер ленты, id), курсор следующего запроса и
+    признак того, что изменения остались.
+
+    Записи моложе SHOP_CHANGES_DELAY секунд не отдаются: отметка времени
+    ставится при сохранении, и транзакция, начатая раньше, может стать
+    видимой уже после того, как курсор ушел вперед.
+    """
+    until = timezone.now() - timedelta(seconds=settings.SHOP_CHANGES_DELAY)
+    rows = []
+    for feed_index, feed in enumerate(FEEDS):
+        queryset = feed.queryset.filter(**{f"{feed.time_field}__lte": until})
+        if position is not None:
+            queryset = queryset.filter(
+                get_seek_filter(feed_index, feed.time_field, position)
+            )
+        queryset = queryset.order_by(feed.time_field, "id")[: limit + 1]
+        rows.extend(
+            ((getattr(obj, feed.time_field), feed_index, obj.id), obj)
+            for obj in queryset
+        )
+
+    # Каждая лента уже отсортирована, общий порядок - слияние лент
+    rows.sort(key=itemgetter(0))
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if has_more:
+        cursor = rows[-1][0]
+    else:
+        # Все изменения до until отданы: следующий запрос начнется после них
+        cursor = (until, len(FEEDS), 0)
+        if position is not None:
+            cursor = max(cursor, position)
+
+    objects = [[] for _ in FEEDS]
+    for (_, feed_index, _), obj in rows:
+        objects[feed_index].append(obj)
+
+    data = {
+        feed.name: feed.serializer_class(feed_objects, many=True, context=context).data
+        for feed, feed_objects in zip(UPSERT_FEEDS, objects)
+    }
+    deleted = {key: [] for key in DELETED_KEYS.values()}
+    for tombstone in objects[-1]:
+        deleted[DELETED_KEYS[tombstone.kind]].append(tombstone.object_id)
+    data["deleted"] = deleted
+    data["cursor"] = encode_cursor(cursor)
+    data["has_more"] = has_more
+    return data
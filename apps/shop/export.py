@@ -0,0 +1,140 @@
+import csv
+import io
+import logging
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer
+
+from apps.core.renderers import FastJSONRenderer
+
+from .serializers import ProductSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def format_datetime(value, tz):
+    """Дата и время в ISO 8601 так же, как в serializers.DateTimeField"""
+    value = value.astimezone(tz).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+CSV_COLUMNS = [
+    "id",
+    "name",
+    "slug",
+    "price",
+    "subcategory_id",
+    "subcategory",
+    "category_id",
+    "category",
+    "image",
+    "updated_at",
+]
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    """Построчный JSON: один объект на строку"""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return super().render(data, accepted_media_type, renderer_context) + b"\n"
+
+
+class CSVRenderer(BaseRenderer):
+    """CSV-представление; используется для ответов с ошибками экспорта"""
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not data:
+            return b""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(data.keys())
+        writer.writerow(data.values())
+        return buffer.getvalue().encode(self.charset)
+
+
+def ndjson_rows(products):
+    tz = timezone.get_current_timezone()
+    serializer = ProductSerializer()
+    renderer = FastJSONRenderer()
+    for product in products:
+        row = serializer.to_representation(product)
+        row["updated_at"] = format_datetime(product.updated_at, tz)
+        yield renderer.render(row) + b"\n"
+
+
+def csv_rows(products):
+    tz = timezone.get_current_timezone()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    yield buffer.getvalue().encode()
+    for product in products:
+        buffer.seek(0)
+        buffer.truncate()
+        subcategory = product.subcategory
+        writer.writerow(
+            [
+                product.id,
+                product.name,
+                product.slug,
+                product.price,
+                subcategory.id,
+                subcategory.name,
+                subcategory.category_id,
+                subcategory.category.name,
+                product.image.url if product.image else "",
+                format_datetime(product.updated_at, tz),
+            ]
+        )
+        yield buffer.getvalue().encode()
+
+
+# Функция записи строк и количество строк заголовка для каждого формата
+ROW_WRITERS = {"ndjson": (ndjson_rows, 0), "csv": (csv_rows, 1)}
+
+
+def export_products(queryset, export_format):
+    """
+    Генератор частей файла экспорта продуктов.
+
+    Продукты читаются из БД пакетами по SHOP_EXPORT_CHUNK_SIZE строк, строки
+    объединяются в части того же размера, поэтому память не зависит от
+    размера каталога. По окончании в журнал пишется скорость экспорта.
+    """
+    chunk_size = settings.SHOP_EXPORT_CHUNK_SIZE
+    write_rows, header_rows = ROW_WRITERS[export_format]
+    products = queryset.iterator(chunk_size=chunk_size)
+    start = time.perf_counter()
+    count = -header_rows
+    chunk = []
+    for row in write_rows(products):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            count += len(chunk)
+            yield b"".join(chunk)
+            chunk = []
+    if chunk:
+        count += len(chunk)
+        yield b"".join(chunk)
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "Экспорт продуктов (%s): %d строк за %.2f с, %.0f строк/с",
+        export_format,
+        count,
+        elapsed,
+        count / elapsed if elapsed else 0,
+    )
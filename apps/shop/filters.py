@@ -0,0 +1,64 @@
+from decimal import Decimal, InvalidOperation
+
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+
+class ProductFilterBackend(filters.BaseFilterBackend):
+    """
+    Фильтрация продуктов по подкатегории, категории, диапазону цены
+    и началу названия. Фильтры опираются на индексы из миграции 0002.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        lookups = {}
+        errors = {}
+
+        for param, lookup in (
+            ("subcategory", "subcategory_id"),
+            ("category", "subcategory__category_id"),
+        ):
+            if param in params:
+                try:
+                    lookups[lookup] = int(params[param])
+                except ValueError:
+                    errors[param] = "Ожидается целое число."
+
+        for param, lookup in (("min_price", "price__gte"), ("max_price", "price__lte")):
+            if param in params:
+                try:
+                    value = Decimal(params[param])
+                except InvalidOperation:
+                    value = None
+                # NaN и Infinity разбираются Decimal, но не являются ценой
+                if value is None or not value.is_finite():
+                    errors[param] = "Ожидается число."
+                else:
+                    lookups[lookup] = value
+
+        if params.get("name"):
+            lookups["name__istartswith"] = params["name"]
+
+        if errors:
+            raise ValidationError(errors)
+        return queryset.filter(**lookups)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = [
+            ("subcategory", "integer", "ID подкатегории"),
+            ("category", "integer", "ID категории"),
+            ("min_price", "number", "Минимальная цена"),
+            ("max_price", "number", "Максимальная цена"),
+            ("name", "string", "Начало названия продукта"),
+        ]
+        return [
+            {
+                "name": name,
+                "required": False,
+                "in": "query",
+                "description": description,
+                "schema": {"type": schema_type},
+            }
+            for name, schema_type, description in parameters
+        ]
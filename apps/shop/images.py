@@ -0,0 +1,137 @@
+import logging
+import os
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Поля Product с уменьшенными копиями изображения
+RENDITION_FIELDS = ("image_small", "image_medium", "image_large")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_rendition_executor():
+    """Возвращает общий пул потоков для фоновой генерации изображений"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.SHOP_RENDITION_WORKERS,
+                thread_name_prefix="renditions",
+            )
+    return _executor
+
+
+def generate_rendition(file):
+    try:
+        file.generate()
+    except Exception:
+        logger.exception("Не удалось создать изображение %s", file.name)
+
+
+class EagerRenditionStrategy:
+    """
+    Стратегия imagekit: уменьшенные копии создаются сразу после сохранения
+    исходного изображения в фоновом пуле потоков, а при обращении к URL
+    их существование в хранилище не проверяется.
+
+    При SHOP_RENDITION_WORKERS = 0 копии создаются синхронно.
+    """
+
+    def on_source_saved(self, file):
+        if settings.SHOP_RENDITION_WORKERS:
+            get_rendition_executor().submit(generate_rendition, file)
+        else:
+            generate_rendition(file)
+
+    def on_content_required(self, file):
+        # Содержимое нужно только при чтении файла, например, в админке
+        file.generate()
+
+    def should_verify_existence(self, file):
+        return False
+
+
+def generate_renditions(product, force=False):
+    """
+    Создает отсутствующие уменьшенные копии изображения продукта.
+    Возвращает количество созданных файлов.
+    """
+    if not product.image:
+        return 0
+    generated = 0
+    for field in RENDITION_FIELDS:
+        file = getattr(product, field)
+        if force or not file.storage.exists(file.name):
+            file.generate(force=True)
+            generated += 1
+    return generated
+
+
+def init_rendition_worker():
+    """Инициализация процесса пула: настройка Django при запуске через spawn"""
+    import django
+
+    django.setup()
+
+
+def generate_product_renditions(product_ids, force=False):
+    """
+    Создает уменьшенные копии для пакета продуктов в процессе пула.
+    Возвращает количество созданных файлов и список id продуктов с ошибками.
+    """
+    from .models import Product
+
+    generated, failed = 0, []
+    for product in Product.objects.filter(id__in=product_ids).only("id", "image"):
+        try:
+            generated += generate_renditions(product, force=force)
+        except Exception:
+            logger.exception("Не удалось создать изображения продукта %s", product.id)
+            failed.append(product.id)
+    return generated, failed
+
+
+def read_image_source(source, source_dir=None):
+    """Читает исходное изображение по URL или пути к файлу"""
+    if urlparse(source).scheme in ("http", "https"):
+        with urllib.request.urlopen(source, timeout=30) as response:
+            return response.read()
+    path = os.path.join(source_dir, source) if source_dir else source
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def ingest_product_images(jobs, source_dir=None):
+    """
+    Загружает исходные изображения продуктов в хранилище и создает их
+    уменьшенные копии в процессе пула. jobs — пары (id продукта, URL или
+    путь к файлу относительно source_dir). Возвращает количество
+    загруженных изображений и список id продуктов с ошибками.
+    """
+    from .models import Product
+
+    ingested, failed = 0, []
+    for product_id, source in jobs:
+        try:
+            content = ContentFile(read_image_source(source, source_dir))
+            product = Product(id=product_id)
+            filename = os.path.basename(urlparse(source).path)
+            product.image.save(filename, content, save=False)
+            Product.objects.filter(id=product_id).update(
+                image=product.image.name, updated_at=timezone.now()
+            )
+            generate_renditions(product)
+            ingested += 1
+        except Exception:
+            logger.exception("Не удалось загрузить изображение продукта %s", product_id)
+            failed.append(product_id)
+    return ingested, failed
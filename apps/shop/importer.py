@@ -0,0 +1,200 @@
+"""
+Пакетный импорт каталога продуктов из CSV или NDJSON.
+
+Файл читается потоково, строки обрабатываются пакетами: категории и
+подкатегории находятся по словарю название -> id в памяти, слаги новых
+объектов генерируются для всего пакета, продукты записываются одним
+запросом bulk_create(update_conflicts=True) по уникальному названию.
+Принимаются файлы в формате экспорта products/export/.
+"""
+
+import csv
+import json
+from collections import Counter, namedtuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .models import Cart, Category, Product, SubCategory
+from .slugs import unique_slugs
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+ImportRow = namedtuple("ImportRow", "name price subcategory category image")
+
+
+def read_rows(file, import_format):
+    """Генератор словарей строк текстового файла"""
+    if import_format == "csv":
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Неверная строка попадает в отчет об ошибках при проверке
+                yield None
+
+
+def clean_row(row):
+    """
+    Проверяет строку файла и приводит ее к ImportRow. Строка NDJSON из
+    экспорта содержит вложенные подкатегорию, категорию и изображения.
+    Выбрасывает ValidationError для неверной строки.
+    """
+    if not isinstance(row, dict):
+        raise ValidationError("Строка должна быть объектом JSON.")
+    name = row.get("name")
+    if isinstance(name, str):
+        name = name.strip()
+    subcategory, category = row.get("subcategory"), row.get("category")
+    if isinstance(subcategory, dict):
+        category = (subcategory.get("category") or {}).get("name")
+        subcategory = subcategory.get("name")
+    image = row.get("image")
+    if image is None and isinstance(row.get("images"), dict):
+        image = row["images"].get("original")
+
+    return ImportRow(
+        name=Product._meta.get_field("name").clean(name, None),
+        price=Product._meta.get_field("price").clean(row.get("price"), None),
+        subcategory=SubCategory._meta.get_field("name").clean(subcategory, None),
+        category=Category._meta.get_field("name").clean(category, None),
+        image=image or "",
+    )
+
+
+def get_storage_name(image):
+    """
+    Имя файла в хранилище для URL медиафайла, например, из экспорта,
+    или None, если изображение нужно загрузить
+    """
+    if not image.startswith(settings.MEDIA_URL):
+        return None
+    name = image[len(settings.MEDIA_URL) :]
+    return name if default_storage.exists(name) else None
+
+
+class CatalogImporter:
+    """
+    Импорт пакетов строк каталога. Каждый пакет записывается в отдельной
+    транзакции, повторный импорт тех же строк ничего не меняет, поэтому
+    после сбоя импорт можно продолжить с первого незаписанного пакета.
+
+    Изображения, которых еще нет в хранилище, не загружаются при записи
+    пакета: import_chunk возвращает задания (id продукта, источник) для
+    ingest_product_images.
+    """
+
+    def __init__(self, refresh_images=False):
+        self.refresh_images = refresh_images
+        self.categories = dict(Category.objects.values_list("name", "id"))
+        self.subcategories = dict(SubCategory.objects.values_list("name", "id"))
+        self.stats = Counter()
+        self.tree_changed = False
+
+    def import_chunk(self, rows):
+        # Повтор названия внутри пакета: побеждает последняя строка
+        rows = list({row.name: row for row in rows}.values())
+        with transaction.atomic():
+            self.create_categories(rows)
+            return self.upsert_products(rows)
+
+    def create_categories(self, rows):
+        """Создает отсутствующие категории и подкатегории пакета"""
+        names = {
+            row.category for row in rows if row.subcategory not in self.subcategories
+        }
+        new_categories = sorted(names - self.categories.keys())
+        if new_categories:
+            slugs = unique_slugs(Category, new_categories)
+            created = Category.objects.bulk_create(
+                Category(name=name, slug=slug)
+                for name, slug in zip(new_categories, slugs)
+            )
+            self.categories.update((obj.name, obj.id) for obj in created)
+            self.stats["categories"] += len(created)
+
+        parents = {}
+        for row in rows:
+            if row.subcategory not in self.subcategories:
+                parents.setdefault(row.subcategory, self.categories[row.category])
+        if parents:
+            names = sorted(parents)
+            slugs = unique_slugs(SubCategory, names)
+            created = SubCategory.objects.bulk_create(
+                SubCategory(name=name, slug=slug, category_id=parents[name])
+                for name, slug in zip(names, slugs)
+            )
+            self.subcategories.update((obj.name, obj.id) for obj in created)
+            self.stats["subcategories"] += len(created)
+
+        if new_categories or parents:
+            self.tree_changed = True
+
+    def upsert_products(self, rows):
+        existing = {
+            name: (product_id, slug, subcategory_id, price, image)
+            for name, product_id, slug, subcategory_id, price, image in (
+                Product.objects.filter(name__in=[row.name for row in rows]).values_list(
+                    "name", "id", "slug", "subcategory_id", "price", "image"
+                )
+            )
+        }
+        new_names = [row.name for row in rows if row.name not in existing]
+        new_slugs = dict(zip(new_names, unique_slugs(Product, new_names)))
+
+        products, sources, price_changed = [], [], []
+        for row in rows:
+            subcategory_id = self.subcategories[row.subcategory]
+            current = existing.get(row.name)
+            image = current[4] if current else ""
+            source = None
+            if row.image:
+                storage_name = get_storage_name(row.image)
+                if storage_name:
+                    image = storage_name
+                elif not image or self.refresh_images:
+                    source = row.image
+
+            if current is not None:
+                if (subcategory_id, row.price, image) == current[2:] and not source:
+                    self.stats["unchanged"] += 1
+                    continue
+                if row.price != current[3]:
+                    price_changed.append(current[0])
+                self.stats["updated"] += 1
+            else:
+                self.stats["created"] += 1
+
+            products.append(
+                Product(
+                    name=row.name,
+                    slug=current[1] if current else new_slugs[row.name],
+                    subcategory_id=subcategory_id,
+                    price=row.price,
+                    image=image,
+                )
+            )
+            sources.append(source)
+
+        if products:
+            Product.objects.bulk_create(
+                products,
+                update_conflicts=True,
+                unique_fields=["name"],
+                update_fields=["subcategory", "price", "image", "updated_at"],
+            )
+        if price_changed:
+            Cart.objects.filter(
+                items__product_id__in=price_changed
+            ).recalculate_totals()
+
+        return [
+            (product.pk or existing[product.name][0], source)
+            for product, source in zip(products, sources)
+            if source
+        ]
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from apps.shop.models import Cart
+
+
+class Command(BaseCommand):
+    help = (
+        "Проверяет сохраненные итоги корзин по их элементам и при необходимости "
+        "исправляет расхождения"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Пересчитать итоги корзин с расхождениями",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=20,
+            help="Количество корзин с расхождениями в отчете",
+        )
+
+    def handle(self, *args, **options):
+        drifted = Cart.objects.with_calculated_totals().filter(
+            ~Q(total_quantity=F("calculated_quantity"))
+            | ~Q(total_price=F("calculated_price"))
+        )
+        rows = list(
+            drifted.order_by("id").values_list(
+                "id",
+                "total_quantity",
+                "calculated_quantity",
+                "total_price",
+                "calculated_price",
+            )
+        )
+        self.stdout.write(f"Корзин с расхождениями: {len(rows)}")
+        for row in rows[: options["limit"]]:
+            self.stdout.write(
+                "Корзина {}: количество {} вместо {}, стоимость {} вместо {}".format(
+                    *row
+                )
+            )
+
+        if options["fix"] and rows:
+            updated = Cart.objects.filter(
+                id__in=[row[0] for row in rows]
+            ).recalculate_totals()
+            self.stdout.write(f"Исправлено корзин: {updated}")
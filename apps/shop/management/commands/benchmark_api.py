@@ -0,0 +1,392 @@
+import json
+import math
+import platform
+import statistics
+import time
+import uuid
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.shop.cache import CATEGORY_TREE_VERSION_KEY, bump_catalog_version
+from apps.shop.models import Cart, Category, Product, SubCategory
+from apps.shop.pagination import KeysetPagination
+from apps.shop.views import CategoryListView, ProductListView
+
+BENCHMARK_USERNAME = "bench-user"
+BENCHMARK_PASSWORD = "bench-password-1"
+REGISTER_PREFIX = "bench-register-"
+# Количество товаров в корзине перед чтением и очисткой
+CART_ITEMS = 10
+
+
+class Scenario:
+    """
+    Сценарий бенчмарка: один вид запроса к API. setup выполняется перед
+    каждым запросом и не входит в измерение.
+    """
+
+    def __init__(
+        self,
+        name,
+        method,
+        url,
+        data=None,
+        auth=False,
+        status=200,
+        setup=None,
+        clear_cache=False,
+    ):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.data = data
+        self.auth = auth
+        self.status = status
+        self.setup = setup
+        self.clear_cache = clear_cache
+
+    def get_data(self, iteration):
+        return self.data(iteration) if callable(self.data) else self.data
+
+
+def summarize(timings, queries):
+    """Задержки в мс, пропускная способность и количество запросов к БД"""
+    timings = sorted(timings)
+    p95 = statistics.quantiles(timings, n=20)[18] if len(timings) > 1 else timings[0]
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(p95, 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "rps": round(len(timings) / sum(timings) * 1000, 1),
+        "queries": statistics.median_low(queries),
+    }
+
+
+def compare_results(baseline, results, threshold):
+    """
+    Сравнивает результаты с базовыми. Регрессия — рост медианы задержки
+    больше чем на threshold или любой рост количества запросов к БД.
+    Возвращает строки отчета и список регрессий.
+    """
+    lines = []
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            lines.append(f"{name}: нет в базовых результатах")
+            continue
+        change = current["median_ms"] / previous["median_ms"] - 1
+        line = (
+            f"{name}: {previous['median_ms']:.2f} -> {current['median_ms']:.2f} мс "
+            f"({change:+.0%}), запросов {previous['queries']} -> {current['queries']}"
+        )
+        if change > threshold:
+            regressions.append(f"{name}: медиана {change:+.0%}")
+        if current["queries"] > previous["queries"]:
+            regressions.append(
+                f"{name}: запросов {previous['queries']} -> {current['queries']}"
+            )
+        lines.append(line)
+    return lines, regressions
+
+
+class Command(BaseCommand):
+    help = (
+        "Бенчмарк API на текущей БД без запуска сервера: задержки, пропускная "
+        "способность одного клиента и количество запросов к БД для каталога, "
+        "корзины, регистрации и входа. Синтетический каталог создается "
+        "командой seed_catalog. Результаты сохраняются в JSON и сравниваются "
+        "с базовыми"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations", type=int, default=50, help="Запросов на сценарий"
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=3, help="Запросов до начала измерений"
+        )
+        parser.add_argument(
+            "--page-sizes",
+            default="2,10,40",
+            help="Размеры страниц продуктов через запятую",
+        )
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            dest="scenarios",
+            help="Префикс имени сценария (можно указать несколько раз)",
+        )
+        parser.add_argument("--output", help="Файл для сохранения результатов")
+        parser.add_argument("--compare", help="Файл базовых результатов")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Допустимый рост медианы задержки при сравнении (0.2 = 20%%)",
+        )
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1:
+            raise CommandError("Количество запросов должно быть положительным.")
+        try:
+            page_sizes = [int(size) for size in options["page_sizes"].split(",")]
+        except ValueError:
+            raise CommandError("Размеры страниц должны быть целыми числами.")
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"], encoding="utf-8") as file:
+                    baseline = json.load(file)
+            except (OSError, ValueError) as error:
+                raise CommandError(f"Не удалось прочитать базовые результаты: {error}")
+        if not Product.objects.exists():
+            raise CommandError("Каталог пуст. Заполните его командой seed_catalog.")
+
+        # Тестовый клиент обращается к хосту testserver, лимиты частоты
+        # запросов не действуют, чтобы измерять сами эндпоинты
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            THROTTLE_ENABLED=False,
+        ):
+            self.client = APIClient()
+            self.auth_client = APIClient()
+            self.prepare_user()
+            scenarios = self.get_scenarios(page_sizes)
+            if options["scenarios"]:
+                scenarios = [
+                    scenario
+                    for scenario in scenarios
+                    if scenario.name.startswith(tuple(options["scenarios"]))
+                ]
+            try:
+                results = {
+                    scenario.name: self.run_scenario(
+                        scenario, options["iterations"], options["warmup"]
+                    )
+                    for scenario in scenarios
+                }
+            finally:
+                User.objects.filter(username__startswith=REGISTER_PREFIX).delete()
+
+        report = {"meta": self.get_meta(options), "results": results}
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Результаты сохранены в {options['output']}")
+
+        if baseline is not None:
+            self.compare(baseline, report, options["threshold"])
+
+    def prepare_user(self):
+        """Пользователь для входа и сценариев корзины, токен для его клиента"""
+        user, created = User.objects.get_or_create(username=BENCHMARK_USERNAME)
+        if created or not user.check_password(BENCHMARK_PASSWORD):
+            user.set_password(BENCHMARK_PASSWORD)
+            user.save(update_fields=["password"])
+        self.cart, created = Cart.objects.get_or_create(user=user)
+
+        response = self.client.post(
+            reverse("token_obtain_pair"),
+            {"username": BENCHMARK_USERNAME, "password": BENCHMARK_PASSWORD},
+            format="json",
+        )
+        if response.status_code != 200:
+            raise CommandError(f"Не удалось войти: {response.status_code}")
+        self.auth_client.credentials(
+            HTTP_AUTHORIZATION=f"JWT {response.data['access']}"
+        )
+
+    def fill_cart(self, iteration=None):
+        self.cart.clear()
+        for product in self.products[:CART_ITEMS]:
+            self.cart.set_item_quantity(product, 1)
+
+    def get_scenarios(self, page_sizes):
+        categories_url = reverse("category-list")
+        products_url = reverse("product-list")
+        cart_url = reverse("cart-detail")
+        self.products = list(Product.objects.order_by("pk")[:1000])
+        products = self.products
+
+        scenarios = []
+        category_count = Category.objects.count()
+        category_pages = math.ceil(
+            category_count / CategoryListView.pagination_class.page_size
+        )
+        for depth, page in [("first", 1), ("last", category_pages)]:
+            scenarios.append(
+                Scenario(
+                    f"categories/page-{depth}",
+                    "get",
+                    categories_url,
+                    {"page": page},
+                    clear_cache=True,
+                )
+            )
+
+        product_count = Product.objects.count()
+        for page_size in page_sizes:
+            pages = math.ceil(product_count / page_size)
+            for depth, page in [
+                ("first", 1),
+                ("middle", (pages + 1) // 2),
+                ("last", pages),
+            ]:
+                scenarios.append(
+                    Scenario(
+                        f"products/size-{page_size}/page-{depth}",
+                        "get",
+                        products_url,
+                        {"page": page, "page_size": page_size},
+                        clear_cache=True,
+                    )
+                )
+            scenarios.append(
+                Scenario(
+                    f"products/size-{page_size}/keyset-first",
+                    "get",
+                    products_url,
+                    {"pagination": "keyset", "page_size": page_size},
+                    clear_cache=True,
+                )
+            )
+            scenarios.append(
+                Scenario(
+                    f"products/size-{page_size}/keyset-last",
+                    "get",
+                    products_url,
+                    {
+                        "cursor": self.get_last_page_cursor(ProductListView, page_size),
+                        "page_size": page_size,
+                    },
+                    clear_cache=True,
+                )
+            )
+
+        scenarios += [
+            Scenario("cart/get", "get", cart_url, auth=True),
+            Scenario(
+                "cart/post",
+                "post",
+                cart_url,
+                lambda i: {"product_id": products[i % len(products)].pk},
+                auth=True,
+            ),
+            Scenario(
+                "cart/delete", "delete", cart_url, auth=True, setup=self.fill_cart
+            ),
+            Scenario(
+                "users/register",
+                "post",
+                reverse("user-register"),
+                lambda i: {
+                    "username": f"{REGISTER_PREFIX}{uuid.uuid4().hex[:12]}",
+                    "password": BENCHMARK_PASSWORD,
+                },
+                status=201,
+            ),
+            Scenario(
+                "users/login",
+                "post",
+                reverse("token_obtain_pair"),
+                {"username": BENCHMARK_USERNAME, "password": BENCHMARK_PASSWORD},
+            ),
+        ]
+        return scenarios
+
+    def get_last_page_cursor(self, view_class, page_size):
+        """Курсор keyset-пагинации, ведущий на последнюю страницу"""
+        paginator = view_class.keyset_pagination_class()
+        queryset = view_class.queryset
+        paginator.ordering = paginator.get_ordering(queryset)
+        inverted = [KeysetPagination._invert(field) for field in paginator.ordering]
+        # Последняя запись предпоследней страницы
+        instance = queryset.order_by(*inverted)[page_size : page_size + 1].first()
+        if instance is None:
+            return ""
+        return paginator.encode_cursor(paginator.get_position(instance))
+
+    def run_scenario(self, scenario, iterations, warmup):
+        client = self.client
+        if scenario.auth:
+            # Сценарии корзины начинаются с корзины из CART_ITEMS товаров
+            client = self.auth_client
+            self.fill_cart()
+        timings = []
+        queries = []
+        for iteration in range(warmup + iterations):
+            if scenario.setup is not None:
+                scenario.setup(iteration)
+            if scenario.clear_cache:
+                # Устаревают только ответы каталога и дерево категорий, а не
+                # весь кэш: в общем кэше хранятся отзывы токенов и лимиты
+                bump_catalog_version()
+                bump_catalog_version(CATEGORY_TREE_VERSION_KEY)
+            data = scenario.get_data(iteration)
+            request = getattr(client, scenario.method)
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                if scenario.method == "get":
+                    response = request(scenario.url, data)
+                else:
+                    response = request(scenario.url, data, format="json")
+                elapsed = (time.perf_counter() - start) * 1000
+            if response.status_code != scenario.status:
+                raise CommandError(
+                    f"{scenario.name}: статус ответа {response.status_code}, "
+                    f"ожидался {scenario.status}"
+                )
+            if iteration >= warmup:
+                timings.append(elapsed)
+                queries.append(len(captured))
+
+        result = summarize(timings, queries)
+        self.stdout.write(
+            f"{scenario.name}: медиана {result['median_ms']:.2f} мс, "
+            f"p95 {result['p95_ms']:.2f} мс, {result['rps']:.0f} запросов/с, "
+            f"запросов к БД {result['queries']}"
+        )
+        return result
+
+    def get_meta(self, options):
+        return {
+            "created_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "iterations": options["iterations"],
+            "catalog": {
+                "categories": Category.objects.count(),
+                "subcategories": SubCategory.objects.count(),
+                "products": Product.objects.count(),
+                "carts": Cart.objects.count(),
+            },
+        }
+
+    def compare(self, baseline, report, threshold):
+        if baseline.get("meta", {}).get("catalog") != report["meta"]["catalog"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    "Размер каталога отличается от базовых результатов, "
+                    "сравнение может быть неточным"
+                )
+            )
+        lines, regressions = compare_results(
+            baseline.get("results", {}), report["results"], threshold
+        )
+        for line in lines:
+            self.stdout.write(line)
+        if regressions:
+            raise CommandError(
+                "Регрессия производительности:\n" + "\n".join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS("Регрессий не обнаружено"))
@@ -0,0 +1,78 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.shop.images import generate_product_renditions, init_rendition_worker
+from apps.shop.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Создает отсутствующие уменьшенные копии изображений всех продуктов "
+        "параллельно в нескольких процессах"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count(),
+            help="Количество процессов (0 — в текущем процессе)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=100,
+            help="Количество продуктов в одном задании",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Пересоздать копии, даже если они уже существуют",
+        )
+
+    def handle(self, *args, **options):
+        product_ids = list(
+            Product.objects.exclude(image="")
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        chunk_size = options["chunk_size"]
+        chunks = [
+            product_ids[i : i + chunk_size]
+            for i in range(0, len(product_ids), chunk_size)
+        ]
+
+        start = time.perf_counter()
+        generated, failed = 0, []
+        if options["processes"] == 0:
+            results = (
+                generate_product_renditions(chunk, options["force"]) for chunk in chunks
+            )
+            for chunk_generated, chunk_failed in results:
+                generated += chunk_generated
+                failed += chunk_failed
+        else:
+            # Дочерние процессы открывают собственные соединения с БД
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options["processes"], initializer=init_rendition_worker
+            ) as pool:
+                results = pool.map(
+                    generate_product_renditions, chunks, repeat(options["force"])
+                )
+                for chunk_generated, chunk_failed in results:
+                    generated += chunk_generated
+                    failed += chunk_failed
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f"Продуктов: {len(product_ids)}, создано изображений: {generated}, "
+            f"время: {elapsed:.1f} с"
+        )
+        if failed:
+            self.stderr.write(f"Ошибки для продуктов: {failed}")
@@ -0,0 +1,168 @@
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.shop.cache import CATEGORY_TREE_VERSION_KEY, bump_catalog_version
+from apps.shop.images import ingest_product_images, init_rendition_worker
+from apps.shop.importer import IMPORT_FORMATS, CatalogImporter, clean_row, read_rows
+
+FORMAT_EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Импортирует каталог продуктов из CSV или NDJSON пакетами: создает "
+        "категории и подкатегории, добавляет и обновляет продукты, загружает "
+        "изображения в нескольких процессах"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл каталога")
+        parser.add_argument(
+            "--format",
+            choices=IMPORT_FORMATS,
+            help="Формат файла; по умолчанию определяется по расширению",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Количество строк в одной транзакции",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count(),
+            help="Количество процессов для изображений (0 — в текущем процессе)",
+        )
+        parser.add_argument(
+            "--images-dir",
+            help="Каталог с изображениями для относительных путей; "
+            "по умолчанию каталог файла",
+        )
+        parser.add_argument(
+            "--refresh-images",
+            action="store_true",
+            help="Загрузить изображения и для продуктов, у которых они уже есть",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Продолжить прерванный импорт с первого незаписанного пакета",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        import_format = options["format"] or FORMAT_EXTENSIONS.get(
+            os.path.splitext(path)[1].lower()
+        )
+        if import_format is None:
+            raise CommandError("Не удалось определить формат файла, укажите --format.")
+        if options["chunk_size"] <= 0:
+            raise CommandError("Размер пакета должен быть больше нуля.")
+        images_dir = options["images_dir"] or os.path.dirname(os.path.abspath(path))
+
+        # Номер последней записанной строки хранится рядом с файлом
+        state_path = f"{path}.import-state"
+        skip = 0
+        if options["resume"] and os.path.exists(state_path):
+            with open(state_path) as file:
+                skip = json.load(file)["rows"]
+            self.stdout.write(f"Продолжение импорта после строки {skip}")
+
+        pool = None
+        if options["processes"]:
+            # spawn: процессы пула не наследуют открытые соединения с БД
+            pool = ProcessPoolExecutor(
+                max_workers=options["processes"],
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_rendition_worker,
+            )
+        importer = CatalogImporter(refresh_images=options["refresh_images"])
+        self.image_results, self.image_futures = [], []
+        errors = []
+        start = time.perf_counter()
+        processed = pending = 0
+        try:
+            with open(path, encoding="utf-8-sig", newline="") as file:
+                chunk = []
+                for number, raw_row in enumerate(read_rows(file, import_format), 1):
+                    if number <= skip:
+                        continue
+                    pending += 1
+                    try:
+                        chunk.append(clean_row(raw_row))
+                    except ValidationError as exc:
+                        errors.append((number, "; ".join(exc.messages)))
+                    if pending >= options["chunk_size"]:
+                        self.write_chunk(importer, chunk, pool, images_dir)
+                        self.save_state(state_path, number)
+                        processed += pending
+                        chunk, pending = [], 0
+                        self.report_progress(processed, start)
+                if chunk:
+                    self.write_chunk(importer, chunk, pool, images_dir)
+                processed += pending
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+            # Импорт не отправляет сигналы моделей: кэш ответов, поисковый
+            # индекс и дерево категорий сбрасываются по версиям каталога
+            bump_catalog_version()
+            if importer.tree_changed:
+                bump_catalog_version(CATEGORY_TREE_VERSION_KEY)
+
+        ingested, failed = 0, []
+        for future in self.image_futures:
+            self.image_results.append(future.result())
+        for chunk_ingested, chunk_failed in self.image_results:
+            ingested += chunk_ingested
+            failed += chunk_failed
+        if os.path.exists(state_path):
+            os.remove(state_path)
+
+        elapsed = time.perf_counter() - start
+        stats = importer.stats
+        self.stdout.write(
+            f"Строк: {processed}, создано продуктов: {stats['created']}, "
+            f"обновлено: {stats['updated']}, без изменений: {stats['unchanged']}, "
+            f"новых категорий: {stats['categories']}, "
+            f"подкатегорий: {stats['subcategories']}, "
+            f"изображений: {ingested}, время: {elapsed:.1f} с, "
+            f"{processed / elapsed if elapsed else 0:.0f} строк/с"
+        )
+        for number, message in errors[:20]:
+            self.stderr.write(f"Строка {number}: {message}")
+        if errors:
+            self.stderr.write(f"Пропущено неверных строк: {len(errors)}")
+        if failed:
+            self.stderr.write(f"Ошибки изображений для продуктов: {failed}")
+
+    def write_chunk(self, importer, chunk, pool, images_dir):
+        jobs = importer.import_chunk(chunk)
+        if not jobs:
+            return
+        if pool is None:
+            self.image_results.append(ingest_product_images(jobs, images_dir))
+        else:
+            self.image_futures.append(
+                pool.submit(ingest_product_images, jobs, images_dir)
+            )
+
+    def save_state(self, state_path, rows):
+        # Запись через временный файл, чтобы сбой не оставил его пустым
+        with open(f"{state_path}.tmp", "w") as file:
+            json.dump({"rows": rows}, file)
+        os.replace(f"{state_path}.tmp", state_path)
+
+    def report_progress(self, processed, start):
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"Обработано строк: {processed}, "
+            f"{processed / elapsed if elapsed else 0:.0f} строк/с"
+        )
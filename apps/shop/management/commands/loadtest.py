@@ -0,0 +1,81 @@
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def timed_request(url, headers):
+    """Выполняет GET-запрос и возвращает статус ответа и время в мс"""
+    request = urllib.request.Request(url, headers=headers)
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as error:
+        status = error.code
+    return status, (time.perf_counter() - start) * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест эндпоинтов запущенного сервера: пропускная способность "
+        "и задержки. Используется для сравнения запуска под WSGI и ASGI"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "base_url", help="Адрес сервера, например http://localhost:8000"
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Путь эндпоинта (можно указать несколько раз)",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=1000, help="Количество запросов"
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=32,
+            help="Количество параллельных клиентов",
+        )
+        parser.add_argument("--token", help="JWT-токен для эндпоинтов корзины")
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or ["/api/shop/categories/", "/api/shop/products/"]
+        headers = {}
+        if options["token"]:
+            headers["Authorization"] = f"JWT {options['token']}"
+
+        for path in paths:
+            url = urljoin(options["base_url"], path)
+            try:
+                timed_request(url, headers)
+            except urllib.error.URLError as error:
+                raise CommandError(f"Сервер недоступен: {error.reason}")
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                results = list(
+                    pool.map(
+                        lambda _: timed_request(url, headers),
+                        range(options["requests"]),
+                    )
+                )
+            elapsed = time.perf_counter() - start
+
+            timings = sorted(duration for status, duration in results)
+            errors = sum(1 for status, duration in results if status >= 400)
+            p99 = statistics.quantiles(timings, n=100)[98]
+            self.stdout.write(
+                f"{path}: {len(results) / elapsed:.0f} запросов/с, "
+                f"медиана {statistics.median(timings):.1f} мс, p99 {p99:.1f} мс, "
+                f"ошибок {errors}"
+            )
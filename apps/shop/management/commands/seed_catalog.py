@@ -0,0 +1,158 @@
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.shop.cache import CATEGORY_TREE_VERSION_KEY, bump_catalog_version
+from apps.shop.models import Cart, CartItem, Category, Product, SubCategory
+
+# Префикс слагов и имен пользователей синтетического каталога
+SEED_PREFIX = "seed"
+
+
+def batched(items, size):
+    """Разбивает итератор на списки не длиннее size"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет БД синтетическим каталогом для бенчмарков: категории, "
+        "подкатегории, продукты и корзины пользователей создаются пакетными "
+        "вставками без сигналов и генерации слагов"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--categories", type=int, default=100)
+        parser.add_argument("--subcategories", type=int, default=5_000)
+        parser.add_argument("--products", type=int, default=1_000_000)
+        parser.add_argument(
+            "--carts",
+            type=int,
+            default=100_000,
+            help="Количество пользователей с корзинами",
+        )
+        parser.add_argument(
+            "--items-per-cart",
+            type=int,
+            default=3,
+            help="Количество различных товаров в каждой корзине",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="Количество строк в одной вставке",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Начальное значение генератора"
+        )
+
+    def handle(self, *args, **options):
+        sizes = [options["categories"], options["subcategories"], options["products"]]
+        if min(sizes) < 1:
+            raise CommandError("Каталог должен содержать хотя бы один продукт.")
+        if options["items_per_cart"] > options["products"]:
+            raise CommandError("Товаров в корзине не может быть больше, чем продуктов.")
+        if Category.objects.filter(slug__startswith=f"{SEED_PREFIX}-").exists():
+            raise CommandError(
+                "Синтетический каталог уже создан. Используйте пустую БД."
+            )
+
+        self.batch_size = options["batch_size"]
+        self.random = random.Random(options["seed"])
+        start = time.perf_counter()
+        with transaction.atomic():
+            subcategory_ids = self.create_categories(
+                options["categories"], options["subcategories"]
+            )
+            products = self.create_products(options["products"], subcategory_ids)
+            self.create_carts(options["carts"], options["items_per_cart"], products)
+        bump_catalog_version()
+        bump_catalog_version(CATEGORY_TREE_VERSION_KEY)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Создано категорий: {options['categories']}, подкатегорий: "
+                f"{options['subcategories']}, продуктов: {options['products']}, "
+                f"корзин: {options['carts']} за {time.perf_counter() - start:.1f} с"
+            )
+        )
+
+    def create_categories(self, categories, subcategories):
+        category_objects = Category.objects.bulk_create(
+            Category(name=f"Категория {i:05d}", slug=f"{SEED_PREFIX}-category-{i}")
+            for i in range(categories)
+        )
+        # Подкатегории распределяются по категориям равномерно
+        subcategory_ids = []
+        for batch in batched(range(subcategories), self.batch_size):
+            created = SubCategory.objects.bulk_create(
+                SubCategory(
+                    name=f"Подкатегория {i:06d}",
+                    slug=f"{SEED_PREFIX}-subcategory-{i}",
+                    category=category_objects[i % categories],
+                )
+                for i in batch
+            )
+            subcategory_ids.extend(subcategory.pk for subcategory in created)
+        self.stdout.write(f"Категорий: {categories}, подкатегорий: {subcategories}")
+        return subcategory_ids
+
+    def create_products(self, count, subcategory_ids):
+        """Создает продукты и возвращает пары (id, цена)"""
+        products = []
+        for batch in batched(range(count), self.batch_size):
+            created = Product.objects.bulk_create(
+                Product(
+                    name=f"Синтетический товар {i:07d}",
+                    slug=f"{SEED_PREFIX}-product-{i}",
+                    subcategory_id=subcategory_ids[i % len(subcategory_ids)],
+                    price=Decimal(self.random.randrange(100, 1_000_000)) / 100,
+                )
+                for i in batch
+            )
+            products.extend((product.pk, product.price) for product in created)
+            self.stdout.write(f"Продуктов: {len(products)}/{count}")
+        return products
+
+    def create_carts(self, count, items_per_cart, products):
+        # Пароль пользователей синтетических корзин непригоден для входа
+        password = make_password(None)
+        created = 0
+        for batch in batched(range(count), self.batch_size):
+            users = User.objects.bulk_create(
+                User(username=f"{SEED_PREFIX}-user-{i:07d}", password=password)
+                for i in batch
+            )
+            # Итоги корзин считаются заранее, чтобы не пересчитывать их запросом
+            contents = [self.random.sample(products, items_per_cart) for _ in users]
+            carts = Cart.objects.bulk_create(
+                Cart(
+                    user=user,
+                    total_quantity=len(items),
+                    total_price=sum(price for product_id, price in items),
+                )
+                for user, items in zip(users, contents)
+            )
+            CartItem.objects.bulk_create(
+                (
+                    CartItem(cart=cart, product_id=product_id, quantity=1)
+                    for cart, items in zip(carts, contents)
+                    for product_id, price in items
+                ),
+                batch_size=self.batch_size,
+            )
+            created += len(carts)
+            self.stdout.write(f"Корзин: {created}/{count}")
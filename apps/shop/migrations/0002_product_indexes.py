@@ -0,0 +1,53 @@
+# Generated by Django 5.1.1 on 2026-10-18 16:31
+
+from django.db import migrations, models
+
+
+def create_name_search_index(apps, schema_editor):
+    """
+    Индекс для поиска по названию продукта.
+
+    PostgreSQL: триграммный GIN-индекс по UPPER(name) для icontains и
+    istartswith. SQLite: индекс с COLLATE NOCASE для istartswith.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS shop_product_name_trgm_idx "
+            "ON shop_product USING gin (UPPER(name) gin_trgm_ops)"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS shop_product_name_nocase_idx "
+            "ON shop_product (name COLLATE NOCASE)"
+        )
+
+
+def drop_name_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS shop_product_name_trgm_idx")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP INDEX IF EXISTS shop_product_name_nocase_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["subcategory", "price"], name="shop_produc_subcate_956796_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["price"], name="shop_produc_price_3b79b5_idx"),
+        ),
+        migrations.RunPython(create_name_search_index, drop_name_search_index),
+    ]
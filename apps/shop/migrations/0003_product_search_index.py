@@ -0,0 +1,34 @@
+from django.db import migrations
+
+INDEX_NAME = "shop_product_name_search_idx"
+
+
+def get_search_index():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    return GinIndex(SearchVector("name", config="russian"), name=INDEX_NAME)
+
+
+def create_search_index(apps, schema_editor):
+    """GIN-индекс полнотекстового поиска по названию продукта (только PostgreSQL)"""
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.add_index(apps.get_model("shop", "Product"), get_search_index())
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.remove_index(
+            apps.get_model("shop", "Product"), get_search_index()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0002_product_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
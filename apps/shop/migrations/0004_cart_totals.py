@@ -0,0 +1,51 @@
+# Generated by Django 5.1.1 on 2026-10-18 16:47
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_cart_totals(apps, schema_editor):
+    """Заполняет итоги существующих корзин по их элементам"""
+    Cart = apps.get_model("shop", "Cart")
+    CartItem = apps.get_model("shop", "CartItem")
+    price_field = models.DecimalField(max_digits=12, decimal_places=2)
+    items = CartItem.objects.filter(cart=OuterRef("pk")).order_by().values("cart")
+    quantity = items.annotate(total=Sum("quantity")).values("total")
+    price = items.annotate(
+        total=Sum(F("quantity") * F("product__price"), output_field=price_field)
+    ).values("total")
+    Cart.objects.update(
+        total_quantity=Coalesce(Subquery(quantity), 0),
+        total_price=Coalesce(Subquery(price), Decimal("0"), output_field=price_field),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0003_product_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cart",
+            name="total_price",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=Decimal("0"),
+                max_digits=12,
+                verbose_name="Общая стоимость",
+            ),
+        ),
+        migrations.AddField(
+            model_name="cart",
+            name="total_quantity",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Общее количество"
+            ),
+        ),
+        migrations.RunPython(fill_cart_totals, migrations.RunPython.noop),
+    ]
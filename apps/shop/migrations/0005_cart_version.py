@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 16:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0004_cart_totals"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cart",
+            name="version",
+            field=models.PositiveIntegerField(default=0, verbose_name="Версия"),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.1 on 2026-10-18 16:49
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, F, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_cart_items(apps, schema_editor):
+    """
+    Удаляет повторяющиеся элементы корзин перед созданием ограничения,
+    оставляя последнюю запись, и пересчитывает итоги этих корзин
+    """
+    Cart = apps.get_model("shop", "Cart")
+    CartItem = apps.get_model("shop", "CartItem")
+    duplicates = (
+        CartItem.objects.values("cart", "product")
+        .annotate(count=Count("id"), last_id=Max("id"))
+        .filter(count__gt=1)
+    )
+    cart_ids = set()
+    for duplicate in duplicates:
+        CartItem.objects.filter(
+            cart=duplicate["cart"], product=duplicate["product"]
+        ).exclude(id=duplicate["last_id"]).delete()
+        cart_ids.add(duplicate["cart"])
+    if not cart_ids:
+        return
+
+    price_field = models.DecimalField(max_digits=12, decimal_places=2)
+    items = CartItem.objects.filter(cart=OuterRef("pk")).order_by().values("cart")
+    quantity = items.annotate(total=Sum("quantity")).values("total")
+    price = items.annotate(
+        total=Sum(F("quantity") * F("product__price"), output_field=price_field)
+    ).values("total")
+    Cart.objects.filter(id__in=cart_ids).update(
+        total_quantity=Coalesce(Subquery(quantity), 0),
+        total_price=Coalesce(Subquery(price), Decimal("0"), output_field=price_field),
+        version=F("version") + 1,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0005_cart_version"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_cart_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="cartitem",
+            constraint=models.UniqueConstraint(
+                fields=("cart", "product"), name="unique_cart_product"
+            ),
+        ),
+    ]
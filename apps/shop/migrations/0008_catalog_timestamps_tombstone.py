@@ -0,0 +1,106 @@
+# Generated by Django 5.1.1 on 2026-10-18 17:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0007_product_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                db_index=True,
+                default=django.utils.timezone.now,
+                verbose_name="Дата создания",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                db_index=True,
+                default=django.utils.timezone.now,
+                verbose_name="Дата изменения",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="subcategory",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                db_index=True,
+                default=django.utils.timezone.now,
+                verbose_name="Дата создания",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="subcategory",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                db_index=True,
+                default=django.utils.timezone.now,
+                verbose_name="Дата изменения",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                db_index=True,
+                default=django.utils.timezone.now,
+                verbose_name="Дата создания",
+            ),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("category", "Категория"),
+                            ("subcategory", "Подкатегория"),
+                            ("product", "Продукт"),
+                        ],
+                        max_length=20,
+                        verbose_name="Тип",
+                    ),
+                ),
+                ("object_id", models.BigIntegerField(verbose_name="ID объекта")),
+                (
+                    "deleted_at",
+                    models.DateTimeField(
+                        auto_now_add=True, db_index=True, verbose_name="Дата удаления"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Удаленный объект",
+                "verbose_name_plural": "Удаленные объекты",
+            },
+        ),
+    ]
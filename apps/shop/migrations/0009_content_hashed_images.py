@@ -0,0 +1,41 @@
+# Generated by Django 5.1.1 on 2026-10-18 17:37
+
+import apps.core.media
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0008_catalog_timestamps_tombstone"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="category",
+            name="image",
+            field=apps.core.media.ContentHashedImageField(
+                blank=True,
+                null=True,
+                upload_to="images/categories/",
+                verbose_name="Фото",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="product",
+            name="image",
+            field=apps.core.media.ContentHashedImageField(
+                upload_to="images/products/", verbose_name="Фото"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="subcategory",
+            name="image",
+            field=apps.core.media.ContentHashedImageField(
+                blank=True,
+                null=True,
+                upload_to="images/subcategories/",
+                verbose_name="Фото",
+            ),
+        ),
+    ]
@@ -1,9 +1,16 @@
+from decimal import Decimal
+
 from django.contrib.auth.models import User
-from django.db import models
-from django.utils.text import slugify
+from django.db import models, transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from imagekit.models import ImageSpecField
 from imagekit.processors import Adjust, ResizeToFill, ResizeToFit
 
+from apps.core.media import ContentHashedImageField
+
+from .slugs import unique_slug
+
 
 class Category(models.Model):
     """Модель для представления категорий товаров"""
@@ -12,9 +19,15 @@ class Category(models.Model):
     slug = models.SlugField(
         verbose_name="Слаг", max_length=120, unique=True, blank=True
     )
-    image = models.ImageField(
+    image = ContentHashedImageField(
         verbose_name="Фото", upload_to="images/categories/", blank=True, null=True
     )
+    created_at = models.DateTimeField(
+        verbose_name="Дата создания", auto_now_add=True, db_index=True
+    )
+    updated_at = models.DateTimeField(
+        verbose_name="Дата изменения", auto_now=True, db_index=True
+    )
 
     class Meta:
         verbose_name = "Категория"
@@ -23,7 +36,7 @@ class Category(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
+            self.slug = unique_slug(self)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -37,9 +50,15 @@ class SubCategory(models.Model):
     slug = models.SlugField(
         verbose_name="Слаг", max_length=120, unique=True, blank=True
     )
-    image = models.ImageField(
+    image = ContentHashedImageField(
         verbose_name="Фото", upload_to="images/subcategories/", blank=True, null=True
     )
+    created_at = models.DateTimeField(
+        verbose_name="Дата создания", auto_now_add=True, db_index=True
+    )
+    updated_at = models.DateTimeField(
+        verbose_name="Дата изменения", auto_now=True, db_index=True
+    )
     category = models.ForeignKey(
         Category,
         verbose_name="Категория",
@@ -54,7 +73,7 @@ class SubCategory(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
+            self.slug = unique_slug(self)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -75,7 +94,13 @@ class Product(models.Model):
         on_delete=models.CASCADE,
     )
     price = models.DecimalField(verbose_name="Цена", max_digits=10, decimal_places=2)
-    image = models.ImageField(verbose_name="Фото", upload_to="images/products/")
+    image = ContentHashedImageField(verbose_name="Фото", upload_to="images/products/")
+    created_at = models.DateTimeField(
+        verbose_name="Дата создания", auto_now_add=True, db_index=True
+    )
+    updated_at = models.DateTimeField(
+        verbose_name="Дата изменения", auto_now=True, db_index=True
+    )
 
     # Генерируемые изображения с разными размерами
     image_small = ImageSpecField(
@@ -104,32 +129,183 @@ class Product(models.Model):
         verbose_name = "Продукт"
         verbose_name_plural = "Список продуктов"
         ordering = ("-name",)
+        indexes = [
+            models.Index(fields=["subcategory", "price"]),
+            models.Index(fields=["price"]),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
+            self.slug = unique_slug(self)
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
 
 
+class Tombstone(models.Model):
+    """
+    Запись об удалении категории, подкатегории или продукта. По этим
+    записям клиенты, синхронизирующие каталог, узнают об удалениях.
+    """
+
+    class Kind(models.TextChoices):
+        CATEGORY = "category", "Категория"
+        SUBCATEGORY = "subcategory", "Подкатегория"
+        PRODUCT = "product", "Продукт"
+
+    kind = models.CharField(verbose_name="Тип", max_length=20, choices=Kind.choices)
+    object_id = models.BigIntegerField(verbose_name="ID объекта")
+    deleted_at = models.DateTimeField(
+        verbose_name="Дата удаления", auto_now_add=True, db_index=True
+    )
+
+    class Meta:
+        verbose_name = "Удаленный объект"
+        verbose_name_plural = "Удаленные объекты"
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.object_id}"
+
+
+class CartQuerySet(models.QuerySet):
+    def with_calculated_totals(self):
+        """Добавляет итоги корзины, посчитанные по ее элементам"""
+        quantity, price = calculated_totals()
+        return self.annotate(calculated_quantity=quantity, calculated_price=price)
+
+    def for_user(self, user):
+        """
+        Корзина пользователя. id корзины из токена (user.cart_id) позволяет
+        искать ее по первичному ключу без загрузки пользователя
+        """
+        carts = self.filter(user_id=user.pk)
+        cart_id = getattr(user, "cart_id", None)
+        if cart_id is not None:
+            carts = carts.filter(pk=cart_id)
+        return carts
+
+    def get_or_create_for_user(self, user):
+        cart = self.for_user(user).first()
+        if cart is not None:
+            return cart, False
+        # Корзины из токена нет, например, она удалена
+        return self.get_or_create(user_id=user.pk)
+
+    async def aget_or_create_for_user(self, user):
+        cart = await self.for_user(user).afirst()
+        if cart is not None:
+            return cart, False
+        return await self.aget_or_create(user_id=user.pk)
+
+    def recalculate_totals(self):
+        """Пересчитывает сохраненные итоги корзин по их элементам одним запросом"""
+        quantity, price = calculated_totals()
+        return self.update(
+            total_quantity=quantity, total_price=price, version=F("version") + 1
+        )
+
+
+def calculated_totals():
+    """Подзапросы общего количества и общей стоимости товаров корзины"""
+    items = CartItem.objects.filter(cart=OuterRef("pk")).order_by().values("cart")
+    price_field = Cart._meta.get_field("total_price")
+    quantity = items.annotate(total=Sum("quantity")).values("total")
+    price = items.annotate(
+        total=Sum(F("quantity") * F("product__price"), output_field=price_field)
+    ).values("total")
+    return (
+        Coalesce(Subquery(quantity), 0),
+        Coalesce(Subquery(price), Decimal("0"), output_field=price_field),
+    )
+
+
 class Cart(models.Model):
-    """Модель для представления корзины пользователя"""
+    """
+    Модель для представления корзины пользователя.
+
+    Общее количество и общая стоимость товаров хранятся в корзине и
+    изменяются вместе с ее элементами, поэтому чтение итогов не требует
+    обхода элементов. Расхождения исправляет команда audit_cart_totals.
+    """
 
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="cart")
     created_at = models.DateTimeField(auto_now_add=True)
+    total_quantity = models.PositiveIntegerField(
+        verbose_name="Общее количество", default=0
+    )
+    total_price = models.DecimalField(
+        verbose_name="Общая стоимость",
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal("0"),
+    )
+    # Увеличивается при каждом изменении итогов, используется в ETag
+    version = models.PositiveIntegerField(verbose_name="Версия", default=0)
+
+    objects = CartQuerySet.as_manager()
 
     def __str__(self):
         return f"Корзина пользователя {self.user.username}"
 
+    def get_totals(self):
+        """Возвращает общее количество и общую стоимость товаров в корзине"""
+        return self.total_quantity, self.total_price
+
     def get_total_quantity(self):
         """Возвращает общее количество товаров в корзине"""
-        return sum(item.quantity for item in self.items.all())
+        return self.total_quantity
 
     def get_total_price(self):
         """Возвращает общую стоимость товаров в корзине"""
-        return sum(item.get_total_price() for item in self.items.all())
+        return self.total_price
+
+    def update_totals(self, quantity, price):
+        """
+        Атомарно изменяет сохраненные итоги корзины на указанные величины
+        и увеличивает ее версию
+        """
+        if quantity or price:
+            Cart.objects.filter(pk=self.pk).update(
+                total_quantity=F("total_quantity") + quantity,
+                total_price=F("total_price") + price,
+                version=F("version") + 1,
+            )
+
+    def lock(self):
+        """Блокирует строку корзины до конца текущей транзакции"""
+        Cart.objects.select_for_update().filter(pk=self.pk).values_list("pk").get()
+
+    def set_item_quantity(self, product, quantity):
+        """
+        Устанавливает количество товара в корзине одним запросом
+        INSERT ... ON CONFLICT, при нулевом количестве удаляет товар.
+
+        Строка корзины блокируется, поэтому параллельные изменения одной
+        корзины выполняются по очереди, а итоги пересчитываются по элементам
+        в той же транзакции.
+        """
+        with transaction.atomic():
+            self.lock()
+            if quantity > 0:
+                CartItem.objects.bulk_create(
+                    [CartItem(cart=self, product=product, quantity=quantity)],
+                    update_conflicts=True,
+                    unique_fields=["cart", "product"],
+                    update_fields=["quantity"],
+                )
+            else:
+                self.items.filter(product=product).delete()
+            Cart.objects.filter(pk=self.pk).recalculate_totals()
+
+    def clear(self):
+        """Удаляет все товары из корзины и обнуляет ее итоги"""
+        with transaction.atomic():
+            self.items.all().delete()
+            Cart.objects.filter(pk=self.pk).update(
+                total_quantity=0, total_price=Decimal("0"), version=F("version") + 1
+            )
+        self.total_quantity, self.total_price = 0, Decimal("0")
 
 
 class CartItem(models.Model):
@@ -139,6 +315,13 @@ class CartItem(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cart", "product"], name="unique_cart_product"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.quantity} of {self.product.name}"
 
@@ -1,13 +1,266 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
 
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Page
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
-class CategoryPagination(PageNumberPagination):
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """Постраничная пагинация с асинхронным вариантом для async-представлений"""
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+
+        bottom = (number - 1) * page_size
+        object_list = [obj async for obj in queryset[bottom : bottom + page_size]]
+        self.page = Page(object_list, number, paginator)
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.request = request
+        return list(self.page)
+
+
+class CategoryPagination(AsyncPageNumberPagination):
     page_size = 3
     page_size_query_param = "page_size"
     max_page_size = 50
 
 
-class ProductPagination(PageNumberPagination):
+class ProductPagination(AsyncPageNumberPagination):
     page_size = 2
     page_size_query_param = "page_size"
     max_page_size = 40
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинация по ключу (keyset): страница выбирается условием по полям
+    сортировки вместо OFFSET, общее количество записей не считается.
+    Время ответа не зависит от глубины страницы.
+
+    Курсор непрозрачен для клиента и содержит значения полей сортировки
+    крайней записи страницы и направление перехода.
+    """
+
+    page_size = None
+    page_size_query_param = "page_size"
+    max_page_size = None
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Неверный курсор."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request)
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request)
+        return self.set_page([obj async for obj in queryset])
+
+    def get_page_queryset(self, queryset, request):
+        """Запрос страницы: сортировка, условие по позиции курсора и LIMIT"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.position, self.reverse = self.decode_cursor(request, queryset.model)
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [self._invert(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self.get_seek_filter(ordering, self.position))
+        # Лишняя запись показывает, есть ли страница дальше в направлении обхода
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = self.position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        if self.max_page_size:
+            return min(page_size, self.max_page_size)
+        return page_size
+
+    def get_ordering(self, queryset):
+        """Поля сортировки набора данных с id для однозначности позиции"""
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        if not {"id", "-id", "pk", "-pk"} & set(ordering):
+            descending = bool(ordering) and ordering[-1].startswith("-")
+            ordering.append("-id" if descending else "id")
+        return ordering
+
+    def get_seek_filter(self, ordering, position):
+        """
+        Условие выборки записей после позиции при заданной сортировке:
+        (a < x) OR (a = x AND b < y) для полей (-a, -b)
+        """
+        seek_filter = Q()
+        equal = {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            seek_filter |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return seek_filter
+
+    def get_position(self, instance):
+        return [getattr(instance, field.lstrip("-")) for field in self.ordering]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.build_link(self.get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Пустая страница после последней записи: назад к началу выборки
+            return replace_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param, ""
+            )
+        return self.build_link(self.get_position(self.page[0]), reverse=True)
+
+    def build_link(self, position, reverse):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(position, reverse)
+        )
+
+    def encode_cursor(self, position, reverse=False):
+        payload = json.dumps({"p": position, "r": int(reverse)}, default=str)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request, model):
+        """
+        Возвращает позицию и направление из курсора запроса. Значения
+        позиции приводятся к типам полей сортировки, поэтому измененный
+        клиентом курсор дает 404, а не ошибку запроса к БД.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padding = "=" * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(encoded + padding))
+            position, reverse = payload["p"], bool(payload["r"])
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError(position)
+            position = [
+                self.to_python(model, field, value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (binascii.Error, ValidationError, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    @staticmethod
+    def to_python(model, field, value):
+        """Значение позиции в типе поля сортировки; None не допускается"""
+        if value is None:
+            raise ValueError(field)
+        *relations, name = field.lstrip("-").split("__")
+        for relation in relations:
+            model = model._meta.get_field(relation).related_model
+        model_field = model._meta.pk if name == "pk" else model._meta.get_field(name)
+        value = model_field.to_python(value)
+        if value is None:
+            raise ValueError(field)
+        return value
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+
+class CategoryKeysetPagination(KeysetPagination):
+    page_size = CategoryPagination.page_size
+    max_page_size = CategoryPagination.max_page_size
+
+
+class ProductKeysetPagination(KeysetPagination):
+    page_size = ProductPagination.page_size
+    max_page_size = ProductPagination.max_page_size
+
+
+class KeysetPaginationMixin:
+    """
+    Включает keyset-пагинацию представления по запросу клиента:
+    ?pagination=keyset для первой страницы или ?cursor=... для следующих.
+    Без этих параметров используется обычная постраничная пагинация.
+    """
+
+    keyset_pagination_class = None
+    keyset_query_param = "pagination"
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            if self.use_keyset_pagination():
+                self._paginator = self.keyset_pagination_class()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+
+    def use_keyset_pagination(self):
+        request = getattr(self, "request", None)
+        if request is None or self.keyset_pagination_class is None:
+            return False
+        query_params = request.query_params
+        return (
+            query_params.get(self.keyset_query_param) == "keyset"
+            or KeysetPagination.cursor_query_param in query_params
+        )
@@ -0,0 +1,240 @@
+import heapq
+import logging
+import math
+import re
+import threading
+from collections import defaultdict
+from functools import lru_cache, reduce
+from operator import or_
+
+import snowballstemmer
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import DatabaseError, connection
+from django.db.models import Q
+
+from .cache import get_catalog_version
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = "russian"
+
+# Веса полей документа, как у весов A, B и C в PostgreSQL
+FIELD_WEIGHTS = (1.0, 0.4, 0.2)
+
+TOKEN_RE = re.compile(r"\w+")
+CYRILLIC_RE = re.compile("[а-я]")
+
+_stemmers = threading.local()
+
+
+@lru_cache(maxsize=200_000)
+def stem(word):
+    """Возвращает основу слова с учетом русской и английской морфологии"""
+    if not hasattr(_stemmers, "russian"):
+        _stemmers.russian = snowballstemmer.stemmer("russian")
+        _stemmers.english = snowballstemmer.stemmer("english")
+    word = word.replace("ё", "е")
+    if CYRILLIC_RE.search(word):
+        return _stemmers.russian.stemWord(word)
+    return _stemmers.english.stemWord(word)
+
+
+def tokenize(text):
+    # Артикулы и числа не стеммируются и не занимают место в кэше основ
+    return [
+        stem(word) if word.isalpha() else word
+        for word in TOKEN_RE.findall(text.lower())
+    ]
+
+
+@lru_cache(maxsize=10_000)
+def text_terms(text):
+    """Множество основ слов текста; кэшируется для повторяющихся названий"""
+    return frozenset(tokenize(text))
+
+
+class InvertedIndex:
+    """
+    Инвертированный индекс продуктов в памяти процесса для БД без
+    полнотекстового поиска (SQLite).
+
+    Документ продукта — его название, название подкатегории и категории.
+    Индекс строится из таблицы Product при первом поиске и обновляется
+    сигналами моделей. Если версия каталога изменилась в другом процессе,
+    индекс перестраивается целиком в фоновом потоке, а поиск до окончания
+    перестроения выполняется по предыдущему индексу.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._postings = defaultdict(dict)
+        self._documents = {}
+        self.version = None
+
+    def search(self, query, limit=None):
+        """
+        Возвращает id продуктов, содержащих все слова запроса,
+        по убыванию релевантности
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        self.ensure_current()
+        limit = limit or settings.SHOP_SEARCH_MAX_RESULTS
+
+        with self._lock:
+            postings = [self._postings.get(term) for term in terms]
+            if not all(postings):
+                return []
+            postings.sort(key=len)
+            candidates = postings[0].keys()
+            for posting in postings[1:]:
+                candidates = candidates & posting.keys()
+            total = len(self._documents)
+            idf = [math.log(1 + total / len(posting)) for posting in postings]
+            scores = (
+                (sum(w * p[product_id] for w, p in zip(idf, postings)), -product_id)
+                for product_id in candidates
+            )
+            ranked = heapq.nlargest(limit, scores)
+        return [-product_id for score, product_id in ranked]
+
+    def ensure_current(self):
+        if self.version == get_catalog_version():
+            return
+        if self.version is None:
+            # Предыдущего индекса нет, первый поиск ждет построения
+            with self._build_lock:
+                if self.version is None:
+                    self.build()
+        elif self._build_lock.acquire(blocking=False):
+            threading.Thread(
+                target=self.rebuild, name="search-index-rebuild", daemon=True
+            ).start()
+
+    def rebuild(self):
+        """Перестраивает индекс в фоновом потоке, запущенном ensure_current"""
+        try:
+            self.build()
+        except DatabaseError:
+            logger.warning("Не удалось перестроить поисковый индекс", exc_info=True)
+        finally:
+            self._build_lock.release()
+            connection.close()
+
+    def build(self):
+        """Строит индекс заново по всем продуктам"""
+        from .models import Product
+
+        version = get_catalog_version()
+        postings = defaultdict(dict)
+        documents = {}
+        rows = Product.objects.values_list(
+            "id", "name", "subcategory__name", "subcategory__category__name"
+        ).iterator(chunk_size=5000)
+        for product_id, *fields in rows:
+            terms = self._document_terms(fields)
+            documents[product_id] = terms
+            for term, weight in terms.items():
+                postings[term][product_id] = weight
+
+        with self._lock:
+            self._postings, self._documents = postings, documents
+            self.version = version
+
+    def update(self, products):
+        """Обновляет документы продуктов после изменения в текущем процессе"""
+        if self.version is None:
+            return
+        rows = list(
+            products.values_list(
+                "id", "name", "subcategory__name", "subcategory__category__name"
+            )
+        )
+        with self._lock:
+            for product_id, *fields in rows:
+                self._remove(product_id)
+                terms = self._document_terms(fields)
+                self._documents[product_id] = terms
+                for term, weight in terms.items():
+                    self._postings[term][product_id] = weight
+            self._sync_version()
+
+    def clear(self):
+        with self._lock:
+            self._postings, self._documents = defaultdict(dict), {}
+            self.version = None
+
+    def remove(self, product_id):
+        with self._lock:
+            if self.version is None:
+                return
+            self._remove(product_id)
+            self._sync_version()
+
+    def _remove(self, product_id):
+        for term in self._documents.pop(product_id, ()):
+            posting = self._postings[term]
+            posting.pop(product_id, None)
+            if not posting:
+                del self._postings[term]
+
+    def _sync_version(self):
+        # Версия каталога увеличивается на 1 при каждом изменении. Если разница
+        # больше, каталог менялся и в других процессах, и индекс устарел.
+        version = get_catalog_version()
+        if version == self.version + 1:
+            self.version = version
+
+    @staticmethod
+    def _document_terms(fields):
+        terms = {}
+        for text, weight in zip(fields, FIELD_WEIGHTS):
+            for term in text_terms(text or ""):
+                terms[term] = terms.get(term, 0) + weight
+        return terms
+
+
+product_index = InvertedIndex()
+
+
+def postgres_search(queryset, query):
+    """
+    Полнотекстовый поиск продуктов в PostgreSQL.
+
+    Кандидаты отбираются по GIN-индексу на названии продукта и по
+    совпавшим подкатегориям, затем проверяются по полному документу
+    и сортируются по SearchRank.
+    """
+    from .models import SubCategory
+
+    words = TOKEN_RE.findall(query)
+    if not words:
+        return queryset.none()
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+    any_word = reduce(or_, (SearchQuery(word, config=SEARCH_CONFIG) for word in words))
+
+    subcategories = (
+        SubCategory.objects.annotate(
+            document=SearchVector("name", "category__name", config=SEARCH_CONFIG)
+        )
+        .filter(document=any_word)
+        .values("id")
+    )
+    document = (
+        SearchVector("name", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("subcategory__name", weight="B", config=SEARCH_CONFIG)
+        + SearchVector("subcategory__category__name", weight="C", config=SEARCH_CONFIG)
+    )
+    return (
+        queryset.annotate(
+            name_document=SearchVector("name", config=SEARCH_CONFIG),
+            document=document,
+            rank=SearchRank(document, search_query),
+        )
+        .filter(Q(name_document=any_word) | Q(subcategory__in=subcategories))
+        .filter(document=search_query)
+        .order_by("-rank", "id")
+    )
@@ -17,26 +17,97 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ["id", "name", "slug", "image", "subcategories"]
 
 
+class CategoryShortSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ["id", "name", "slug"]
+
+
+class SubCategoryShortSerializer(serializers.ModelSerializer):
+    category = CategoryShortSerializer(read_only=True)
+
+    class Meta:
+        model = SubCategory
+        fields = ["id", "name", "slug", "category"]
+
+
 class ProductSerializer(serializers.ModelSerializer):
+    subcategory = SubCategoryShortSerializer(read_only=True)
     images = serializers.SerializerMethodField()
 
     class Meta:
         fields = ["id", "name", "slug", "price", "subcategory", "images"]
         model = Product
-        depth = 2
+
+    def to_representation(self, instance):
+        """
+        Строит представление продукта напрямую из атрибутов, загруженных
+        через select_related, без обхода вложенных сериализаторов.
+        Результат совпадает с описанием полей выше.
+        """
+        subcategory = instance.subcategory
+        category = subcategory.category
+        return {
+            "id": instance.id,
+            "name": instance.name,
+            "slug": instance.slug,
+            "price": self.fields["price"].to_representation(instance.price),
+            "subcategory": {
+                "id": subcategory.id,
+                "name": subcategory.name,
+                "slug": subcategory.slug,
+                "category": {
+                    "id": category.id,
+                    "name": category.name,
+                    "slug": category.slug,
+                },
+            },
+            "images": self.get_images(instance),
+        }
 
     def get_images(self, obj):
         """
         Возвращает словарь с URL-адресами изображений продукта разных размеров
         """
+        # Копии создаются при сохранении продукта, поэтому здесь только
+        # строятся URL без обращений к хранилищу
+        if not obj.image:
+            return {"original": None, "small": None, "medium": None, "large": None}
         return {
-            "original": obj.image.url if obj.image else None,
-            "small": obj.image_small.url if obj.image_small else None,
-            "medium": obj.image_medium.url if obj.image_medium else None,
-            "large": obj.image_large.url if obj.image_large else None,
+            "original": obj.image.url,
+            "small": obj.image_small.url,
+            "medium": obj.image_medium.url,
+            "large": obj.image_large.url,
         }
 
 
+class CategoryChangeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ["id", "name", "slug", "image", "updated_at"]
+
+
+class SubCategoryChangeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SubCategory
+        fields = ["id", "name", "slug", "image", "category", "updated_at"]
+
+
+class ProductChangeSerializer(serializers.ModelSerializer):
+    """
+    Плоское представление продукта для синхронизации: вместо вложенных
+    подкатегории и категории передается только id подкатегории
+    """
+
+    images = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = ["id", "name", "slug", "price", "subcategory", "images", "updated_at"]
+
+    get_images = ProductSerializer.get_images
+
+
 class CartItemSerializer(serializers.ModelSerializer):
     product = serializers.StringRelatedField()
 
@@ -60,3 +131,34 @@ class CartSerializer(serializers.ModelSerializer):
 
     def get_total_price(self, obj):
         return obj.get_total_price()
+
+
+class CartBatchItemSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0, default=1)
+
+
+class CartBatchSerializer(serializers.Serializer):
+    items = CartBatchItemSerializer(many=True, allow_empty=False, max_length=100)
+
+    def validate_items(self, items):
+        product_ids = [item["product_id"] for item in items]
+        if len(set(product_ids)) != len(product_ids):
+            raise serializers.ValidationError(
+                "Продукты в запросе не должны повторяться."
+            )
+        return items
+
+    def validate(self, attrs):
+        """Проверяет существование всех продуктов одним запросом"""
+        product_ids = [item["product_id"] for item in attrs["items"]]
+        products = Product.objects.in_bulk(product_ids)
+        missing = [
+            product_id for product_id in product_ids if product_id not in products
+        ]
+        if missing:
+            raise serializers.ValidationError(
+                {"items": f"Продукты с указанными product_id не существуют: {missing}."}
+            )
+        attrs["products"] = products
+        return attrs
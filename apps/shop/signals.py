@@ -0,0 +1,106 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import CATEGORY_TREE_VERSION_KEY, bump_catalog_version
+from .models import Cart, Category, Product, SubCategory, Tombstone
+from .search import product_index
+from .tree import category_tree
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=SubCategory)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=SubCategory)
+@receiver(post_delete, sender=Product)
+def invalidate_catalog_cache(sender, **kwargs):
+    """
+    Сбрасывает кэш ответов каталога при изменении его данных. Версия
+    увеличивается после фиксации транзакции, иначе параллельный запрос
+    может закэшировать под новой версией еще не измененные данные.
+    """
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=SubCategory)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=SubCategory)
+def invalidate_category_tree(sender, **kwargs):
+    """
+    Сбрасывает дерево категорий в памяти во всех процессах после фиксации
+    транзакции, чтобы дерево не загрузилось заново из старых данных
+    """
+    transaction.on_commit(reset_category_tree)
+
+
+def reset_category_tree():
+    bump_catalog_version(CATEGORY_TREE_VERSION_KEY)
+    category_tree.clear()
+
+
+TOMBSTONE_KINDS = {
+    Category: Tombstone.Kind.CATEGORY,
+    SubCategory: Tombstone.Kind.SUBCATEGORY,
+    Product: Tombstone.Kind.PRODUCT,
+}
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=SubCategory)
+@receiver(post_delete, sender=Product)
+def create_tombstone(sender, instance, **kwargs):
+    """Запоминает удаление объекта каталога для ленты изменений"""
+    Tombstone.objects.create(kind=TOMBSTONE_KINDS[sender], object_id=instance.id)
+
+
+@receiver(post_save, sender=Product)
+def update_product_search_index(sender, instance, **kwargs):
+    """Обновляет документ продукта в поисковом индексе"""
+    products = Product.objects.filter(id=instance.id)
+    transaction.on_commit(lambda: product_index.update(products))
+
+
+@receiver(post_save, sender=SubCategory)
+def update_subcategory_search_index(sender, instance, **kwargs):
+    """Обновляет документы продуктов подкатегории в поисковом индексе"""
+    products = Product.objects.filter(subcategory=instance)
+    transaction.on_commit(lambda: product_index.update(products))
+
+
+@receiver(post_save, sender=Category)
+def update_category_search_index(sender, instance, **kwargs):
+    """Обновляет документы продуктов категории в поисковом индексе"""
+    products = Product.objects.filter(subcategory__category=instance)
+    transaction.on_commit(lambda: product_index.update(products))
+
+
+@receiver(post_delete, sender=Product)
+def remove_from_search_index(sender, instance, **kwargs):
+    """Удаляет продукт из поискового индекса"""
+    product_id = instance.id
+    transaction.on_commit(lambda: product_index.remove(product_id))
+
+
+@receiver(post_save, sender=Product)
+def update_cart_totals_on_price_change(sender, instance, update_fields=None, **kwargs):
+    """Пересчитывает итоги корзин с продуктом, цена которого могла измениться"""
+    if update_fields is None or "price" in update_fields:
+        Cart.objects.filter(items__product=instance).recalculate_totals()
+
+
+@receiver(pre_delete, sender=Product)
+def remember_product_carts(sender, instance, **kwargs):
+    # Элементы корзин удаляются каскадно вместе с продуктом
+    instance._cart_ids = list(
+        Cart.objects.filter(items__product=instance).values_list("id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Product)
+def update_cart_totals_on_delete(sender, instance, **kwargs):
+    """Пересчитывает итоги корзин, из которых удален продукт"""
+    cart_ids = getattr(instance, "_cart_ids", None)
+    if cart_ids:
+        Cart.objects.filter(id__in=cart_ids).recalculate_totals()
@@ -0,0 +1,158 @@
+"""
+Генерация уникальных слагов для объектов каталога.
+
+Кириллица транслитерируется в латиницу ("Электроника" -> "elektronika"),
+совпадения нумеруются в памяти по заранее загруженным занятым слагам,
+поэтому слаги пакета из тысяч объектов генерируются за пару запросов.
+Используется из save() моделей и при пакетном импорте.
+"""
+
+from functools import reduce
+from operator import or_
+
+from django.db import connections
+from django.db.models import Q
+from django.utils.text import slugify
+
+# Место в конце слага под номер: "-" и до 7 цифр
+SUFFIX_LENGTH = 8
+
+# Количество основ слагов в одном запросе занятых слагов: IN по индексу
+# и цепочка LIKE для слагов с номерами, которая ограничена глубиной
+# выражений SQLite
+LOOKUP_BATCH_SIZE = 2000
+PREFIX_BATCH_SIZE = 500
+
+TRANSLITERATION = str.maketrans(
+    {
+        "а": "a",
+        "б": "b",
+        "в": "v",
+        "г": "g",
+        "д": "d",
+        "е": "e",
+        "ё": "e",
+        "ж": "zh",
+        "з": "z",
+        "и": "i",
+        "й": "y",
+        "к": "k",
+        "л": "l",
+        "м": "m",
+        "н": "n",
+        "о": "o",
+        "п": "p",
+        "р": "r",
+        "с": "s",
+        "т": "t",
+        "у": "u",
+        "ф": "f",
+        "х": "kh",
+        "ц": "ts",
+        "ч": "ch",
+        "ш": "sh",
+        "щ": "shch",
+        "ъ": "",
+        "ы": "y",
+        "ь": "",
+        "э": "e",
+        "ю": "yu",
+        "я": "ya",
+        "і": "i",
+        "ї": "yi",
+        "є": "ye",
+        "ґ": "g",
+    }
+)
+
+
+def transliterate(text):
+    """Заменяет кириллицу в тексте латиницей, текст приводится к нижнему регистру"""
+    return text.lower().translate(TRANSLITERATION)
+
+
+def slug_base(name, max_length, fallback):
+    """Слаг названия без номера с местом под номер в пределах max_length"""
+    base = slugify(transliterate(name))[: max_length - SUFFIX_LENGTH].strip("-")
+    return base or fallback
+
+
+def prefix_condition(field_name, prefix, vendor):
+    """
+    Условие "поле начинается с prefix", при котором используется индекс.
+    В SQLite LIKE не использует индекс, а сравнение строк использует,
+    поэтому префикс задается диапазоном строк. В PostgreSQL порядок строк
+    зависит от правил сортировки, а LIKE по префиксу выполняется по
+    индексу varchar_pattern_ops, который Django создает для SlugField.
+    """
+    if vendor == "sqlite":
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return Q(**{f"{field_name}__gte": prefix, f"{field_name}__lt": upper})
+    return Q(**{f"{field_name}__startswith": prefix})
+
+
+def get_taken_slugs(queryset, bases, field_name="slug"):
+    """
+    Возвращает занятые слаги, совпадающие с основами или начинающиеся
+    с "<основа>-". Сначала одним запросом ищутся сами основы, затем
+    одним запросом на пакет загружаются слаги с номерами для занятых основ.
+    """
+    vendor = connections[queryset.db].vendor
+    # Сортировка по умолчанию мешает SQLite объединить поиски по индексу для OR
+    queryset = queryset.order_by()
+    bases = sorted(bases)
+    taken = set()
+    for i in range(0, len(bases), LOOKUP_BATCH_SIZE):
+        batch = bases[i : i + LOOKUP_BATCH_SIZE]
+        taken.update(
+            queryset.filter(**{f"{field_name}__in": batch}).values_list(
+                field_name, flat=True
+            )
+        )
+
+    colliding = sorted(taken)
+    for i in range(0, len(colliding), PREFIX_BATCH_SIZE):
+        batch = colliding[i : i + PREFIX_BATCH_SIZE]
+        condition = reduce(
+            or_, (prefix_condition(field_name, f"{base}-", vendor) for base in batch)
+        )
+        taken.update(queryset.filter(condition).values_list(field_name, flat=True))
+    return taken
+
+
+def unique_slugs(model, names, field_name="slug", queryset=None):
+    """
+    Возвращает уникальные слаги для списка названий в том же порядке.
+    Занятые слаги загружаются заранее, совпадения нумеруются в памяти:
+    "name", "name-2", "name-3" и т. д. queryset ограничивает объекты,
+    с которыми сравниваются слаги.
+    """
+    max_length = model._meta.get_field(field_name).max_length
+    fallback = model._meta.model_name
+    bases = [slug_base(name, max_length, fallback) for name in names]
+    if queryset is None:
+        queryset = model._default_manager.all()
+    taken = get_taken_slugs(queryset, set(bases), field_name)
+
+    slugs = []
+    counters = {}
+    for base in bases:
+        slug = base
+        number = counters.get(base, 1)
+        while slug in taken:
+            number += 1
+            slug = f"{base}-{number}"
+        counters[base] = number
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def unique_slug(instance, source_field="name", field_name="slug"):
+    """Уникальный слаг для сохраняемого объекта модели"""
+    model = type(instance)
+    queryset = model._default_manager.all()
+    if instance.pk is not None:
+        queryset = queryset.exclude(pk=instance.pk)
+    name = getattr(instance, source_field)
+    return unique_slugs(model, [name], field_name, queryset)[0]
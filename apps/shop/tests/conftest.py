@@ -0,0 +1,80 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from model_bakery import baker
+from rest_framework.test import APIClient
+
+from apps.shop.models import Cart, CartItem, Category, Product, SubCategory
+from apps.shop.search import product_index
+from apps.shop.tree import category_tree
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Очищаем кэш, чтобы ответы не переходили между тестами."""
+    cache.clear()
+    category_tree.clear()
+    product_index.clear()
+    yield
+    cache.clear()
+    category_tree.clear()
+    product_index.clear()
+
+
+@pytest.fixture
+def client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_factory():
+    def factory(*args, **kwargs):
+        return baker.make(User, *args, **kwargs)
+
+    return factory
+
+
+@pytest.fixture
+def authenticated_client(client, user_factory):
+    """Создаем авторизованного клиента."""
+    user = user_factory()
+    client.force_authenticate(user=user)
+    return client, user
+
+
+@pytest.fixture
+def category_factory():
+    def factory(*args, **kwargs):
+        return baker.make(Category, *args, **kwargs)
+
+    return factory
+
+
+@pytest.fixture
+def subcategory_factory(category_factory):
+    def factory(*args, **kwargs):
+        return baker.make(SubCategory, category=category_factory(), *args, **kwargs)
+
+    return factory
+
+
+@pytest.fixture
+def product_factory(subcategory_factory):
+    def factory(*args, **kwargs):
+        return baker.make(Product, subcategory=subcategory_factory(), *args, **kwargs)
+
+    return factory
+
+
+@pytest.fixture
+def cart_factory(authenticated_client, product_factory):
+    def factory(*args, **kwargs):
+        client, user = authenticated_client
+        cart = baker.make(Cart, user=user)
+        product = product_factory()
+        baker.make(CartItem, cart=cart, product=product, quantity=2)
+        # Элементы созданы напрямую, минуя корзину, поэтому итоги пересчитываются
+        Cart.objects.filter(pk=cart.pk).recalculate_totals()
+        return cart
+
+    return factory
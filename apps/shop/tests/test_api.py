@@ -1,67 +1,16 @@
+import base64
+import json
+from io import StringIO
+
 import pytest
-from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from model_bakery import baker
-from rest_framework.test import APIClient
-
-from apps.shop.models import Cart, CartItem, Category, Product, SubCategory
-
-
-@pytest.fixture
-def client():
-    return APIClient()
-
-
-@pytest.fixture
-def user_factory():
-    def factory(*args, **kwargs):
-        return baker.make(User, *args, **kwargs)
-
-    return factory
-
-
-@pytest.fixture
-def authenticated_client(client, user_factory):
-    """Создаем авторизованного клиента."""
-    user = user_factory()
-    client.force_authenticate(user=user)
-    return client, user
-
-
-@pytest.fixture
-def category_factory():
-    def factory(*args, **kwargs):
-        return baker.make(Category, *args, **kwargs)
-
-    return factory
-
-
-@pytest.fixture
-def subcategory_factory(category_factory):
-    def factory(*args, **kwargs):
-        return baker.make(SubCategory, category=category_factory(), *args, **kwargs)
-
-    return factory
-
-
-@pytest.fixture
-def product_factory(subcategory_factory):
-    def factory(*args, **kwargs):
-        return baker.make(Product, subcategory=subcategory_factory(), *args, **kwargs)
 
-    return factory
-
-
-@pytest.fixture
-def cart_factory(authenticated_client, product_factory):
-    def factory(*args, **kwargs):
-        client, user = authenticated_client
-        cart = baker.make(Cart, user=user)
-        product = product_factory()
-        baker.make(CartItem, cart=cart, product=product, quantity=2)
-        return cart
-
-    return factory
+from apps.shop.cache import get_catalog_version
+from apps.shop.models import Cart, CartItem
 
 
 @pytest.mark.django_db
@@ -138,3 +87,349 @@ def test_delete_clear_cart(authenticated_client, cart_factory):
 
     assert response.status_code == 200
     assert response.data["message"] == "Корзина успешно очищена."
+
+
+@pytest.mark.django_db
+def test_get_cart_query_count(
+    authenticated_client, product_factory, django_assert_num_queries
+):
+    """Тест количества запросов при получении корзины: не зависит от числа товаров."""
+    client, user = authenticated_client
+    cart = baker.make(Cart, user=user)
+    products = [product_factory(price=10) for _ in range(50)]
+    for product in products:
+        baker.make(CartItem, cart=cart, product=product, quantity=2)
+    Cart.objects.filter(pk=cart.pk).recalculate_totals()
+
+    url = reverse("cart-detail")
+    # Корзина + элементы корзины вместе с продуктами
+    with django_assert_num_queries(2):
+        response = client.get(url)
+
+    assert response.status_code == 200
+    assert len(response.data["items"]) == 50
+    assert response.data["total_quantity"] == 100
+    assert response.data["total_price"] == 1000
+
+
+@pytest.mark.django_db
+def test_post_cart_batch(authenticated_client, product_factory):
+    """Тест пакетного добавления, обновления и удаления товаров в корзине."""
+    client, user = authenticated_client
+    cart = baker.make(Cart, user=user)
+    updated, removed, added = [product_factory(price=10) for _ in range(3)]
+    baker.make(CartItem, cart=cart, product=updated, quantity=1)
+    baker.make(CartItem, cart=cart, product=removed, quantity=1)
+    Cart.objects.filter(pk=cart.pk).recalculate_totals()
+
+    url = reverse("cart-batch")
+    data = {
+        "items": [
+            {"product_id": updated.id, "quantity": 5},
+            {"product_id": removed.id, "quantity": 0},
+            {"product_id": added.id, "quantity": 2},
+        ]
+    }
+    response = client.post(url, data, format="json")
+
+    assert response.status_code == 200
+    assert [line["result"] for line in response.data["items"]] == [
+        "updated",
+        "removed",
+        "added",
+    ]
+    assert response.data["total_quantity"] == 7
+    assert response.data["total_price"] == 70
+    assert dict(cart.items.values_list("product_id", "quantity")) == {
+        updated.id: 5,
+        added.id: 2,
+    }
+
+
+@pytest.mark.django_db
+def test_post_cart_batch_unknown_product(authenticated_client, product_factory):
+    """Тест пакетного изменения корзины с несуществующим продуктом."""
+    client, user = authenticated_client
+    product = product_factory()
+
+    url = reverse("cart-batch")
+    data = {"items": [{"product_id": product.id}, {"product_id": product.id + 1}]}
+    response = client.post(url, data, format="json")
+
+    assert response.status_code == 400
+    assert not CartItem.objects.exists()
+
+
+@pytest.mark.django_db
+def test_post_cart_batch_query_count(authenticated_client, product_factory):
+    """Тест количества запросов пакетного изменения: не зависит от размера пакета."""
+    client, user = authenticated_client
+    baker.make(Cart, user=user)
+    url = reverse("cart-batch")
+
+    def count_queries(products):
+        data = {"items": [{"product_id": product.id} for product in products]}
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(url, data, format="json")
+        assert response.status_code == 200
+        return len(context.captured_queries)
+
+    assert count_queries([product_factory() for _ in range(3)]) == count_queries(
+        [product_factory() for _ in range(30)]
+    )
+
+
+@pytest.mark.django_db
+def test_get_products_keyset_pagination(client, product_factory):
+    """Тест keyset-пагинации продуктов: обход вперед и назад без подсчета записей."""
+    products = product_factory(_quantity=5)
+    names = sorted((product.name for product in products), reverse=True)
+
+    url = reverse("product-list")
+    response = client.get(url, {"pagination": "keyset"})
+    assert response.status_code == 200
+    assert "count" not in response.data
+    assert response.data["previous"] is None
+    pages = [[item["name"] for item in response.data["results"]]]
+    while response.data["next"]:
+        response = client.get(response.data["next"])
+        pages.append([item["name"] for item in response.data["results"]])
+
+    assert [name for page in pages for name in page] == names
+    assert [len(page) for page in pages] == [2, 2, 1]
+
+    response = client.get(response.data["previous"])
+    assert [item["name"] for item in response.data["results"]] == pages[1]
+
+
+@pytest.mark.django_db
+def test_get_products_keyset_invalid_cursor(client):
+    """Тест keyset-пагинации с поврежденным курсором."""
+    url = reverse("product-list")
+    response = client.get(url, {"cursor": "not-a-cursor"})
+
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", ["product-list", "category-list"])
+@pytest.mark.parametrize("position", [["x", "abc"], [None, None]])
+def test_keyset_cursor_invalid_values(client, view_name, position):
+    """Тест курсора с нечисловым id и пустыми значениями позиции."""
+    payload = json.dumps({"p": position, "r": 0}).encode()
+    cursor = base64.urlsafe_b64encode(payload).decode()
+
+    response = client.get(reverse(view_name), {"cursor": cursor})
+
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_get_products_cached(client, product_factory, django_assert_num_queries):
+    """Тест кэша ответов каталога: повторный запрос не обращается к БД."""
+    product_factory(_quantity=3)
+    url = reverse("product-list")
+
+    response = client.get(url)
+    etag = response["ETag"]
+    with django_assert_num_queries(0):
+        cached = client.get(url)
+        not_modified = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert cached.data == response.data
+    assert cached["ETag"] == etag
+    assert not_modified.status_code == 304
+
+
+@pytest.mark.django_db
+def test_get_products_cache_invalidated(
+    client, product_factory, django_capture_on_commit_callbacks
+):
+    """Тест сброса кэша ответов каталога после фиксации изменения продукта."""
+    product = product_factory(name="Старое название")
+    url = reverse("product-list")
+    etag = client.get(url)["ETag"]
+
+    version = get_catalog_version()
+    with django_capture_on_commit_callbacks(execute=True):
+        product.name = "Новое название"
+        product.save()
+        # До фиксации транзакции версия каталога не меняется
+        assert get_catalog_version() == version
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert response.data["results"][0]["name"] == "Новое название"
+
+
+@pytest.mark.django_db
+def test_get_products(client, product_factory):
+    """Тест для получения списка продуктов с краткими данными подкатегории."""
+    product = product_factory(price="99.90")
+    subcategory = product.subcategory
+    category = subcategory.category
+
+    url = reverse("product-list")
+    response = client.get(url)
+
+    assert response.status_code == 200
+    item = response.data["results"][0]
+    assert item["price"] == "99.90"
+    assert item["subcategory"] == {
+        "id": subcategory.id,
+        "name": subcategory.name,
+        "slug": subcategory.slug,
+        "category": {"id": category.id, "name": category.name, "slug": category.slug},
+    }
+
+
+@pytest.mark.django_db
+def test_get_products_filtered(client, product_factory):
+    """Тест фильтрации продуктов по подкатегории, цене и названию."""
+    cheap = product_factory(name="Apple", price=10)
+    product_factory(name="Apple juice", price=100)
+    product_factory(name="Pear", price=50)
+
+    url = reverse("product-list")
+    response = client.get(url, {"name": "app", "max_price": 50})
+    assert [item["id"] for item in response.data["results"]] == [cheap.id]
+
+    response = client.get(url, {"subcategory": cheap.subcategory_id})
+    assert [item["id"] for item in response.data["results"]] == [cheap.id]
+
+    response = client.get(url, {"min_price": 20, "ordering": "price"})
+    assert [item["name"] for item in response.data["results"]] == [
+        "Pear",
+        "Apple juice",
+    ]
+
+
+@pytest.mark.django_db
+def test_get_products_invalid_filter(client):
+    """Тест фильтрации продуктов с некорректным значением параметра."""
+    url = reverse("product-list")
+    response = client.get(url, {"min_price": "дешево"})
+
+    assert response.status_code == 400
+    assert "min_price" in response.data
+
+    for value in ("NaN", "Infinity", "sNaN"):
+        response = client.get(url, {"max_price": value})
+        assert response.status_code == 400
+        assert "max_price" in response.data
+
+
+@pytest.mark.django_db
+def test_cart_totals_maintained(
+    authenticated_client, product_factory, django_assert_num_queries
+):
+    """Тест: итоги корзины изменяются вместе с товарами и читаются одним запросом."""
+    client, user = authenticated_client
+    first, second = product_factory(price=10), product_factory(price=25)
+
+    url = reverse("cart-detail")
+    client.post(url, {"product_id": first.id, "quantity": 3}, format="json")
+    client.post(url, {"product_id": second.id, "quantity": 2}, format="json")
+    client.post(url, {"product_id": first.id, "quantity": 1}, format="json")
+
+    with django_assert_num_queries(1):
+        totals = (
+            Cart.objects.filter(user=user).values("total_quantity", "total_price").get()
+        )
+    assert totals == {"total_quantity": 3, "total_price": 60}
+
+    second.price = 30
+    second.save()
+    assert client.get(url).data["total_price"] == 70
+
+    client.post(url, {"product_id": second.id, "quantity": 0}, format="json")
+    assert Cart.objects.get(user=user).get_totals() == (1, 10)
+
+    client.delete(url)
+    assert Cart.objects.get(user=user).get_totals() == (0, 0)
+
+
+@pytest.mark.django_db
+def test_audit_cart_totals(cart_factory):
+    """Тест команды проверки итогов корзин: расхождение находится и исправляется."""
+    cart = cart_factory()
+    Cart.objects.filter(pk=cart.pk).update(total_quantity=10)
+
+    out = StringIO()
+    call_command("audit_cart_totals", stdout=out)
+    assert "Корзин с расхождениями: 1" in out.getvalue()
+
+    call_command("audit_cart_totals", "--fix", stdout=StringIO())
+    cart.refresh_from_db()
+    assert cart.total_quantity == 2
+
+    out = StringIO()
+    call_command("audit_cart_totals", stdout=out)
+    assert "Корзин с расхождениями: 0" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_get_cart_summary(
+    authenticated_client, product_factory, django_assert_num_queries
+):
+    """Тест итогов корзины: один запрос к БД и 304 при неизменной версии."""
+    client, user = authenticated_client
+    product = product_factory(price=10)
+    url = reverse("cart-summary")
+
+    response = client.get(url)
+    assert response.data == {"total_quantity": 0, "total_price": 0, "version": 0}
+
+    client.post(
+        reverse("cart-detail"), {"product_id": product.id, "quantity": 3}, format="json"
+    )
+    with django_assert_num_queries(1):
+        response = client.get(url)
+    assert response.data == {"total_quantity": 3, "total_price": 30, "version": 1}
+    etag = response["ETag"]
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+    client.post(
+        reverse("cart-detail"), {"product_id": product.id, "quantity": 1}, format="json"
+    )
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.data["total_quantity"] == 1
+    assert response["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_get_categories_from_tree(
+    client,
+    subcategory_factory,
+    django_assert_num_queries,
+    django_capture_on_commit_callbacks,
+):
+    """Тест списка категорий из дерева в памяти: без запросов к БД после загрузки."""
+    subcategories = [subcategory_factory() for _ in range(4)]
+    url = reverse("category-list")
+    # Keyset-пагинация не использует дерево и читает категории из БД
+    expected = client.get(url, {"pagination": "keyset"}).json()["results"]
+
+    client.get(url)
+    with django_assert_num_queries(0):
+        response = client.get(url)
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/json"
+    assert response.json()["count"] == 4
+    assert response.json()["results"] == expected
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 304
+
+    subcategory = subcategories[0]
+    subcategory.name = "Renamed"
+    with django_capture_on_commit_callbacks(execute=True):
+        subcategory.save()
+    response = client.get(url, {"page_size": 4}, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 200
+    names = [item["subcategories"][0]["name"] for item in response.json()["results"]]
+    assert "Renamed" in names
@@ -0,0 +1,82 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.shop.async_views import (
+    AsyncCartView,
+    AsyncCategoryListView,
+    AsyncProductListView,
+)
+from apps.shop.models import CartItem
+
+
+@pytest.fixture
+def call_async_view():
+    """Вызывает async-представление так же, как это делает ASGI-обработчик."""
+    factory = APIRequestFactory()
+
+    def call(view_class, method, url, data=None, user=None):
+        request = getattr(factory, method)(url, data, format="json")
+        if user is not None:
+            force_authenticate(request, user=user)
+        response = async_to_sync(view_class.as_view())(request)
+        return response.render()
+
+    return call
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "view_class, url_name, query",
+    [
+        (AsyncCategoryListView, "category-list", ""),
+        (AsyncProductListView, "product-list", "?ordering=-price"),
+        (AsyncProductListView, "product-list", "?pagination=keyset"),
+    ],
+)
+def test_async_list_matches_sync(
+    client, product_factory, call_async_view, view_class, url_name, query
+):
+    """Тест: async-представления каталога отдают те же данные, что и синхронные."""
+    product_factory(_quantity=3)
+    url = reverse(url_name) + query
+
+    expected = client.get(url)
+    response = call_async_view(view_class, "get", url)
+
+    assert response.status_code == 200
+    assert response.data == expected.data
+
+
+@pytest.mark.django_db
+def test_async_cart(authenticated_client, product_factory, call_async_view):
+    """Тест: добавление, просмотр и очистка корзины через async-представление."""
+    client, user = authenticated_client
+    product = product_factory()
+    url = reverse("cart-detail")
+
+    response = call_async_view(AsyncCartView, "get", url, user=user)
+    assert response.status_code == 200
+    assert response.data["items"] == []
+
+    data = {"product_id": product.id, "quantity": 3}
+    response = call_async_view(AsyncCartView, "post", url, data, user=user)
+    assert response.status_code == 200
+    assert response.data == client.post(url, data, format="json").data
+
+    response = call_async_view(AsyncCartView, "get", url, user=user)
+    assert response.data == client.get(url).data
+    assert response.data["total_quantity"] == 3
+
+    response = call_async_view(AsyncCartView, "delete", url, user=user)
+    assert response.status_code == 200
+    assert not CartItem.objects.filter(cart__user=user).exists()
+
+
+@pytest.mark.django_db
+def test_async_cart_requires_authentication(call_async_view):
+    """Тест: async-корзина недоступна без авторизации."""
+    response = call_async_view(AsyncCartView, "get", reverse("cart-detail"))
+
+    assert response.status_code == 401
@@ -0,0 +1,434 @@
+"""
+Бенчмарки производительности API.
+
+Запускаются только при заданной переменной окружения BENCHMARK:
+    BENCHMARK=1 pytest apps/shop/tests/test_benchmarks.py -s
+"""
+
+import os
+import time
+import tracemalloc
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from apps.core.renderers import FastJSONRenderer
+from apps.shop.models import Category, Product, SubCategory
+from apps.shop.pagination import ProductKeysetPagination
+from apps.shop.search import product_index
+from apps.shop.serializers import ProductSerializer
+from apps.shop.slugs import slug_base, unique_slugs
+
+pytestmark = [
+    pytest.mark.skipif(
+        not os.environ.get("BENCHMARK"), reason="Бенчмарки запускаются с BENCHMARK=1"
+    ),
+    pytest.mark.django_db,
+]
+
+
+def seed_products(count, subcategories=10, name=lambda i: f"Продукт {i:07d}"):
+    """Быстро создает синтетический каталог через bulk_create"""
+    category = Category.objects.create(name="Категория", slug="category")
+    SubCategory.objects.bulk_create(
+        SubCategory(name=f"Подкатегория {i}", slug=f"sub-{i}", category=category)
+        for i in range(subcategories)
+    )
+    subcategory_ids = list(SubCategory.objects.values_list("id", flat=True))
+    Product.objects.bulk_create(
+        (
+            Product(
+                name=name(i),
+                slug=f"product-{i}",
+                subcategory_id=subcategory_ids[i % len(subcategory_ids)],
+                price=Decimal(i % 1000) + Decimal("0.99"),
+            )
+            for i in range(count)
+        ),
+        batch_size=5000,
+    )
+
+
+def measure(client, url, params=None, repeat=20, clear_cache=True):
+    """Возвращает медианное время ответа в миллисекундах без учета кэша ответов"""
+    timings = []
+    for _ in range(repeat):
+        if clear_cache:
+            cache.clear()
+        start = time.perf_counter()
+        response = client.get(url, params)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200
+    return sorted(timings)[len(timings) // 2]
+
+
+def test_benchmark_product_pagination_depth():
+    """Время ответа keyset-пагинации не растет с глубиной страницы"""
+    pages = 10_000
+    page_size = ProductKeysetPagination.page_size
+    seed_products(pages * page_size)
+
+    client = APIClient()
+    url = reverse("product-list")
+    # Курсор на последнюю страницу: позиция последней записи предпоследней страницы
+    last = Product.objects.order_by("name", "id")[page_size]
+    cursor = ProductKeysetPagination().encode_cursor([last.name, last.id])
+
+    results = {
+        "page_number_first": measure(client, url, {"page": 1}),
+        "page_number_last": measure(client, url, {"page": pages}),
+        "keyset_first": measure(client, url, {"pagination": "keyset"}),
+        "keyset_last": measure(client, url, {"cursor": cursor}),
+    }
+    for name, value in results.items():
+        print(f"{name}: {value:.2f} ms")
+
+    assert results["keyset_last"] < results["keyset_first"] * 3
+
+
+class NestedProductSerializer(ProductSerializer):
+    """Прежний сериализатор продукта с depth = 2 для сравнения"""
+
+    subcategory = None
+
+    class Meta(ProductSerializer.Meta):
+        depth = 2
+
+    to_representation = serializers.ModelSerializer.to_representation
+
+
+@pytest.mark.parametrize("page_size", [40, 1000])
+def test_benchmark_product_serializer(page_size):
+    """Стоимость сериализации одной строки списка продуктов"""
+    seed_products(page_size)
+    products = list(Product.objects.select_related("subcategory__category"))
+
+    for serializer_class in (NestedProductSerializer, ProductSerializer):
+        timings = []
+        for _ in range(10):
+            start = time.perf_counter()
+            serializer_class(products, many=True).data
+            timings.append(time.perf_counter() - start)
+        per_row = sorted(timings)[len(timings) // 2] / page_size * 1_000_000
+        print(
+            f"{serializer_class.__name__}, {page_size} строк: {per_row:.1f} мкс/строка"
+        )
+
+
+@pytest.mark.parametrize("page_size", [40, 1000])
+def test_benchmark_json_renderer(page_size):
+    """Время кодирования и размер JSON страницы продуктов"""
+    seed_products(page_size)
+    products = Product.objects.select_related("subcategory__category")
+    data = {
+        "count": page_size,
+        "next": None,
+        "previous": None,
+        "results": ProductSerializer(products, many=True).data,
+    }
+
+    results = {}
+    for renderer_class in (JSONRenderer, FastJSONRenderer):
+        renderer = renderer_class()
+        timings = []
+        for _ in range(20):
+            start = time.perf_counter()
+            content = renderer.render(data)
+            timings.append((time.perf_counter() - start) * 1000)
+        results[renderer_class.__name__] = sorted(timings)[len(timings) // 2]
+        print(
+            f"{renderer_class.__name__}, {page_size} строк: "
+            f"{results[renderer_class.__name__]:.3f} ms, {len(content)} байт"
+        )
+    assert results["FastJSONRenderer"] < results["JSONRenderer"]
+
+
+def test_benchmark_product_filters_use_indexes():
+    """Фильтры и сортировки списка продуктов выполняются по индексам"""
+    count = int(os.environ.get("BENCHMARK_PRODUCTS", 100_000))
+    seed_products(count, subcategories=100)
+    subcategory_id = SubCategory.objects.values_list("id", flat=True).first()
+
+    queries = {
+        "subcategory+price": Product.objects.filter(
+            subcategory_id=subcategory_id, price__lte=100
+        ).order_by("price"),
+        "price": Product.objects.filter(price__gte=900).order_by("price"),
+        "name prefix": Product.objects.filter(name__istartswith="Продукт 00012"),
+    }
+    client = APIClient()
+    url = reverse("product-list")
+    params = {
+        "subcategory+price": {"subcategory": subcategory_id, "max_price": 100},
+        "price": {"min_price": 900, "ordering": "price"},
+        "name prefix": {"name": "Продукт 00012"},
+    }
+    for name, queryset in queries.items():
+        plan = queryset.explain()
+        print(f"{name}: {measure(client, url, params[name]):.2f} ms, {plan}")
+        assert "INDEX" in plan.upper()
+
+
+SEARCH_NOUNS = [
+    "Смартфон",
+    "Ноутбук",
+    "Футболка",
+    "Чехол",
+    "Наушники",
+    "Планшет",
+    "Куртка",
+    "Кроссовки",
+    "Телевизор",
+    "Монитор",
+    "Клавиатура",
+    "Рюкзак",
+    "Часы",
+    "Колонка",
+]
+SEARCH_BRANDS = [
+    "Samsung",
+    "Apple",
+    "Xiaomi",
+    "Lenovo",
+    "Sony",
+    "Nike",
+    "Adidas",
+    "Asus",
+    "Huawei",
+    "Philips",
+    "Puma",
+    "Logitech",
+    "Canon",
+    "Bosch",
+    "Acer",
+    "Dell",
+]
+
+
+def test_benchmark_product_search():
+    """p99 времени поиска по инвертированному индексу"""
+    count = int(os.environ.get("BENCHMARK_PRODUCTS", 100_000))
+    seed_products(
+        count,
+        subcategories=100,
+        name=lambda i: (
+            f"{SEARCH_NOUNS[i % len(SEARCH_NOUNS)]} "
+            f"{SEARCH_BRANDS[i // len(SEARCH_NOUNS) % len(SEARCH_BRANDS)]} {i:07d}"
+        ),
+    )
+
+    start = time.perf_counter()
+    product_index.build()
+    print(f"Построение индекса: {time.perf_counter() - start:.1f} с")
+
+    queries = ["смартфоны samsung", "наушников", "чехол apple", "кроссовки nike"]
+    queries += [f"{noun} {brand}" for noun in SEARCH_NOUNS for brand in SEARCH_BRANDS]
+    timings = []
+    for query in queries * 5:
+        start = time.perf_counter()
+        product_index.search(query, limit=40)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p99 = timings[int(len(timings) * 0.99)]
+    print(
+        f"Поиск по {count} продуктам: p50 {timings[len(timings) // 2]:.2f} ms, p99 {p99:.2f} ms"
+    )
+
+    client = APIClient()
+    url = reverse("product-search")
+    print(
+        f"Эндпоинт поиска: {measure(client, url, {'q': 'смартфон samsung'}, clear_cache=False):.2f} ms"
+    )
+    assert p99 < 20
+
+
+def test_benchmark_connection_overhead(tmp_path):
+    """Накладные расходы на соединение с БД при CONN_MAX_AGE = 0 и постоянном"""
+    connection = connections["default"]
+    settings_dict = dict(connection.settings_dict)
+    if connection.vendor == "sqlite":
+        # Тестовая БД SQLite находится в памяти и не закрывается
+        settings_dict["NAME"] = str(tmp_path / "benchmark.sqlite3")
+
+    def request_cycle(conn_max_age, repeat=200):
+        """Имитирует запрос: один SQL-запрос и закрытие устаревшего соединения"""
+        wrapper = connection.__class__({**settings_dict, "CONN_MAX_AGE": conn_max_age})
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with wrapper.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            wrapper.close_if_unusable_or_obsolete()
+            timings.append((time.perf_counter() - start) * 1000)
+        wrapper.close()
+        return sorted(timings)[len(timings) // 2]
+
+    results = {
+        "conn_max_age_0": request_cycle(0),
+        "persistent": request_cycle(60),
+    }
+    for name, duration in results.items():
+        print(f"{name}: {duration:.3f} ms на запрос")
+    assert results["persistent"] < results["conn_max_age_0"]
+
+
+def test_benchmark_cart_summary():
+    """Опрос итогов корзины против полного ответа корзины"""
+    seed_products(50)
+    user = User.objects.create_user(username="benchmark")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    for product in Product.objects.all():
+        client.post(
+            reverse("cart-detail"),
+            {"product_id": product.id, "quantity": 2},
+            format="json",
+        )
+
+    summary_url = reverse("cart-summary")
+    etag = client.get(summary_url)["ETag"]
+    timings = []
+    for _ in range(200):
+        start = time.perf_counter()
+        response = client.get(summary_url, HTTP_IF_NONE_MATCH=etag)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 304
+
+    results = {
+        "cart": measure(client, reverse("cart-detail"), repeat=200),
+        "summary": measure(client, summary_url, repeat=200),
+        "summary_304": sorted(timings)[len(timings) // 2],
+    }
+    for name, duration in results.items():
+        print(f"{name}: {duration:.2f} ms")
+    assert results["summary"] < results["cart"]
+
+
+def test_benchmark_category_tree():
+    """Список категорий из дерева в памяти против чтения из БД"""
+    categories = Category.objects.bulk_create(
+        Category(name=f"Категория {i}", slug=f"category-{i}") for i in range(100)
+    )
+    SubCategory.objects.bulk_create(
+        SubCategory(
+            name=f"Подкатегория {i}",
+            slug=f"sub-{i}",
+            category=categories[i % len(categories)],
+        )
+        for i in range(5000)
+    )
+
+    client = APIClient()
+    url = reverse("category-list")
+    params = {"page_size": 50}
+    results = {
+        "database": measure(client, url, {**params, "pagination": "keyset"}),
+        "tree": measure(client, url, params, clear_cache=False),
+    }
+    for name, duration in results.items():
+        print(f"{name}: {duration:.2f} ms")
+    assert results["tree"] < results["database"]
+
+
+@pytest.mark.parametrize("export_format", ["ndjson", "csv"])
+def test_benchmark_product_export(export_format):
+    """Скорость потокового экспорта и пиковая память при его чтении"""
+    count = int(os.environ.get("BENCHMARK_PRODUCTS", 100_000))
+    seed_products(count)
+    user = User.objects.create_user(username="benchmark")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    url = reverse("product-export")
+    start = time.perf_counter()
+    response = client.get(url, {"format": export_format})
+    size = sum(len(chunk) for chunk in response.streaming_content)
+    elapsed = time.perf_counter() - start
+
+    # Память измеряется отдельным проходом: трассировка замедляет экспорт
+    tracemalloc.start()
+    response = client.get(url, {"format": export_format})
+    for chunk in response.streaming_content:
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print(
+        f"Экспорт {export_format}: {count} строк за {elapsed:.2f} с, "
+        f"{count / elapsed:.0f} строк/с, {size / 1024 / 1024:.1f} МБ, "
+        f"пик памяти {peak / 1024 / 1024:.1f} МБ"
+    )
+    assert peak < size
+
+
+def test_benchmark_slug_generation():
+    """Слаги для 100 тыс. кириллических названий: пакетом против запроса на строку"""
+    count = 100_000
+    seed_products(0, subcategories=1)
+    subcategory = SubCategory.objects.get()
+    # Половина слагов уже занята в БД, а названия попарно дают один слаг
+    Product.objects.bulk_create(
+        (
+            Product(
+                name=f"Старый товар {i}",
+                slug=f"tovar-nomer-{i}",
+                subcategory=subcategory,
+                price=Decimal("1.00"),
+            )
+            for i in range(count // 2)
+        ),
+        batch_size=5000,
+    )
+    names = [f"Товар номер {i // 2}" + ("!" if i % 2 else "") for i in range(count)]
+
+    start = time.perf_counter()
+    unique_slugs(Product, [f"Новинка {i}" for i in range(count)])
+    fresh = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with CaptureQueriesContext(connection) as queries:
+        slugs = unique_slugs(Product, names)
+    batch = time.perf_counter() - start
+    assert len(set(slugs)) == count
+
+    # Прежний способ: слаг и проверка занятости отдельным запросом на строку
+    sample = names[:2000]
+    start = time.perf_counter()
+    for name in sample:
+        base, number = slug_base(name, 200, "product"), 1
+        slug = base
+        while Product.objects.filter(slug=slug).exists():
+            number += 1
+            slug = f"{base}-{number}"
+    per_row = (time.perf_counter() - start) / len(sample) * count
+
+    print(
+        f"без совпадений: {fresh:.2f} с; "
+        f"пакетом: {batch:.2f} с, запросов: {len(queries)}; "
+        f"по строке: {per_row:.2f} с (оценка по {len(sample)} строкам)"
+    )
+    assert batch < per_row
+
+
+def test_benchmark_metrics_overhead(settings):
+    """Накладные расходы учета метрик запросов на ответ списка продуктов"""
+    seed_products(1000)
+    client = APIClient()
+    url = reverse("product-list")
+    params = {"page_size": 40}
+
+    results = {}
+    for enabled in (False, True, False, True):
+        settings.METRICS_ENABLED = enabled
+        results[enabled] = measure(client, url, params, repeat=200)
+    for enabled, duration in results.items():
+        print(f"metrics {'on' if enabled else 'off'}: {duration:.3f} ms")
+    assert results[True] < results[False] * 1.2
@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.shop.models import Cart, CartItem
+
+THREADS = 8
+REQUESTS_PER_THREAD = 25
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cart_concurrent_updates(user_factory, product_factory):
+    """
+    Тест: параллельные изменения одной корзины из нескольких потоков не
+    создают повторяющихся элементов, а итоги совпадают с элементами.
+    """
+    user = user_factory()
+    products = [product_factory(price=10 * (i + 1)) for i in range(3)]
+    Cart.objects.create(user=user)
+    url = reverse("cart-detail")
+    barrier = threading.Barrier(THREADS)
+    errors, query_counts = [], []
+
+    def worker(index):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        barrier.wait()
+        try:
+            for step in range(REQUESTS_PER_THREAD):
+                data = {
+                    "product_id": products[(index + step) % len(products)].id,
+                    "quantity": (index + step) % 4,
+                }
+                with CaptureQueriesContext(connection) as context:
+                    response = client.post(url, data, format="json")
+                if response.status_code != 200:
+                    errors.append(response.data)
+                query_counts.append(
+                    sum(
+                        1
+                        for query in context.captured_queries
+                        if not query["sql"].startswith(("BEGIN", "COMMIT"))
+                    )
+                )
+        except Exception as error:
+            errors.append(repr(error))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    # Продукт, корзина, блокировка корзины, upsert или удаление, пересчет итогов
+    assert max(query_counts) == 5
+
+    cart = Cart.objects.with_calculated_totals().get(user=user)
+    items = CartItem.objects.filter(cart=cart)
+    assert items.count() == len(set(items.values_list("product_id", flat=True)))
+    assert cart.total_quantity == cart.calculated_quantity
+    assert cart.total_price == cart.calculated_price
+    assert cart.version == THREADS * REQUESTS_PER_THREAD
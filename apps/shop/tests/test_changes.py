@@ -0,0 +1,124 @@
+import pytest
+from django.urls import reverse
+
+from apps.shop.models import Tombstone
+
+
+@pytest.fixture(autouse=True)
+def no_changes_delay(settings):
+    """Изменения отдаются сразу, без ожидания завершения транзакций."""
+    settings.SHOP_CHANGES_DELAY = 0
+
+
+def sync(client, since=None, page_size=None):
+    """Обходит ленту изменений до конца и возвращает ответы и курсор."""
+    url = reverse("catalog-changes")
+    responses = []
+    while True:
+        params = {}
+        if since:
+            params["since"] = since
+        if page_size:
+            params["page_size"] = page_size
+        response = client.get(url, params)
+        assert response.status_code == 200
+        responses.append(response.data)
+        since = response.data["cursor"]
+        if not response.data["has_more"]:
+            return responses, since
+
+
+@pytest.mark.django_db
+def test_get_changes_full_sync(client, product_factory):
+    """Тест первой синхронизации: весь каталог постранично без повторов."""
+    products = [product_factory() for _ in range(5)]
+
+    responses, _ = sync(client, page_size=2)
+
+    assert len(responses) > 1
+    product_ids = [item["id"] for data in responses for item in data["products"]]
+    category_ids = [item["id"] for data in responses for item in data["categories"]]
+    assert sorted(product_ids) == sorted(product.id for product in products)
+    assert len(category_ids) == len(set(category_ids)) == 5
+    product = next(data["products"][0] for data in responses if data["products"])
+    assert set(product) == {
+        "id",
+        "name",
+        "slug",
+        "price",
+        "subcategory",
+        "images",
+        "updated_at",
+    }
+
+
+@pytest.mark.django_db
+def test_get_changes_incremental(client, product_factory):
+    """Тест повторной синхронизации: только изменения и удаления."""
+    product, deleted, unchanged = product_factory(_quantity=3)
+    _, cursor = sync(client)
+
+    product.price = 100
+    product.save()
+    deleted_id = deleted.id
+    deleted.delete()
+    responses, _ = sync(client, since=cursor)
+
+    assert len(responses) == 1
+    data = responses[0]
+    assert [item["id"] for item in data["products"]] == [product.id]
+    assert data["categories"] == []
+    assert data["deleted"]["products"] == [deleted_id]
+    assert Tombstone.objects.filter(
+        kind=Tombstone.Kind.PRODUCT, object_id=deleted_id
+    ).exists()
+
+
+@pytest.mark.django_db
+def test_get_changes_cascade_delete(client, product_factory):
+    """Тест удаления категории: удаления каскадных объектов тоже в ленте."""
+    product = product_factory()
+    subcategory = product.subcategory
+    expected = {
+        "categories": [subcategory.category.id],
+        "subcategories": [subcategory.id],
+        "products": [product.id],
+    }
+    _, cursor = sync(client)
+
+    subcategory.category.delete()
+    responses, _ = sync(client, since=cursor)
+
+    assert responses[0]["deleted"] == expected
+
+
+@pytest.mark.django_db
+def test_get_changes_since_date(client, product_factory):
+    """Тест синхронизации от даты в ISO 8601."""
+    old, new = product_factory(_quantity=2)
+    responses, _ = sync(client, since=new.updated_at.isoformat())
+
+    product_ids = [item["id"] for data in responses for item in data["products"]]
+    assert product_ids == [new.id]
+
+
+@pytest.mark.django_db
+def test_get_changes_invalid_since(client):
+    """Тест ошибки при неверном курсоре."""
+    response = client.get(reverse("catalog-changes"), {"since": "not-a-cursor"})
+
+    assert response.status_code == 400
+    assert "error" in response.data
+
+
+@pytest.mark.django_db
+def test_get_changes_delay(client, product_factory, settings):
+    """Тест задержки: свежие изменения не отдаются и не пропускаются."""
+    settings.SHOP_CHANGES_DELAY = 60
+    product_factory()
+    responses, cursor = sync(client)
+    assert responses[0]["products"] == []
+
+    settings.SHOP_CHANGES_DELAY = 0
+    responses, _ = sync(client, since=cursor)
+    assert len(responses[0]["products"]) == 1
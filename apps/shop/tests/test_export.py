@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.shop.models import Product
+
+
+def read_stream(response):
+    return b"".join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+def test_export_products_ndjson(authenticated_client, product_factory):
+    """Тест потокового экспорта продуктов в NDJSON."""
+    client, user = authenticated_client
+    products = product_factory(_quantity=3)
+
+    response = client.get(reverse("product-export"))
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in read_stream(response).splitlines()]
+    assert [row["id"] for row in rows] == sorted(product.id for product in products)
+    assert (
+        rows[0]["subcategory"]["category"]["id"] == products[0].subcategory.category_id
+    )
+    assert "updated_at" in rows[0]
+
+
+@pytest.mark.django_db
+def test_export_products_csv_updated_since(authenticated_client, product_factory):
+    """Тест экспорта в CSV только продуктов, измененных после указанного времени."""
+    client, user = authenticated_client
+    old, new = product_factory(), product_factory()
+    since = timezone.now() - timedelta(hours=1)
+    Product.objects.filter(id=old.id).update(updated_at=since - timedelta(days=1))
+
+    response = client.get(
+        reverse("product-export"),
+        {"format": "csv", "updated_since": since.isoformat()},
+    )
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(read_stream(response))))
+    assert [int(row["id"]) for row in rows] == [new.id]
+    assert rows[0]["name"] == new.name
+
+
+@pytest.mark.django_db
+def test_export_products_errors(authenticated_client):
+    """Тест экспорта без авторизации и с некорректным updated_since."""
+    url = reverse("product-export")
+    assert APIClient().get(url).status_code == 401
+
+    client, user = authenticated_client
+    response = client.get(url, {"updated_since": "вчера"})
+    assert response.status_code == 400
+    assert "error" in json.loads(response.content)
+
+
+@pytest.mark.django_db
+def test_load_fixture():
+    """Тест загрузки фикстуры каталога из README с отметками времени."""
+    call_command("loaddata", "shop_data.json", verbosity=0)
+
+    assert Product.objects.count() == 5
+    assert not Product.objects.filter(updated_at__isnull=True).exists()
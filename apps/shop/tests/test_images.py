@@ -0,0 +1,74 @@
+import hashlib
+import io
+from unittest import mock
+
+import pytest
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from PIL import Image
+
+from apps.shop.images import RENDITION_FIELDS
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.SHOP_RENDITION_WORKERS = 0
+    return tmp_path
+
+
+@pytest.fixture
+def image_file():
+    buffer = io.BytesIO()
+    Image.new("RGB", (800, 600), "red").save(buffer, format="JPEG")
+    return SimpleUploadedFile("product.jpg", buffer.getvalue(), "image/jpeg")
+
+
+@pytest.mark.django_db
+def test_renditions_generated_on_save(media_root, product_factory, image_file):
+    """Тест создания уменьшенных копий изображения при сохранении продукта."""
+    product = product_factory(image=image_file)
+
+    for field in RENDITION_FIELDS:
+        assert (media_root / getattr(product, field).name).exists()
+
+
+@pytest.mark.django_db
+def test_image_names_contain_content_hash(media_root, product_factory, image_file):
+    """Тест имен файлов: хеш содержимого в имени изображения и его копий."""
+    product = product_factory(image=image_file)
+    digest = hashlib.sha256(image_file.open().read()).hexdigest()[:16]
+
+    assert product.image.name == f"images/products/product.{digest}.jpg"
+    for field in RENDITION_FIELDS:
+        assert f"product.{digest}" in getattr(product, field).url
+
+
+@pytest.mark.django_db
+def test_get_products_without_storage_access(
+    client, media_root, product_factory, image_file
+):
+    """Тест списка продуктов: URL изображений строятся без обращений к хранилищу."""
+    product_factory(image=image_file)
+
+    url = reverse("product-list")
+    with mock.patch.object(FileSystemStorage, "exists") as exists:
+        response = client.get(url)
+
+    assert response.status_code == 200
+    assert response.data["results"][0]["images"]["small"].endswith(".jpg")
+    exists.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_generate_renditions_command(media_root, product_factory, image_file):
+    """Тест команды пакетного создания отсутствующих копий изображений."""
+    product = product_factory(image=image_file)
+    small = media_root / product.image_small.name
+    small.unlink()
+
+    call_command("generate_renditions", processes=0)
+
+    assert small.exists()
@@ -0,0 +1,141 @@
+import csv
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from model_bakery import baker
+from PIL import Image
+
+from apps.shop.cache import get_catalog_version
+from apps.shop.images import RENDITION_FIELDS
+from apps.shop.models import Cart, CartItem, Category, Product, SubCategory
+
+COLUMNS = ["name", "price", "subcategory", "category", "image"]
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(COLUMNS)
+        writer.writerows(rows)
+    return path
+
+
+def import_catalog(path, **options):
+    out, err = StringIO(), StringIO()
+    call_command(
+        "import_catalog", str(path), processes=0, stdout=out, stderr=err, **options
+    )
+    return out.getvalue(), err.getvalue()
+
+
+@pytest.mark.django_db
+def test_import_catalog_csv(tmp_path):
+    """Тест импорта: категории, подкатегории и продукты создаются пакетами."""
+    path = write_csv(
+        tmp_path / "catalog.csv",
+        [
+            ["iPhone", "999.90", "Smartphones", "Electronics", ""],
+            ["Pixel", "699", "Smartphones", "Electronics", ""],
+            ["T-shirt", "10", "T-shirts", "Clothes", ""],
+            ["Broken", "not-a-price", "T-shirts", "Clothes", ""],
+        ],
+    )
+    version = get_catalog_version()
+
+    out, err = import_catalog(path, chunk_size=2)
+
+    assert Category.objects.count() == 2
+    assert SubCategory.objects.get(name="T-shirts").category.name == "Clothes"
+    product = Product.objects.get(name="iPhone")
+    assert str(product.price) == "999.90"
+    assert product.slug == "iphone"
+    assert Product.objects.count() == 3
+    assert "создано продуктов: 3" in out
+    assert "строк/с" in out
+    assert "Строка 4" in err
+    assert get_catalog_version() != version
+    assert not (tmp_path / "catalog.csv.import-state").exists()
+
+
+@pytest.mark.django_db
+def test_import_catalog_upsert(tmp_path, authenticated_client):
+    """Тест повторного импорта: меняются только измененные продукты."""
+    client, user = authenticated_client
+    path = write_csv(
+        tmp_path / "catalog.csv",
+        [["Phone", "100", "Phones", "Electronics", ""]],
+    )
+    import_catalog(path)
+    product = Product.objects.get(name="Phone")
+    cart = baker.make(Cart, user=user)
+    baker.make(CartItem, cart=cart, product=product, quantity=2)
+    Cart.objects.filter(pk=cart.pk).recalculate_totals()
+
+    write_csv(path, [["Phone", "150", "Phones", "Electronics", ""]])
+    out, _ = import_catalog(path)
+    assert "обновлено: 1" in out
+    out, _ = import_catalog(path)
+    assert "без изменений: 1" in out
+
+    updated = Product.objects.get(name="Phone")
+    assert updated.id == product.id
+    assert updated.slug == product.slug
+    assert updated.updated_at > product.updated_at
+    cart.refresh_from_db()
+    assert cart.total_price == 300
+
+
+@pytest.mark.django_db
+def test_import_catalog_ndjson_export_format(tmp_path):
+    """Тест импорта файла в формате NDJSON-экспорта с вложенными полями."""
+    row = {
+        "name": "Laptop",
+        "price": "1500.00",
+        "subcategory": {"name": "Laptops", "category": {"name": "Electronics"}},
+        "images": {"original": None},
+    }
+    path = tmp_path / "catalog.ndjson"
+    path.write_text(json.dumps(row) + "\n\n")
+
+    import_catalog(path)
+
+    product = Product.objects.select_related("subcategory__category").get()
+    assert product.subcategory.category.name == "Electronics"
+
+
+@pytest.mark.django_db
+def test_import_catalog_resume(tmp_path):
+    """Тест продолжения импорта с первого незаписанного пакета."""
+    path = write_csv(
+        tmp_path / "catalog.csv",
+        [
+            ["First", "1", "Sub", "Cat", ""],
+            ["Second", "2", "Sub", "Cat", ""],
+        ],
+    )
+    (tmp_path / "catalog.csv.import-state").write_text(json.dumps({"rows": 1}))
+
+    out, _ = import_catalog(path, resume=True, chunk_size=1)
+
+    assert "после строки 1" in out
+    assert list(Product.objects.values_list("name", flat=True)) == ["Second"]
+
+
+@pytest.mark.django_db
+def test_import_catalog_images(tmp_path, settings):
+    """Тест загрузки изображений и создания их уменьшенных копий."""
+    settings.MEDIA_ROOT = tmp_path / "media"
+    Image.new("RGB", (800, 600), "red").save(tmp_path / "phone.jpg")
+    path = write_csv(
+        tmp_path / "catalog.csv",
+        [["Phone", "100", "Phones", "Electronics", "phone.jpg"]],
+    )
+
+    import_catalog(path)
+
+    product = Product.objects.get()
+    assert product.image.name.startswith("images/products/phone")
+    for field in RENDITION_FIELDS:
+        assert (settings.MEDIA_ROOT / getattr(product, field).name).exists()
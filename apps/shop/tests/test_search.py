@@ -0,0 +1,106 @@
+from unittest import mock
+
+import pytest
+from django.urls import reverse
+from model_bakery import baker
+
+from apps.shop.cache import bump_catalog_version, get_catalog_version
+from apps.shop.models import Category, Product, SubCategory
+from apps.shop.search import product_index, tokenize
+
+
+@pytest.fixture
+def catalog():
+    category = baker.make(Category, name="Электроника", slug="elektronika")
+    phones = baker.make(
+        SubCategory, name="Смартфоны", slug="smartfony", category=category
+    )
+    laptops = baker.make(
+        SubCategory, name="Ноутбуки", slug="noutbuki", category=category
+    )
+    return {
+        "samsung": baker.make(
+            Product, name="Samsung Galaxy", slug="samsung", subcategory=phones
+        ),
+        "phone_case": baker.make(
+            Product, name="Чехол для смартфона", slug="chekhol", subcategory=phones
+        ),
+        "macbook": baker.make(
+            Product, name="MacBook", slug="macbook", subcategory=laptops
+        ),
+    }
+
+
+def test_tokenize_russian_morphology():
+    """Тест приведения словоформ к общей основе."""
+    assert tokenize("Смартфоны") == tokenize("смартфона")
+    assert tokenize("Ёлка") == tokenize("елки")
+
+
+@pytest.mark.django_db
+def test_search_products(client, catalog):
+    """Тест поиска продуктов с учетом морфологии и релевантности полей."""
+    url = reverse("product-search")
+    response = client.get(url, {"q": "смартфон"})
+
+    assert response.status_code == 200
+    # Совпадение в названии продукта важнее совпадения в подкатегории
+    assert [item["id"] for item in response.data["results"]] == [
+        catalog["phone_case"].id,
+        catalog["samsung"].id,
+    ]
+
+    response = client.get(url, {"q": "электроника samsung"})
+    assert [item["id"] for item in response.data["results"]] == [catalog["samsung"].id]
+
+
+@pytest.mark.django_db
+def test_search_index_updated_on_save(
+    client, catalog, django_capture_on_commit_callbacks
+):
+    """Тест инкрементального обновления поискового индекса при изменении продукта."""
+    url = reverse("product-search")
+    assert client.get(url, {"q": "ноутбук"}).data["count"] == 1
+
+    macbook = catalog["macbook"]
+    macbook.name = "MacBook Pro"
+    with django_capture_on_commit_callbacks(execute=True):
+        macbook.save()
+    # Индекс обновлен сигналом и не требует полного перестроения
+    assert product_index.version == get_catalog_version()
+    response = client.get(url, {"q": "pro"})
+
+    assert [item["id"] for item in response.data["results"]] == [macbook.id]
+
+
+@pytest.mark.django_db
+def test_search_index_rebuilt_in_background(client, catalog):
+    """Тест: устаревший индекс перестраивается в фоне, поиск не ждет перестроения."""
+    url = reverse("product-search")
+    assert client.get(url, {"q": "macbook"}).data["count"] == 1
+
+    # Изменение каталога в другом процессе
+    Product.objects.filter(id=catalog["macbook"].id).update(name="Ultrabook")
+    bump_catalog_version()
+
+    with mock.patch("apps.shop.search.threading.Thread") as thread:
+        assert client.get(url, {"q": "macbook"}).data["count"] == 1
+    thread.assert_called_once_with(
+        target=product_index.rebuild, name="search-index-rebuild", daemon=True
+    )
+
+    # Поток закрывает свое соединение с БД, соединение теста не закрывается
+    with mock.patch("apps.shop.search.connection"):
+        product_index.rebuild()
+    assert not product_index._build_lock.locked()
+    assert product_index.version == get_catalog_version()
+    assert client.get(url, {"q": "macbook"}).data["count"] == 0
+
+
+@pytest.mark.django_db
+def test_search_products_without_query(client):
+    """Тест поиска продуктов без поискового запроса."""
+    url = reverse("product-search")
+    response = client.get(url)
+
+    assert response.status_code == 400
@@ -0,0 +1,80 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from apps.shop.management.commands.benchmark_api import compare_results
+from apps.shop.models import Cart, Category, Product, SubCategory
+
+
+@pytest.fixture
+def seeded_catalog(db):
+    call_command(
+        "seed_catalog",
+        categories=3,
+        subcategories=10,
+        products=100,
+        carts=20,
+        batch_size=30,
+        stdout=StringIO(),
+    )
+
+
+def test_seed_catalog(seeded_catalog):
+    """Тест синтетического каталога: количество строк и итоги корзин."""
+    assert Category.objects.count() == 3
+    assert SubCategory.objects.count() == 10
+    assert Product.objects.count() == 100
+
+    carts = Cart.objects.with_calculated_totals()
+    assert carts.count() == 20
+    for cart in carts:
+        assert cart.total_quantity == cart.calculated_quantity == 3
+        assert cart.total_price == cart.calculated_price
+
+    with pytest.raises(CommandError):
+        call_command("seed_catalog", products=1)
+
+
+def test_benchmark_api_baseline(seeded_catalog, tmp_path):
+    """Тест сохранения результатов бенчмарка и сравнения с ними."""
+    output = tmp_path / "baseline.json"
+    options = {
+        "iterations": 2,
+        "warmup": 0,
+        "page_sizes": "5",
+        "scenarios": ["products/size-5/", "cart/get"],
+        "stdout": StringIO(),
+    }
+    cache.set("users:revoked:1", 1)
+    call_command("benchmark_api", output=str(output), **options)
+
+    # Сбрасываются только ответы каталога, остальной кэш сохраняется
+    assert cache.get("users:revoked:1") == 1
+    results = json.loads(output.read_text())["results"]
+    assert "products/size-5/keyset-last" in results
+    assert results["cart/get"]["queries"] > 0
+
+    # Количество запросов к БД выросло
+    results["cart/get"]["queries"] -= 1
+    output.write_text(json.dumps({"results": results}))
+    with pytest.raises(CommandError, match="cart/get"):
+        call_command("benchmark_api", compare=str(output), threshold=100, **options)
+
+
+def test_compare_results():
+    """Тест порога регрессии задержки."""
+    baseline = {"list": {"median_ms": 10.0, "queries": 2}}
+
+    lines, regressions = compare_results(
+        baseline, {"list": {"median_ms": 11.0, "queries": 2}}, 0.2
+    )
+    assert regressions == []
+
+    lines, regressions = compare_results(
+        baseline, {"list": {"median_ms": 13.0, "queries": 2}}, 0.2
+    )
+    assert regressions == ["list: медиана +30%"]
@@ -0,0 +1,69 @@
+import pytest
+from model_bakery import baker
+
+from apps.shop.models import Category, Product
+from apps.shop.slugs import slug_base, transliterate, unique_slugs
+
+
+@pytest.mark.parametrize(
+    "name, slug",
+    [
+        ("Электроника", "elektronika"),
+        ("Одежда", "odezhda"),
+        ("Смартфоны", "smartfony"),
+        ("Футболки", "futbolki"),
+        ("Джинсы", "dzhinsy"),
+        ("Щётка «Хвойная» №5", "shchetka-khvoynaya-no5"),
+        ("iPhone 15 Pro", "iphone-15-pro"),
+    ],
+)
+def test_slug_base_transliteration(name, slug):
+    """Тест транслитерации названий в слаги."""
+    assert slug_base(name, 120, "category") == slug
+
+
+def test_slug_base_limits():
+    """Тест слага без букв и слишком длинного слага."""
+    assert slug_base("!!!", 120, "category") == "category"
+    assert len(slug_base("Щ" * 90, 120, "category")) <= 120 - 8
+    assert transliterate("ЁЖ") == "ezh"
+
+
+@pytest.mark.django_db
+def test_unique_slugs_numbering(django_assert_num_queries):
+    """Тест нумерации совпадающих слагов по занятым слагам из БД."""
+    baker.make(Category, name="Электроника", slug="elektronika")
+    baker.make(Category, name="Электроника 2", slug="elektronika-2")
+
+    with django_assert_num_queries(2):
+        slugs = unique_slugs(Category, ["электроника!", "ЭЛЕКТРОНИКА?", "Одежда"])
+
+    assert slugs == ["elektronika-3", "elektronika-4", "odezhda"]
+
+
+@pytest.mark.django_db
+def test_unique_slugs_without_collisions(django_assert_num_queries):
+    """Тест генерации слагов пакета одним запросом без совпадений в БД."""
+    names = [f"Товар {i}" for i in range(1000)]
+
+    with django_assert_num_queries(1):
+        slugs = unique_slugs(Product, names)
+
+    assert len(set(slugs)) == 1000
+    assert slugs[0] == "tovar-0"
+
+
+@pytest.mark.django_db
+def test_save_generates_unique_slug(subcategory_factory):
+    """Тест слага при сохранении: транслитерация и номер при совпадении."""
+    first = Category.objects.create(name="Электроника")
+    second = Category.objects.create(name="Электроника!")
+    product = baker.make(Product, name="Футболка", subcategory=subcategory_factory())
+
+    assert first.slug == "elektronika"
+    assert second.slug == "elektronika-2"
+    assert product.slug == "futbolka"
+
+    first.slug = ""
+    first.save()
+    assert first.slug == "elektronika"
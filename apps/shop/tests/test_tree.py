@@ -0,0 +1,37 @@
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from model_bakery import baker
+
+from apps.shop.cache import CATEGORY_TREE_VERSION_KEY, get_catalog_version
+from apps.shop.models import Category
+from apps.shop.tree import category_tree
+
+
+class CategoryTreeInvalidationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        category_tree.clear()
+        self.addCleanup(category_tree.clear)
+        self.addCleanup(cache.clear)
+        self.request = RequestFactory().get("/api/shop/categories/")
+
+    def test_tree_reset_after_commit(self):
+        """Тест: дерево категорий сбрасывается только после фиксации транзакции."""
+        category = baker.make(Category, name="Старое название", slug="old")
+        category_tree.load()
+        version = get_catalog_version(CATEGORY_TREE_VERSION_KEY)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            category.name = "Новое название"
+            category.save()
+            # До фиксации запрос видит прежнее дерево той же версии
+            tree_version, data, rendered = category_tree.get(self.request)
+            self.assertEqual(tree_version, version)
+
+        self.assertTrue(callbacks)
+        for callback in callbacks:
+            callback()
+
+        tree_version, data, rendered = category_tree.get(self.request)
+        self.assertGreater(tree_version, version)
+        self.assertEqual(data[0]["name"], "Новое название")
@@ -0,0 +1,175 @@
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, connection
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from apps.core.metrics import measure_serialization
+from apps.core.renderers import FastJSONRenderer
+
+from .cache import CATEGORY_TREE_VERSION_KEY, aget_catalog_version, get_catalog_version
+
+logger = logging.getLogger(__name__)
+
+
+class CategoryTreeSnapshot:
+    """Загруженное из БД дерево категорий одной версии"""
+
+    def __init__(self, version, categories):
+        self.version = version
+        self.categories = categories
+        self.expires_at = time.monotonic() + settings.SHOP_CATEGORY_TREE_TTL
+        # Сериализованные категории для каждого адреса сайта: URL изображений
+        # в ответе абсолютные и зависят от адреса запроса
+        self.rendered = {}
+
+    def is_current(self, version):
+        return self.version == version and time.monotonic() < self.expires_at
+
+
+class CategoryTree:
+    """
+    Дерево категорий с подкатегориями в памяти процесса.
+
+    Категории сериализуются один раз, каждая категория хранится и в виде
+    словаря, и в виде готового JSON, поэтому список категорий отдается
+    без обращений к БД и без повторной сериализации. Дерево загружается
+    заново по истечении SHOP_CATEGORY_TREE_TTL или при изменении версии
+    дерева, которую увеличивают сигналы моделей Category и SubCategory.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def get(self, request):
+        """Возвращает словари и JSON категорий для адреса запроса"""
+        snapshot = self._snapshot
+        version = get_catalog_version(CATEGORY_TREE_VERSION_KEY)
+        if snapshot is None or not snapshot.is_current(version):
+            snapshot = self.load(version)
+        return self.render(snapshot, request)
+
+    async def aget(self, request):
+        """Асинхронный вариант get(); загрузка из БД выполняется в потоке"""
+        snapshot = self._snapshot
+        version = await aget_catalog_version(CATEGORY_TREE_VERSION_KEY)
+        if snapshot is None or not snapshot.is_current(version):
+            snapshot = await sync_to_async(self.load)(version)
+        return self.render(snapshot, request)
+
+    def load(self, version=None):
+        """Загружает дерево категорий из БД"""
+        from .models import Category
+
+        with self._lock:
+            if version is None:
+                version = get_catalog_version(CATEGORY_TREE_VERSION_KEY)
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.is_current(version):
+                return snapshot
+            categories = list(Category.objects.prefetch_related("subcategories"))
+            self._snapshot = CategoryTreeSnapshot(version, categories)
+            return self._snapshot
+
+    def render(self, snapshot, request):
+        from .serializers import CategorySerializer
+
+        base_url = request.build_absolute_uri("/")
+        rendered = snapshot.rendered.get(base_url)
+        if rendered is None:
+            serializer = CategorySerializer(
+                snapshot.categories, many=True, context={"request": request}
+            )
+            with measure_serialization():
+                data = [dict(item) for item in serializer.data]
+                renderer = FastJSONRenderer()
+                rendered = (data, [renderer.render(item) for item in data])
+            snapshot.rendered[base_url] = rendered
+        return snapshot.version, *rendered
+
+    def clear(self):
+        with self._lock:
+            self._snapshot = None
+
+    def warm_up(self):
+        """Загружает дерево заранее, чтобы первый запрос не обращался к БД"""
+        try:
+            self.load()
+        except DatabaseError:
+            logger.warning("Не удалось загрузить дерево категорий", exc_info=True)
+        finally:
+            connection.close()
+
+
+category_tree = CategoryTree()
+
+
+class PreRenderedPageResponse(Response):
+    """
+    Ответ со страницей списка, тело которого собирается из готового JSON
+    элементов. Для других форматов, например, Browsable API, данные
+    отрисовываются обычным образом.
+    """
+
+    def __init__(self, data, rendered_results, **kwargs):
+        super().__init__(data, **kwargs)
+        self.rendered_results = rendered_results
+
+    @property
+    def rendered_content(self):
+        renderer = getattr(self, "accepted_renderer", None)
+        if (
+            not isinstance(renderer, JSONRenderer)
+            or "indent" in self.accepted_media_type
+        ):
+            return super().rendered_content
+
+        self["Content-Type"] = renderer.media_type
+        envelope = {key: value for key, value in self.data.items() if key != "results"}
+        head = renderer.render(envelope)[:-1]
+        separator = b"," if envelope else b""
+        return b"".join(
+            [
+                head,
+                separator,
+                b'"results":[',
+                b",".join(self.rendered_results),
+                b"]}",
+            ]
+        )
+
+
+class CategoryTreeMixin:
+    """
+    Отдает страницы списка категорий из дерева в памяти процесса.
+    Используется вместе с CatalogCacheMixin и KeysetPaginationMixin:
+    keyset-пагинация по-прежнему выполняется запросом к БД.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if self.use_keyset_pagination():
+            return super().list(request, *args, **kwargs)
+        return self.get_tree_response(request, *category_tree.get(request))
+
+    async def alist(self, request, *args, **kwargs):
+        if self.use_keyset_pagination():
+            return await super().alist(request, *args, **kwargs)
+        return self.get_tree_response(request, *await category_tree.aget(request))
+
+    def get_tree_response(self, request, version, data, rendered):
+        key, etag = self.get_cache_key(request, f"tree{version}")
+        response = self.get_not_modified_response(request, etag)
+        if response is not None:
+            return response
+
+        # Пагинатор работает со списком в памяти так же, как с QuerySet
+        indices = self.paginate_queryset(range(len(data)))
+        page = self.get_paginated_response([data[i] for i in indices]).data
+        response = PreRenderedPageResponse(page, [rendered[i] for i in indices])
+        response["ETag"] = etag
+        return response
@@ -1,9 +1,31 @@
+from django.conf import settings
 from django.urls import path
 
-from .views import CartView, CategoryListView, ProductListView
+from .views import (
+    CartBatchView,
+    CartSummaryView,
+    CartView,
+    CatalogCacheStatsView,
+    CatalogChangesView,
+    CategoryListView,
+    ProductExportView,
+    ProductListView,
+    ProductSearchView,
+)
+
+if settings.SHOP_ASYNC_VIEWS:
+    from .async_views import AsyncCartView as CartView
+    from .async_views import AsyncCategoryListView as CategoryListView
+    from .async_views import AsyncProductListView as ProductListView
 
 urlpatterns = [
     path("categories/", CategoryListView.as_view(), name="category-list"),
     path("products/", ProductListView.as_view(), name="product-list"),
+    path("products/search/", ProductSearchView.as_view(), name="product-search"),
+    path("products/export/", ProductExportView.as_view(), name="product-export"),
+    path("changes/", CatalogChangesView.as_view(), name="catalog-changes"),
     path("cart/", CartView.as_view(), name="cart-detail"),
+    path("cart/summary/", CartSummaryView.as_view(), name="cart-summary"),
+    path("cart/batch/", CartBatchView.as_view(), name="cart-batch"),
+    path("cache/stats/", CatalogCacheStatsView.as_view(), name="cache-stats"),
 ]
@@ -1,10 +1,47 @@
-from drf_spectacular.utils import OpenApiResponse, extend_schema
-from rest_framework import generics, permissions, status
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
+from rest_framework import filters, generics, permissions, status
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from apps.core.metrics import SerializerMetricsMixin
+
+from .cache import (
+    CatalogCacheMixin,
+    catalog_cache_stats,
+    etag_matches,
+    get_catalog_version,
+)
+from .changes import decode_cursor, get_changes
+from .export import CSVRenderer, NDJSONRenderer, export_products
+from .filters import ProductFilterBackend
 from .models import Cart, CartItem, Category, Product
-from .pagination import CategoryPagination, ProductPagination
-from .serializers import CartSerializer, CategorySerializer, ProductSerializer
+from .pagination import (
+    CategoryKeysetPagination,
+    CategoryPagination,
+    KeysetPaginationMixin,
+    ProductKeysetPagination,
+    ProductPagination,
+)
+from .search import postgres_search, product_index
+from .serializers import (
+    CartBatchSerializer,
+    CartSerializer,
+    CategorySerializer,
+    ProductSerializer,
+)
+from .tree import CategoryTreeMixin
+
+
+def cart_items_prefetch():
+    """Загрузка элементов корзины вместе с продуктами одним запросом"""
+    return Prefetch("items", queryset=CartItem.objects.select_related("product"))
 
 
 @extend_schema(
@@ -12,12 +49,23 @@ from .serializers import CartSerializer, CategorySerializer, ProductSerializer
     summary="Получение списка всех категорий",
     responses={200: OpenApiResponse(description="Список категорий с подкатегориями")},
 )
-class CategoryListView(generics.ListAPIView):
-    """Представление для получения списка всех категорий с подкатегориями"""
+class CategoryListView(
+    CategoryTreeMixin,
+    CatalogCacheMixin,
+    KeysetPaginationMixin,
+    SerializerMetricsMixin,
+    generics.ListAPIView,
+):
+    """
+    Представление для получения списка всех категорий с подкатегориями.
+    Страницы отдаются из дерева категорий в памяти процесса.
+    """
 
     queryset = Category.objects.prefetch_related("subcategories").all()
+    throttle_scope = "catalog"
     serializer_class = CategorySerializer
     pagination_class = CategoryPagination
+    keyset_pagination_class = CategoryKeysetPagination
 
 
 @extend_schema(
@@ -25,24 +73,216 @@ class CategoryListView(generics.ListAPIView):
     summary="Получение списка всех продуктов",
     responses={200: OpenApiResponse(description="Список продуктов с изображениями")},
 )
-class ProductListView(generics.ListAPIView):
-    """Представление для получения списка всех продуктов"""
+class ProductListView(
+    CatalogCacheMixin,
+    KeysetPaginationMixin,
+    SerializerMetricsMixin,
+    generics.ListAPIView,
+):
+    """
+    Представление для получения списка всех продуктов с фильтрацией,
+    поиском по названию и сортировкой по цене или названию
+    """
 
     queryset = Product.objects.select_related("subcategory__category").all()
+    throttle_scope = "catalog"
+    serializer_class = ProductSerializer
+    pagination_class = ProductPagination
+    keyset_pagination_class = ProductKeysetPagination
+    filter_backends = [
+        ProductFilterBackend,
+        filters.SearchFilter,
+        filters.OrderingFilter,
+    ]
+    search_fields = ["name"]
+    ordering_fields = ["price", "name"]
+
+
+@extend_schema(
+    tags=["Products"],
+    summary="Полнотекстовый поиск продуктов",
+    parameters=[
+        OpenApiParameter("q", str, description="Поисковый запрос", required=True)
+    ],
+    responses={200: OpenApiResponse(description="Продукты по убыванию релевантности")},
+)
+class ProductSearchView(SerializerMetricsMixin, generics.ListAPIView):
+    """
+    Представление для поиска продуктов по названию, подкатегории и категории
+    с учетом русской морфологии. В PostgreSQL используется полнотекстовый
+    поиск, в остальных БД — инвертированный индекс в памяти процесса.
+    """
+
+    queryset = Product.objects.select_related("subcategory__category")
     serializer_class = ProductSerializer
     pagination_class = ProductPagination
+    throttle_scope = "catalog"
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response(
+                {"error": "Не указан поисковый запрос q."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if connection.vendor == "postgresql":
+            page = self.paginate_queryset(postgres_search(self.get_queryset(), query))
+        else:
+            page_ids = self.paginate_queryset(product_index.search(query))
+            products = self.get_queryset().in_bulk(page_ids)
+            page = [
+                products[product_id]
+                for product_id in page_ids
+                if product_id in products
+            ]
+
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+@extend_schema(
+    tags=["Products"],
+    summary="Потоковый экспорт всех продуктов в NDJSON или CSV",
+    parameters=[
+        OpenApiParameter(
+            "format", str, enum=["ndjson", "csv"], description="Формат файла"
+        ),
+        OpenApiParameter(
+            "updated_since",
+            OpenApiTypes.DATETIME,
+            description="Только продукты, измененные начиная с указанного времени",
+        ),
+    ],
+    responses={200: OpenApiResponse(description="Файл с продуктами")},
+)
+class ProductExportView(APIView):
+    """
+    Представление для выгрузки всего каталога продуктов одним потоковым
+    ответом вместо постраничного обхода списка. Формат выбирается
+    параметром format или заголовком Accept.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    throttle_scope = "catalog"
+
+    def get(self, request, *args, **kwargs):
+        queryset = Product.objects.select_related("subcategory__category")
+        updated_since = request.query_params.get("updated_since")
+        if updated_since:
+            try:
+                value = parse_datetime(updated_since)
+            except ValueError:
+                value = None
+            if value is None:
+                return Response(
+                    {"error": "Параметр updated_since должен быть датой в ISO 8601."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if timezone.is_naive(value):
+                value = timezone.make_aware(value)
+            queryset = queryset.filter(updated_at__gte=value).order_by(
+                "updated_at", "id"
+            )
+        else:
+            queryset = queryset.order_by("id")
+
+        export_format = request.accepted_renderer.format
+        response = StreamingHttpResponse(
+            export_products(queryset, export_format),
+            content_type=request.accepted_renderer.media_type,
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="products.{export_format}"'
+        )
+        return response
+
+
+@extend_schema(
+    tags=["Products"],
+    summary="Изменения каталога после курсора",
+    parameters=[
+        OpenApiParameter(
+            "since",
+            str,
+            description=(
+                "Курсор из предыдущего ответа или дата в ISO 8601; "
+                "без параметра возвращается весь каталог"
+            ),
+        ),
+        OpenApiParameter("page_size", int, description="Количество записей"),
+    ],
+    responses={
+        200: OpenApiResponse(description="Измененные и удаленные объекты, курсор")
+    },
+)
+class CatalogChangesView(APIView):
+    """
+    Представление для инкрементальной синхронизации локальной копии
+    каталога. Ответ содержит измененные категории, подкатегории и
+    продукты, id удаленных объектов и курсор для следующего запроса.
+    Клиент применяет сначала изменения, затем удаления, и повторяет
+    запрос с новым курсором, пока has_more равен true.
+    """
+
+    throttle_scope = "catalog"
+
+    def get(self, request, *args, **kwargs):
+        position = None
+        since = request.query_params.get("since")
+        if since:
+            try:
+                position = decode_cursor(since)
+            except ValueError:
+                return Response(
+                    {
+                        "error": "Параметр since должен быть курсором или датой в ISO 8601."
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        page_size = settings.SHOP_CHANGES_PAGE_SIZE
+        try:
+            page_size = min(int(request.query_params["page_size"]), page_size)
+        except (KeyError, ValueError):
+            pass
+        if page_size <= 0:
+            page_size = settings.SHOP_CHANGES_PAGE_SIZE
+
+        data = get_changes(position, page_size, context={"request": request})
+        return Response(data, status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    tags=["Cache"],
+    summary="Статистика кэша ответов каталога",
+    responses={200: OpenApiResponse(description="Попадания, промахи и версия")},
+)
+class CatalogCacheStatsView(APIView):
+    """Представление для получения счетчиков кэша ответов каталога"""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(
+            {**catalog_cache_stats.as_dict(), "version": get_catalog_version()},
+            status=status.HTTP_200_OK,
+        )
 
 
 @extend_schema(tags=["Cart"], summary="Работа с корзиной пользователя")
-class CartView(generics.GenericAPIView):
+class CartView(SerializerMetricsMixin, generics.GenericAPIView):
     """Представление для работы с корзиной пользователя"""
 
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = CartSerializer
+    throttle_scope = "cart"
+    queryset = Cart.objects.prefetch_related(cart_items_prefetch())
 
     def get(self, request, *args, **kwargs):
         """Получение содержимого корзины"""
-        cart, created = Cart.objects.get_or_create(user=request.user)
+        cart, created = self.get_queryset().get_or_create_for_user(request.user)
         serializer = self.get_serializer(cart)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -76,18 +316,15 @@ class CartView(generics.GenericAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        cart, created = Cart.objects.get_or_create(user=request.user)
-        cart_item, created = CartItem.objects.get_or_create(cart=cart, product=product)
+        cart, created = Cart.objects.get_or_create_for_user(request.user)
+        cart.set_item_quantity(product, quantity)
 
         if quantity > 0:
-            cart_item.quantity = quantity
-            cart_item.save()
             return Response(
                 {"message": f"Товар {product} успешно добавлен/обновлен в корзине."},
                 status=status.HTTP_200_OK,
             )
         else:
-            cart_item.delete()
             return Response(
                 {"message": f"Товар {product} успешно удален из корзины."},
                 status=status.HTTP_200_OK,
@@ -95,15 +332,135 @@ class CartView(generics.GenericAPIView):
 
     def delete(self, request, *args, **kwargs):
         """Полная очистка корзины"""
-        try:
-            cart = Cart.objects.get(user=request.user)
-        except Cart.DoesNotExist:
+        cart = Cart.objects.for_user(request.user).first()
+        if cart is None:
             return Response(
                 {"error": "Корзина пользователя не найдена."},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        cart.items.all().delete()
+        cart.clear()
         return Response(
             {"message": "Корзина успешно очищена."}, status=status.HTTP_200_OK
         )
+
+
+@extend_schema(
+    tags=["Cart"],
+    summary="Итоги корзины пользователя",
+    responses={
+        200: OpenApiResponse(description="Общее количество, стоимость и версия"),
+        304: OpenApiResponse(description="Итоги не изменились (If-None-Match)"),
+    },
+)
+class CartSummaryView(APIView):
+    """
+    Представление для получения итогов корзины, например, для счетчика
+    в шапке сайта. Итоги и версия читаются из одной строки корзины,
+    ETag ответа строится по версии, поэтому повторный опрос с
+    If-None-Match получает пустой ответ 304.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = "cart"
+
+    def get(self, request, *args, **kwargs):
+        summary = (
+            Cart.objects.for_user(request.user)
+            .values("id", "total_quantity", "total_price", "version")
+            .first()
+        )
+        if summary is None:
+            summary = {"id": 0, "total_quantity": 0, "total_price": 0, "version": 0}
+        etag = f'"{summary.pop("id")}-{summary["version"]}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(summary, status=status.HTTP_200_OK, headers=headers)
+
+
+@extend_schema(
+    tags=["Cart"],
+    summary="Пакетное изменение корзины пользователя",
+    responses={200: OpenApiResponse(description="Результаты по каждой позиции")},
+)
+class CartBatchView(SerializerMetricsMixin, generics.GenericAPIView):
+    """
+    Представление для пакетного добавления, обновления и удаления товаров
+    в корзине. Количество запросов к БД не зависит от размера пакета.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = CartBatchSerializer
+    throttle_scope = "cart"
+
+    def post(self, request, *args, **kwargs):
+        """Применение списка изменений {product_id, quantity} к корзине"""
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST
+            )
+        lines = serializer.validated_data["items"]
+        products = serializer.validated_data["products"]
+
+        cart, created = Cart.objects.get_or_create_for_user(request.user)
+        results = []
+        with transaction.atomic():
+            cart.lock()
+            existing = {
+                item.product_id: item
+                for item in cart.items.filter(product_id__in=list(products))
+            }
+            to_create, to_update, to_delete = [], [], []
+            total_quantity, total_price = 0, 0
+            for line in lines:
+                product = products[line["product_id"]]
+                quantity = line["quantity"]
+                cart_item = existing.get(product.id)
+                delta = quantity - (cart_item.quantity if cart_item else 0)
+                total_quantity += delta
+                total_price += delta * product.price
+                if quantity == 0:
+                    if cart_item is None:
+                        result = "not_in_cart"
+                    else:
+                        to_delete.append(cart_item.id)
+                        result = "removed"
+                elif cart_item is None:
+                    to_create.append(
+                        CartItem(cart=cart, product=product, quantity=quantity)
+                    )
+                    result = "added"
+                else:
+                    cart_item.quantity = quantity
+                    to_update.append(cart_item)
+                    result = "updated"
+                results.append(
+                    {
+                        "product_id": product.id,
+                        "product": str(product),
+                        "quantity": quantity,
+                        "result": result,
+                    }
+                )
+
+            if to_create:
+                CartItem.objects.bulk_create(to_create)
+            if to_update:
+                CartItem.objects.bulk_update(to_update, ["quantity"])
+            if to_delete:
+                CartItem.objects.filter(id__in=to_delete).delete()
+            cart.update_totals(total_quantity, total_price)
+
+        cart.refresh_from_db(fields=["total_quantity", "total_price"])
+        total_quantity, total_price = cart.get_totals()
+        return Response(
+            {
+                "items": results,
+                "total_quantity": total_quantity,
+                "total_price": total_price,
+            },
+            status=status.HTTP_200_OK,
+        )
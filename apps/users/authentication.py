@@ -0,0 +1,184 @@
+"""
+Аутентификация по JWT без запроса пользователя к БД.
+
+Токены содержат id и имя пользователя, а также id его корзины (cart_id).
+По этим данным создается "ленивый" объект пользователя: остальные поля
+загружаются из БД только при обращении к ним. Для представлений, которым
+нужен полный объект пользователя, можно включить кэш пользователей в
+памяти процесса с коротким временем жизни (USERS_AUTH_CACHE_TTL).
+
+Токены пользователя отзываются функцией revoke_user: время отзыва
+записывается в БД, и токены, выпущенные до него, отклоняются. Это
+происходит автоматически при смене пароля, деактивации и удалении
+пользователя. Запись хранится REFRESH_TOKEN_LIFETIME, пока не истекут
+все выпущенные до отзыва токены. Чтобы не обращаться к БД при каждом
+запросе, время отзыва кэшируется на USERS_REVOCATION_CACHE_TTL секунд;
+после вытеснения из кэша оно загружается из БД заново. В других
+процессах с LocMemCache отзыв начинает действовать не позже, чем через
+это время. Обновление токена проверяет отзыв и активность пользователя
+по БД.
+"""
+
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.shop.models import Cart
+
+from .models import TokenRevocation
+
+USERNAME_CLAIM = "username"
+CART_ID_CLAIM = "cart_id"
+# Время выпуска токена с долями секунды: iat содержит целые секунды, и по
+# нему нельзя отличить токен, выпущенный в ту же секунду после отзыва
+ISSUED_AT_CLAIM = "issued_at"
+REVOKED_KEY = "users:revoked:{}"
+
+
+class UserCache:
+    """Пользователи в памяти процесса с ограниченным временем жизни"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = {}
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            expires, user = entry
+            if expires < time.monotonic():
+                del self._users[user_id]
+                return None
+        # Копия, чтобы изменения в запросе не попадали в общий объект
+        return copy.copy(user)
+
+    def set(self, user, timeout):
+        with self._lock:
+            self._users[user.pk] = (time.monotonic() + timeout, copy.copy(user))
+
+    def evict(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache()
+
+
+def get_tokens_for_user(user, cart_id=None):
+    """Refresh-токен пользователя с данными для аутентификации без БД"""
+    if cart_id is None:
+        cart, created = Cart.objects.get_or_create(user=user)
+        cart_id = cart.pk
+    refresh = RefreshToken.for_user(user)
+    refresh[USERNAME_CLAIM] = user.get_username()
+    refresh[CART_ID_CLAIM] = cart_id
+    refresh[ISSUED_AT_CLAIM] = timezone.now().timestamp()
+    # Время отзыва загружается в кэш заранее, чтобы первые запросы
+    # с новыми токенами не обращались к БД
+    get_revoked_at(user.pk)
+    return refresh
+
+
+def revoke_user(user_id):
+    """Отзывает все выпущенные ранее токены пользователя"""
+    now = timezone.now()
+    TokenRevocation.objects.update_or_create(
+        user_id=user_id, defaults={"revoked_at": now}
+    )
+    # Токены, выпущенные до давних отзывов, уже истекли
+    TokenRevocation.objects.filter(
+        revoked_at__lt=now - api_settings.REFRESH_TOKEN_LIFETIME
+    ).delete()
+    cache.set(
+        REVOKED_KEY.format(user_id),
+        now.timestamp(),
+        settings.USERS_REVOCATION_CACHE_TTL,
+    )
+    user_cache.evict(user_id)
+
+
+def get_revoked_at(user_id, use_cache=True):
+    """Время последнего отзыва токенов пользователя в секундах или 0"""
+    key = REVOKED_KEY.format(user_id)
+    revoked_at = cache.get(key) if use_cache else None
+    if revoked_at is None:
+        revocation = TokenRevocation.objects.filter(user_id=user_id).first()
+        revoked_at = revocation.revoked_at.timestamp() if revocation else 0
+        cache.set(key, revoked_at, settings.USERS_REVOCATION_CACHE_TTL)
+    return revoked_at
+
+
+def is_revoked(user_id, token, use_cache=True):
+    revoked_at = get_revoked_at(user_id, use_cache)
+    if not revoked_at:
+        return False
+    if ISSUED_AT_CLAIM in token:
+        return token[ISSUED_AT_CLAIM] <= revoked_at
+    # Токен без точного времени выпуска, выпущенный в секунду отзыва,
+    # считается отозванным
+    return token.get("iat", 0) <= int(revoked_at)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по JWT, которой доверяют данные токена: вместо запроса
+    пользователя к БД создается объект модели с полями id и username, а
+    остальные поля загружаются при первом обращении к ним. id корзины из
+    токена доступен как request.user.cart_id.
+
+    Токены без имени пользователя, выпущенные до появления этих данных,
+    проверяются запросом пользователя к БД, как в JWTAuthentication.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Токен не содержит идентификатор пользователя.")
+        if is_revoked(user_id, validated_token):
+            raise AuthenticationFailed("Токен отозван.", code="token_revoked")
+
+        timeout = settings.USERS_AUTH_CACHE_TTL
+        if timeout:
+            user = user_cache.get(user_id)
+            if user is None:
+                user = super().get_user(validated_token)
+                user_cache.set(user, timeout)
+        elif USERNAME_CLAIM in validated_token:
+            user = self.get_lazy_user(user_id, validated_token[USERNAME_CLAIM])
+        else:
+            user = super().get_user(validated_token)
+
+        user.cart_id = validated_token.get(CART_ID_CLAIM)
+        return user
+
+    def get_lazy_user(self, user_id, username):
+        """Пользователь из данных токена с отложенной загрузкой остальных полей"""
+        model = get_user_model()
+        claims = {api_settings.USER_ID_FIELD: user_id, model.USERNAME_FIELD: username}
+        # from_db ожидает значения в порядке полей модели
+        fields = [
+            field.attname
+            for field in model._meta.concrete_fields
+            if field.attname in claims
+        ]
+        return model.from_db(
+            router.db_for_read(model), fields, [claims[name] for name in fields]
+        )
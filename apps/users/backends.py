@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+from .hashing import HashingQueueFull, check_password, make_password
+
+UserModel = get_user_model()
+
+# Атрибут запроса, отмечающий отказ во входе из-за заполненного пула
+QUEUE_FULL_ATTR = "hashing_queue_full"
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend, проверяющий пароль в пуле процессов хеширования.
+
+    При заполненном пуле вход отклоняется исключением PermissionDenied,
+    поэтому authenticate() возвращает None и в админке, и в других местах
+    вызова, а запрос отмечается атрибутом hashing_queue_full: API входа
+    по нему отвечает 429.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        try:
+            return self.authenticate_pooled(request, username, password, **kwargs)
+        except HashingQueueFull:
+            if request is not None:
+                setattr(request, QUEUE_FULL_ATTR, True)
+            raise PermissionDenied
+
+    def authenticate_pooled(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Хеширование для несуществующего пользователя выравнивает время ответа
+            make_password(password)
+            return None
+
+        valid, updated = check_password(password, user.password)
+        if not valid:
+            return None
+        if updated is not None:
+            # Перехеширование основным алгоритмом, токены не отзываются
+            user.password = updated
+            user.save(update_fields=["password"])
+        return user if self.user_can_authenticate(user) else None
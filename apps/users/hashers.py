@@ -0,0 +1,27 @@
+"""
+Алгоритмы хеширования паролей с параметрами OWASP Password Storage Cheat
+Sheet. Основной алгоритм выбирается настройкой PASSWORD_HASHER, время
+хеширования на сервере показывает команда benchmark_hashers.
+"""
+
+from django.contrib.auth import hashers
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """
+    scrypt с N=2**14, r=8, p=5: 16 МиБ памяти на каждый из пяти проходов.
+    Стойкость по OWASP равна N=2**17, r=8, p=1, а затраты процессора меньше,
+    чем у PBKDF2 с 870 000 итераций Django по умолчанию.
+    """
+
+    work_factor = 2**14
+    block_size = 8
+    parallelism = 5
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """argon2id с 19 МиБ памяти, двумя проходами и одним потоком"""
+
+    time_cost = 2
+    memory_cost = 19 * 1024
+    parallelism = 1
@@ -0,0 +1,106 @@
+"""
+Хеширование паролей в пуле процессов.
+
+Хеширование пароля занимает сотни миллисекунд процессора. При всплеске
+регистраций и входов оно выполняется в ограниченном количестве процессов
+с пониженным приоритетом, поэтому не отнимает процессор у запросов
+каталога. Если в пуле уже USERS_HASHING_QUEUE паролей, новые запросы
+сразу отклоняются исключением HashingQueueFull, а не ждут в очереди.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class HashingQueueFull(Exception):
+    """В пуле хеширования нет свободных мест"""
+
+
+def init_hashing_worker(niceness):
+    """Инициализация процесса пула: приоритет и настройка Django"""
+    import django
+
+    if niceness and hasattr(os, "nice"):
+        os.nice(niceness)
+    django.setup()
+
+
+def encode_password(password):
+    return hashers.make_password(password)
+
+
+def verify_password(password, encoded):
+    """
+    Проверяет пароль и возвращает пару (пароль верен, новый хеш). Новый
+    хеш возвращается, если пароль нужно перехешировать основным алгоритмом
+    или с новыми параметрами.
+    """
+    valid, must_update = hashers.verify_password(password, encoded)
+    return valid, encode_password(password) if valid and must_update else None
+
+
+class HashingPool:
+    """Ограниченный пул процессов хеширования с отказом при заполнении"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+
+    def get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: процессы пула не наследуют соединения с БД и потоки
+                self._executor = ProcessPoolExecutor(
+                    max_workers=settings.USERS_HASHING_PROCESSES,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=init_hashing_worker,
+                    initargs=(settings.USERS_HASHING_NICE,),
+                )
+                self._slots = threading.BoundedSemaphore(settings.USERS_HASHING_QUEUE)
+            return self._executor, self._slots
+
+    def run(self, function, *args):
+        if not settings.USERS_HASHING_PROCESSES:
+            return function(*args)
+
+        executor, slots = self.get_executor()
+        if not slots.acquire(blocking=False):
+            raise HashingQueueFull
+        try:
+            future = executor.submit(function, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda future: slots.release())
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            # Процесс пула завершился аварийно, пул создается заново
+            self.shutdown(wait=False)
+            raise
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+hashing_pool = HashingPool()
+
+
+def make_password(password):
+    """Хеш пароля основным алгоритмом, вычисленный в пуле"""
+    return hashing_pool.run(encode_password, password)
+
+
+def check_password(password, encoded):
+    """Проверка пароля в пуле: пара (пароль верен, новый хеш или None)"""
+    return hashing_pool.run(verify_password, password, encoded)
@@ -0,0 +1,41 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+
+class Command(BaseCommand):
+    help = (
+        "Время хеширования и проверки пароля алгоритмами PASSWORD_HASHER_CLASSES "
+        "на этом сервере. Помогает выбрать PASSWORD_HASHER и количество "
+        "процессов хеширования"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Количество хеширований"
+        )
+
+    def handle(self, *args, **options):
+        for name, path in settings.PASSWORD_HASHER_CLASSES.items():
+            hasher = import_string(path)()
+            try:
+                encoded = hasher.encode("benchmark-password", hasher.salt())
+            except ValueError as error:
+                # Не установлена библиотека алгоритма
+                self.stdout.write(f"{name}: недоступен ({error})")
+                continue
+
+            timings = []
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                hasher.verify("benchmark-password", encoded)
+                timings.append(time.perf_counter() - start)
+            median = statistics.median(timings)
+            current = " (текущий)" if name == settings.PASSWORD_HASHER else ""
+            self.stdout.write(
+                f"{name}{current}: {median * 1000:.0f} мс на пароль, "
+                f"{1 / median:.1f} паролей/с на процесс"
+            )
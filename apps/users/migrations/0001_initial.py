@@ -0,0 +1,34 @@
+# Generated by Django 5.1.1 on 2026-10-18 17:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="TokenRevocation",
+            fields=[
+                (
+                    "user_id",
+                    models.BigIntegerField(
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID пользователя",
+                    ),
+                ),
+                (
+                    "revoked_at",
+                    models.DateTimeField(db_index=True, verbose_name="Время отзыва"),
+                ),
+            ],
+            options={
+                "verbose_name": "Отзыв токенов",
+                "verbose_name_plural": "Отзывы токенов",
+            },
+        ),
+    ]
@@ -1,3 +1,19 @@
 from django.db import models
 
-# Create your models here.
+
+class TokenRevocation(models.Model):
+    """
+    Время отзыва токенов пользователя. Запись не связана внешним ключом
+    с пользователем и сохраняется после его удаления, пока не истекут
+    выпущенные до отзыва refresh-токены.
+    """
+
+    user_id = models.BigIntegerField(verbose_name="ID пользователя", primary_key=True)
+    revoked_at = models.DateTimeField(verbose_name="Время отзыва", db_index=True)
+
+    class Meta:
+        verbose_name = "Отзыв токенов"
+        verbose_name_plural = "Отзывы токенов"
+
+    def __str__(self):
+        return f"{self.user_id}: {self.revoked_at}"
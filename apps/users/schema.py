@@ -0,0 +1,7 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class ClaimsJWTScheme(SimpleJWTScheme):
+    """Описание аутентификации ClaimsJWTAuthentication в схеме OpenAPI"""
+
+    target_class = "apps.users.authentication.ClaimsJWTAuthentication"
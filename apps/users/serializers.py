@@ -1,5 +1,15 @@
+from django.conf import settings
 from django.contrib.auth.models import User
-from rest_framework import serializers
+from rest_framework import exceptions, serializers
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.users.authentication import get_tokens_for_user, is_revoked
+from apps.users.backends import QUEUE_FULL_ATTR
+from apps.users.hashing import make_password
 
 
 class RegisterUserSerializer(serializers.ModelSerializer):
@@ -10,7 +20,43 @@ class RegisterUserSerializer(serializers.ModelSerializer):
         fields = ["username", "password"]
 
     def create(self, validated_data):
-        user = User.objects.create_user(
-            username=validated_data["username"], password=validated_data["password"]
-        )
+        # Пароль хешируется в пуле процессов до записи пользователя в БД
+        user = User(username=User.normalize_username(validated_data["username"]))
+        user.password = make_password(validated_data["password"])
+        user.save()
         return user
+
+
+class CartTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Выдача токенов при входе с именем пользователя и id корзины"""
+
+    @classmethod
+    def get_token(cls, user):
+        return get_tokens_for_user(user)
+
+    def validate(self, attrs):
+        try:
+            return super().validate(attrs)
+        except exceptions.AuthenticationFailed:
+            if getattr(self.context.get("request"), QUEUE_FULL_ATTR, False):
+                raise exceptions.Throttled(wait=settings.USERS_HASHING_RETRY_AFTER)
+            raise
+
+
+class CheckedTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Обновление access-токена: refresh-токены отозванных, удаленных и
+    неактивных пользователей отклоняются по данным БД
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user_id = refresh.get(api_settings.USER_ID_CLAIM)
+        active = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: user_id, "is_active": True}
+        ).exists()
+        if not active or is_revoked(user_id, refresh, use_cache=False):
+            raise exceptions.AuthenticationFailed(
+                "Токен отозван.", code="token_revoked"
+            )
+        return super().validate(attrs)
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import revoke_user, user_cache
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def revoke_changed_user(sender, instance, created, **kwargs):
+    """
+    Отзывает токены при смене пароля или деактивации пользователя,
+    при других изменениях удаляет пользователя из кэша аутентификации
+    """
+    if created:
+        return
+    # _password задается set_password и сбрасывается после сохранения
+    if getattr(instance, "_password", None) is not None or not instance.is_active:
+        revoke_user(instance.pk)
+    else:
+        user_cache.evict(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user(sender, instance, **kwargs):
+    """Отзывает токены удаленного пользователя"""
+    revoke_user(instance.pk)
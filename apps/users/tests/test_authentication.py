@@ -0,0 +1,159 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.shop.models import Cart
+from apps.users.authentication import ClaimsJWTAuthentication, user_cache
+
+PASSWORD = "secret-password-1"
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Время отзыва токенов и кэш пользователей не переходят между тестами."""
+    cache.clear()
+    user_cache.clear()
+    yield
+    cache.clear()
+    user_cache.clear()
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="buyer", password=PASSWORD)
+
+
+def login(client, username="buyer", password=PASSWORD):
+    response = client.post(
+        reverse("token_obtain_pair"),
+        {"username": username, "password": password},
+        format="json",
+    )
+    assert response.status_code == 200
+    return response.data["access"]
+
+
+@pytest.mark.django_db
+def test_register_token_claims():
+    """Тест данных токена после регистрации: имя пользователя и корзина."""
+    client = APIClient()
+    response = client.post(
+        reverse("user-register"),
+        {"username": "new-buyer", "password": PASSWORD},
+        format="json",
+    )
+
+    assert response.status_code == 201
+    token = AccessToken(response.data["access"])
+    cart = Cart.objects.get(user__username="new-buyer")
+    assert token["username"] == "new-buyer"
+    assert token["cart_id"] == cart.id
+
+
+def test_cart_without_user_query(user):
+    """Тест запроса корзины без загрузки пользователя из БД."""
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"JWT {login(client)}")
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("cart-detail"))
+
+    assert response.status_code == 200
+    assert response.data["id"] == user.cart.id
+    assert not any("auth_user" in query["sql"] for query in queries)
+
+
+def test_lazy_user(user, django_assert_num_queries):
+    """Тест отложенной загрузки полей пользователя, которых нет в токене."""
+    token = AccessToken(login(APIClient()))
+    cart_id = user.cart.id
+
+    with django_assert_num_queries(0):
+        lazy_user = ClaimsJWTAuthentication().get_user(token)
+        assert lazy_user.pk == user.pk
+        assert lazy_user.username == "buyer"
+        assert lazy_user.cart_id == cart_id
+        assert lazy_user.is_authenticated
+
+    with django_assert_num_queries(1):
+        assert lazy_user.is_active
+
+
+def test_revoke_on_password_change(user):
+    """Тест отзыва токенов при смене пароля."""
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"JWT {login(client)}")
+    assert client.get(reverse("cart-detail")).status_code == 200
+
+    user.set_password("another-password-1")
+    user.save()
+
+    assert client.get(reverse("cart-detail")).status_code == 401
+
+
+def test_login_after_password_change(user):
+    """Тест: токен, выпущенный сразу после смены пароля, не считается отозванным."""
+    user.set_password("another-password-1")
+    user.save()
+
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f"JWT {login(client, password='another-password-1')}"
+    )
+
+    assert client.get(reverse("cart-detail")).status_code == 200
+    cache.clear()
+    assert client.get(reverse("cart-detail")).status_code == 200
+
+
+def test_revocation_survives_cache_clear(user):
+    """Тест: отзыв хранится в БД и действует после очистки кэша."""
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"JWT {login(client)}")
+
+    user.is_active = False
+    user.save()
+    cache.clear()
+
+    assert client.get(reverse("cart-detail")).status_code == 401
+
+
+def test_refresh_rejected_for_inactive_user(user):
+    """Тест обновления токена: отказ для деактивированного и удаленного пользователя."""
+    client = APIClient()
+    response = client.post(
+        reverse("token_obtain_pair"),
+        {"username": "buyer", "password": PASSWORD},
+        format="json",
+    )
+    refresh = response.data["refresh"]
+    url = reverse("token_refresh")
+    assert client.post(url, {"refresh": refresh}, format="json").status_code == 200
+
+    User.objects.filter(pk=user.pk).update(is_active=False)
+    assert client.post(url, {"refresh": refresh}, format="json").status_code == 401
+
+    User.objects.filter(pk=user.pk).update(is_active=True)
+    user.delete()
+    assert client.post(url, {"refresh": refresh}, format="json").status_code == 401
+
+
+def test_user_cache(user, settings, django_assert_num_queries):
+    """Тест кэша пользователей: один запрос к БД до изменения пользователя."""
+    settings.USERS_AUTH_CACHE_TTL = 60
+    token = AccessToken(login(APIClient()))
+    authentication = ClaimsJWTAuthentication()
+
+    with django_assert_num_queries(1):
+        for _ in range(3):
+            assert authentication.get_user(token).email == ""
+
+    user.email = "buyer@example.com"
+    user.save()
+    with django_assert_num_queries(1):
+        assert authentication.get_user(token).email == "buyer@example.com"
@@ -0,0 +1,93 @@
+"""
+Бенчмарки регистрации.
+
+Запускаются только при заданной переменной окружения BENCHMARK:
+    BENCHMARK=1 pytest apps/users/tests/test_benchmarks.py -s
+"""
+
+import json
+import os
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.urls import reverse
+
+from apps.users.hashing import hashing_pool, make_password
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("BENCHMARK"), reason="Бенчмарки запускаются с BENCHMARK=1"
+)
+
+
+def timed_request(url, data=None):
+    """Выполняет запрос и возвращает статус ответа и время в мс"""
+    request = urllib.request.Request(url)
+    if data is not None:
+        request.data = json.dumps(data).encode()
+        request.add_header("Content-Type", "application/json")
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as error:
+        status = error.code
+    return status, (time.perf_counter() - start) * 1000
+
+
+def catalog_p99(url, requests=200, concurrency=4):
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        timings = [
+            t for _, t in pool.map(lambda _: timed_request(url), range(requests))
+        ]
+    return statistics.quantiles(timings, n=100)[98]
+
+
+@pytest.mark.parametrize("processes", [0, 1])
+def test_benchmark_catalog_during_registration_burst(live_server, settings, processes):
+    """p99 каталога во время всплеска регистраций с пулом хеширования и без него"""
+    settings.USERS_HASHING_PROCESSES = processes
+    settings.USERS_HASHING_QUEUE = 4
+    hashing_pool.shutdown()
+    # Запуск процессов пула не входит в измерения
+    make_password("warm-up")
+    catalog_url = live_server.url + reverse("category-list")
+    register_url = live_server.url + reverse("user-register")
+
+    idle = catalog_p99(catalog_url)
+
+    stop = threading.Event()
+    statuses = []
+
+    def register():
+        while not stop.is_set():
+            data = {"username": f"burst-{uuid.uuid4().hex[:12]}", "password": "pw-1"}
+            status, elapsed = timed_request(register_url, data)
+            statuses.append(status)
+            if status == 429:
+                # Клиенты повторяют запрос через Retry-After
+                time.sleep(settings.USERS_HASHING_RETRY_AFTER)
+
+    burst = [threading.Thread(target=register) for _ in range(16)]
+    for thread in burst:
+        thread.start()
+    time.sleep(1)
+    try:
+        busy = catalog_p99(catalog_url)
+    finally:
+        stop.set()
+        for thread in burst:
+            thread.join()
+        hashing_pool.shutdown()
+
+    print(
+        f"\nпроцессов хеширования {processes}: p99 каталога {idle:.1f} мс без "
+        f"нагрузки, {busy:.1f} мс при регистрациях; регистраций "
+        f"{statuses.count(201)}, отказов 429: {statuses.count(429)}"
+    )
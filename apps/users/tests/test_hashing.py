@@ -0,0 +1,79 @@
+import pytest
+from django.contrib.auth import authenticate, hashers
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.users.hashing import check_password, hashing_pool, make_password
+
+PASSWORD = "secret-password-1"
+
+
+@pytest.fixture(autouse=True)
+def reset_pool():
+    """Пул создается заново с настройками теста."""
+    hashing_pool.shutdown()
+    yield
+    hashing_pool.shutdown()
+
+
+def test_pool_hashing(settings):
+    """Тест хеширования и проверки пароля в процессе пула."""
+    settings.USERS_HASHING_PROCESSES = 1
+
+    encoded = make_password(PASSWORD)
+
+    assert encoded.startswith(f"{hashers.get_hasher().algorithm}$")
+    assert check_password(PASSWORD, encoded) == (True, None)
+    assert check_password("wrong-password", encoded) == (False, None)
+
+
+@pytest.mark.django_db
+def test_queue_full(settings):
+    """Тест ответа 429 при заполненном пуле хеширования."""
+    settings.USERS_HASHING_PROCESSES = 1
+    settings.USERS_HASHING_QUEUE = 1
+    User.objects.create_user(username="buyer", password=PASSWORD)
+    client = APIClient()
+    executor, slots = hashing_pool.get_executor()
+    slots.acquire()
+    try:
+        register = client.post(
+            reverse("user-register"),
+            {"username": "new-buyer", "password": PASSWORD},
+            format="json",
+        )
+        login = client.post(
+            reverse("token_obtain_pair"),
+            {"username": "buyer", "password": PASSWORD},
+            format="json",
+        )
+        # Вход в админку и другие вызовы authenticate() не завершаются ошибкой
+        admin_user = authenticate(username="buyer", password=PASSWORD)
+    finally:
+        slots.release()
+
+    assert register.status_code == 429
+    assert register["Retry-After"] == "1"
+    assert not User.objects.filter(username="new-buyer").exists()
+    assert login.status_code == 429
+    assert admin_user is None
+
+
+@pytest.mark.django_db
+def test_login_rehashes_password(settings):
+    """Тест перехеширования пароля основным алгоритмом при входе."""
+    settings.USERS_HASHING_PROCESSES = 0
+    user = User.objects.create(
+        username="buyer", password=hashers.make_password(PASSWORD, hasher="pbkdf2_sha1")
+    )
+
+    response = APIClient().post(
+        reverse("token_obtain_pair"),
+        {"username": "buyer", "password": PASSWORD},
+        format="json",
+    )
+
+    assert response.status_code == 200
+    user.refresh_from_db()
+    assert user.password.startswith(f"{hashers.get_hasher().algorithm}$")
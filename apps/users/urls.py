@@ -1,10 +1,9 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from .views import RegistrationAPIView
+from .views import LoginView, RefreshView, RegistrationAPIView
 
 urlpatterns = [
     path("register/", RegistrationAPIView.as_view(), name="user-register"),
-    path("login/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
-    path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("login/", LoginView.as_view(), name="token_obtain_pair"),
+    path("token/refresh/", RefreshView.as_view(), name="token_refresh"),
 ]
@@ -1,9 +1,12 @@
+from django.conf import settings
 from drf_spectacular.utils import extend_schema
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from apps.users.authentication import get_tokens_for_user
+from apps.users.hashing import HashingQueueFull
 from apps.users.serializers import RegisterUserSerializer
 
 
@@ -13,18 +16,20 @@ from apps.users.serializers import RegisterUserSerializer
     responses={201: "Пользователь успешно зарегистрирован"},
 )
 class RegistrationAPIView(APIView):
+    throttle_scope = "auth"
 
     def post(self, request):
         serializer = RegisterUserSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
-            refresh = RefreshToken.for_user(user)
-            refresh.payload.update(
-                {
-                    "user_id": user.id,
-                    "username": user.username,
-                }
-            )
+            try:
+                user = serializer.save()
+            except HashingQueueFull:
+                return Response(
+                    {"error": "Сервер перегружен, повторите запрос позже."},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS,
+                    headers={"Retry-After": str(settings.USERS_HASHING_RETRY_AFTER)},
+                )
+            refresh = get_tokens_for_user(user)
 
             return Response(
                 {
@@ -38,3 +43,15 @@ class RegistrationAPIView(APIView):
             {"Status": False, "Errors": serializer.errors},
             status=status.HTTP_400_BAD_REQUEST,
         )
+
+
+class LoginView(TokenObtainPairView):
+    """Получение пары токенов по имени пользователя и паролю"""
+
+    throttle_scope = "auth"
+
+
+class RefreshView(TokenRefreshView):
+    """Обновление access-токена по refresh-токену"""
+
+    throttle_scope = "auth"
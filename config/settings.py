@@ -1,5 +1,7 @@
 import os
+import tempfile
 from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -24,11 +26,13 @@ INSTALLED_APPS = [
     "rest_framework_simplejwt",
     "imagekit",
     "drf_spectacular",
+    "apps.core.apps.CoreConfig",
     "apps.users.apps.UsersConfig",
     "apps.shop.apps.ShopConfig",
 ]
 
 MIDDLEWARE = [
+    "apps.core.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -66,9 +70,89 @@ DATABASES = {
         "PASSWORD": os.environ.get("POSTGRES_PASSWORD", "password"),
         "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
         "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+        # Постоянные соединения: время жизни в секундах (0 — закрывать после
+        # каждого запроса) и проверка соединения перед повторным использованием
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {},
     }
 }
 
+if DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    # Пул соединений psycopg (требуется пакет psycopg[pool]). Пул несовместим
+    # с постоянными соединениями Django, поэтому CONN_MAX_AGE отключается
+    if bool(int(os.environ.get("DB_POOL", 0))):
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+            "timeout": int(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        }
+elif DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    # WAL позволяет читать параллельно с записью, IMMEDIATE-транзакции
+    # исключают ошибки "database is locked" при повышении блокировки
+    DATABASES["default"]["OPTIONS"] = {
+        "init_command": (
+            "PRAGMA journal_mode=WAL;"
+            "PRAGMA synchronous=NORMAL;"
+            "PRAGMA temp_store=MEMORY;"
+            "PRAGMA cache_size=-20000;"
+            "PRAGMA mmap_size=134217728;"
+        ),
+        "transaction_mode": "IMMEDIATE",
+        "timeout": 20,
+    }
+    # Тестовая БД в файле, а не в памяти, чтобы тесты с параллельными
+    # потоками работали с блокировками SQLite так же, как сервер. Файл
+    # во временном каталоге, чтобы не попадать в рабочую копию
+    DATABASES["default"]["TEST"] = {
+        "NAME": os.path.join(tempfile.gettempdir(), "product_shop_test.sqlite3")
+    }
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "shop"),
+    }
+}
+
+# Время жизни кэшированных ответов каталога, сек
+SHOP_CATALOG_CACHE_TIMEOUT = int(os.environ.get("CATALOG_CACHE_TIMEOUT", 300))
+
+# Основной алгоритм хеширования паролей: pbkdf2, scrypt или argon2 (нужен
+# пакет argon2-cffi); auto — argon2 при наличии пакета, иначе scrypt.
+# Остальные алгоритмы проверяют старые пароли, которые при входе
+# перехешируются основным
+PASSWORD_HASHER_CLASSES = {
+    "argon2": "apps.users.hashers.Argon2PasswordHasher",
+    "scrypt": "apps.users.hashers.ScryptPasswordHasher",
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+}
+PASSWORD_HASHER = os.environ.get("PASSWORD_HASHER", "auto")
+if PASSWORD_HASHER == "auto":
+    PASSWORD_HASHER = "argon2" if find_spec("argon2") else "scrypt"
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_CLASSES[PASSWORD_HASHER],
+    *(
+        path
+        for name, path in PASSWORD_HASHER_CLASSES.items()
+        if name != PASSWORD_HASHER
+    ),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+
+# Пул процессов хеширования паролей при регистрации и входе: количество
+# процессов (0 — хеширование в потоке запроса), максимальное количество
+# паролей в пуле, после которого отвечают 429, и приоритет процессов
+USERS_HASHING_PROCESSES = int(os.environ.get("HASHING_PROCESSES", 2))
+USERS_HASHING_QUEUE = int(os.environ.get("HASHING_QUEUE", 16))
+USERS_HASHING_NICE = int(os.environ.get("HASHING_NICE", 10))
+USERS_HASHING_RETRY_AFTER = 1
+
+AUTHENTICATION_BACKENDS = ["apps.users.backends.PooledModelBackend"]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -98,19 +182,91 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.users.authentication.ClaimsJWTAuthentication",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # Лимиты запросов одного клиента по областям представлений (token bucket)
+    "DEFAULT_THROTTLE_CLASSES": ["apps.core.throttling.TokenBucketThrottle"],
+    "DEFAULT_THROTTLE_RATES": {
+        "catalog": os.environ.get("THROTTLE_CATALOG_RATE", "50/s"),
+        "cart": os.environ.get("THROTTLE_CART_RATE", "10/s"),
+        "auth": os.environ.get("THROTTLE_AUTH_RATE", "10/min"),
+    },
+    # Количество доверенных прокси перед сервером: клиент определяется по
+    # X-Forwarded-For только с учетом их адресов, при 0 — по REMOTE_ADDR,
+    # и подмена заголовка не обходит лимиты
+    "NUM_PROXIES": int(os.environ.get("NUM_PROXIES", 0)),
+    # JSON через orjson, без него — стандартный модуль json
+    "DEFAULT_RENDERER_CLASSES": [
+        "apps.core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "apps.core.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=60),
     "AUTH_HEADER_TYPES": ("JWT",),
+    "TOKEN_OBTAIN_SERIALIZER": "apps.users.serializers.CartTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "apps.users.serializers.CheckedTokenRefreshSerializer",
 }
 
+# Ограничение частоты запросов: хранение корзин жетонов в памяти процесса
+# (local) или в кэше Django (cache) для общего лимита нескольких процессов
+THROTTLE_ENABLED = bool(int(os.environ.get("THROTTLE_ENABLED", 1)))
+THROTTLE_BACKEND = os.environ.get("THROTTLE_BACKEND", "local")
+THROTTLE_CACHE = "default"
+
+# Время жизни пользователей в кэше аутентификации, сек; 0 — пользователь
+# создается из данных токена без запроса к БД
+USERS_AUTH_CACHE_TTL = int(os.environ.get("AUTH_CACHE_TTL", 0))
+
+# Время кэширования отметки отзыва токенов пользователя, сек: столько
+# отзыв может не действовать в других процессах при LocMemCache
+USERS_REVOCATION_CACHE_TTL = int(os.environ.get("REVOCATION_CACHE_TTL", 60))
+
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+# Отдача медиафайлов приложением (с Range, ETag и условными запросами),
+# если перед ним нет веб-сервера, отдающего MEDIA_ROOT; при DEBUG включена
+MEDIA_SERVE = bool(int(os.environ.get("MEDIA_SERVE", 0)))
+
+# Дерево категорий в памяти процесса: время жизни, сек, и загрузка при запуске
+SHOP_CATEGORY_TREE_TTL = int(os.environ.get("CATEGORY_TREE_TTL", 300))
+SHOP_CATEGORY_TREE_WARMUP = bool(int(os.environ.get("CATEGORY_TREE_WARMUP", 0)))
+
+# Размер пакета строк при потоковом экспорте продуктов
+SHOP_EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", 2000))
+
+# Лента изменений каталога: максимальное количество записей в ответе и
+# задержка в секундах, за которую успевают завершиться транзакции с более
+# ранними отметками времени изменения
+SHOP_CHANGES_PAGE_SIZE = int(os.environ.get("CHANGES_PAGE_SIZE", 500))
+SHOP_CHANGES_DELAY = float(os.environ.get("CHANGES_DELAY", 2))
+
+# Максимальное количество результатов полнотекстового поиска продуктов
+SHOP_SEARCH_MAX_RESULTS = int(os.environ.get("SEARCH_MAX_RESULTS", 1000))
+
+# Уменьшенные копии изображений создаются при сохранении продукта, а не при
+# первом запросе. SHOP_RENDITION_WORKERS — размер фонового пула (0 — синхронно)
+IMAGEKIT_DEFAULT_CACHEFILE_STRATEGY = "apps.shop.images.EagerRenditionStrategy"
+SHOP_RENDITION_WORKERS = int(os.environ.get("RENDITION_WORKERS", 2))
+
+# Метрики запросов: количество и время запросов к БД, время сериализации
+# и ответа в заголовке Server-Timing и на /metrics в формате Prometheus.
+# METRICS_TOKEN — токен Bearer для доступа к /metrics; без токена метрики
+# доступны только сотрудникам (is_staff)
+METRICS_ENABLED = bool(int(os.environ.get("METRICS_ENABLED", 1)))
+METRICS_SERVER_TIMING = bool(int(os.environ.get("METRICS_SERVER_TIMING", 1)))
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Асинхронные представления каталога и корзины для запуска под ASGI-сервером
+SHOP_ASYNC_VIEWS = bool(int(os.environ.get("ASYNC_VIEWS", 0)))
 
 SPECTACULAR_SETTINGS = {
     "TITLE": "Shop API Documentation",
@@ -0,0 +1,15 @@
+import pytest
+
+from apps.core.throttling import local_store
+
+
+@pytest.fixture(autouse=True)
+def disable_throttling(settings):
+    """
+    Ограничение частоты запросов проверяется отдельными тестами, в
+    остальных тестах запросы одного клиента не ограничиваются.
+    """
+    settings.THROTTLE_ENABLED = False
+    local_store.clear()
+    yield
+    local_store.clear()